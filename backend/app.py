@@ -4,46 +4,63 @@ AI-Powered Crypto Trading Assistant Backend
 This Flask backend provides endpoints for:
 - /ping: Health check
 - /price: Live crypto prices
+- /price/stream: Live price updates pushed as Server-Sent Events (only changed coins)
 - /predict: Price prediction
-- /sentiment: Fetches real Reddit headlines for BTC and ETH (for sentiment analysis)
+- /evaluate: Walk-forward evaluation of the prediction model (MAE, MAPE, RMSE)
+- /sentiment: Fetches real Reddit headlines for every tracked coin (for sentiment analysis)
 - /auth/register: User registration
 - /auth/login: User login
 - /auth/profile: Get user profile (protected)
 
 Reddit Integration:
-- Uses PRAW (Python Reddit API Wrapper) to fetch headlines from r/Bitcoin and r/Ethereum.
+- Uses PRAW (Python Reddit API Wrapper) to fetch headlines from each tracked coin's subreddit (r/Bitcoin and r/Ethereum by default).
+- Tracked coins are configured in symbols.py via CRYPTO_SYMBOLS or CRYPTO_SYMBOLS_FILE.
 - Credentials are loaded securely from a .env file (never hardcoded).
 - Headlines are fetched live every time /sentiment is called.
 
 How to use:
 - Set up a Reddit app (type: script) and store credentials in backend/.env
-- Install dependencies: pip install flask flask-cors praw python-dotenv requests scikit-learn numpy pyjwt werkzeug
+- Install dependencies: pip install -r requirements.txt
 - Run: python app.py
+- Heavy dependencies (pandas, yfinance, PRAW, feedparser, the sentiment lexicon) load on
+  first use or in the background after startup (see lazy.py), so /ping answers right away
+- Or, for many concurrent clients, run the async server: uvicorn asgi:application --port 5000 (see asgi.py)
 
 See code comments for detailed explanations.
 """
-from flask import Flask, jsonify, request  # importing Flask and jsonify from the flask module
+from flask import Flask, Response, g, jsonify, request  # importing Flask and jsonify from the flask module
 # This code sets up a basic Flask application with a single route.
 from flask_cors import CORS
 # CORS is used to handle Cross-Origin Resource Sharing (CORS) in Flask applications.
 import requests
 # requests is a Python library for making HTTP requests.
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit
 import time
 # time is used for caching the API response
-from sklearn.linear_model import LinearRegression
-import numpy as np
 from datetime import datetime, timedelta
 import os  # For environment variables
 from dotenv import load_dotenv  # To load .env file
-import praw  # Reddit API wrapper
-import feedparser  # For parsing RSS feeds
-from textblob import TextBlob  # For basic sentiment analysis
+import json
 import logging
-from typing import Dict, List, Optional, Any, Tuple
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Any, Tuple, Callable
 import random
-import yfinance as yf
+import secrets
+from lazy import Lazy, warm_up
+from cache_snapshot import CacheSnapshotter
+from response_cache import EncodedBody, encode_json
+from price_stream import PriceBroadcaster, Subscription
+from symbols import Coin, load_symbol_registry
+from quota import QuotaManager
+from user_store import UserStore
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry, UpstreamMetrics
+from token_cache import TokenCache
+from password_hasher import PasswordHasher, PasswordHasherBusy
 import jwt
-from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
 
 # Configure logging
@@ -54,7 +71,8 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)  # creates flask app named app
-CORS(app, origins=["https://ai-crypto-trading-assistant.vercel.app", "http://localhost:5173"])  # enables CORS for the Flask app
+CORS_ORIGINS = ["https://ai-crypto-trading-assistant.vercel.app", "http://localhost:5173"]
+CORS(app, origins=CORS_ORIGINS)  # enables CORS for the Flask app
 
 # JWT Configuration
 app.config['SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
@@ -64,105 +82,615 @@ app.config['JWT_ALGORITHM'] = 'HS256'
 # Why: Keeps your secrets (API keys, passwords) out of your codebase
 load_dotenv()
 
-# In-memory user storage (replace with database in production)
-users_db = {}
+# User accounts, persisted in SQLite (see user_store.py)
+USERS_DB_PATH = os.getenv('USERS_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'users.db'))
+user_store = UserStore(USERS_DB_PATH, pool_size=int(os.getenv('USERS_DB_POOL_SIZE', 4)))
+
+# Password hashing runs on its own bounded pool so login bursts can't occupy every web worker
+password_hasher = PasswordHasher(
+    workers=int(os.getenv('PASSWORD_HASH_WORKERS', 2)),
+    max_queue=int(os.getenv('PASSWORD_HASH_MAX_QUEUE', 8)),
+    admission_timeout=float(os.getenv('PASSWORD_HASH_ADMISSION_TIMEOUT', 0.5)),
+    method=os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+)
+
+def _estimate_size(value: Any, _seen: Optional[set] = None) -> int:
+    """
+    Approximates the memory footprint of a cached value in bytes.
+    Walks dicts, lists and tuples so nested API payloads are counted fully.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_estimate_size(k, _seen) + _estimate_size(v, _seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_estimate_size(item, _seen) for item in value)
+    return size
+
+def _is_empty(value: Any) -> bool:
+    """Treats None and empty containers (lists, dicts, DataFrames) as cache misses."""
+    if value is None:
+        return True
+    try:
+        return len(value) == 0
+    except TypeError:
+        return False
 
 class APICache:
     """
     Centralized caching system with intelligent cache duration strategy.
-    Prevents memory leaks and provides automatic expiration.
+    Bounded by entry count and an approximate byte budget, evicting the least
+    recently used entries first. All operations are thread-safe, and per-key
+    locks let one request fill a cache miss while concurrent requests wait.
     """
-    def __init__(self):
-        self._cache: Dict[str, Dict[str, Any]] = {}
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024, max_stale: int = 24 * 60 * 60,
+                 stale_while_revalidate: bool = True, refresh_workers: int = 4):
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_stale = max_stale  # How long expired entries are kept around for stale reads
+        self.stale_while_revalidate = stale_while_revalidate
+        self._refresh_workers = refresh_workers
+        self._refresh_executor: Optional[ThreadPoolExecutor] = None
+        self._refreshing: set = set()
+        self._total_bytes = 0
+        self._stats = {'hits': 0, 'misses': 0, 'stale_hits': 0, 'evictions': 0, 'expirations': 0}
+        self._type_stats: Dict[str, Dict[str, int]] = {}  # Same counters per cache_type
         self._cache_durations = {
             'price': 60,           # 1 minute - frequent updates needed
             'predict': 300,        # 5 minutes - computationally expensive
             'recommendation': 120, # 2 minutes - business logic
+            'sentiment': 120,      # 2 minutes - aggregated headline sentiment
             'historical': 3600,    # 1 hour - rarely changes
             'reddit_headlines': 300,  # 5 minutes - social media
             'rss_feeds': 600,      # 10 minutes - news updates
         }
     
-    def get(self, key: str) -> Optional[Any]:
-        """Get cached value if not expired."""
-        if key not in self._cache:
-            return None
-        
-        cache_entry = self._cache[key]
-        if time.time() - cache_entry['timestamp'] > cache_entry['duration']:
-            # Remove expired entry
-            del self._cache[key]
-            return None
-        
-        return cache_entry['value']
+    @staticmethod
+    def _is_expired(entry: Dict[str, Any], now: float) -> bool:
+        return now - entry['timestamp'] > entry['duration']
+    
+    def _count(self, stat: str, cache_type: str, n: int = 1) -> None:
+        # Caller must hold self._lock
+        self._stats[stat] += n
+        type_stats = self._type_stats.get(cache_type)
+        if type_stats is None:
+            type_stats = self._type_stats[cache_type] = dict.fromkeys(self._stats, 0)
+        type_stats[stat] += n
+    
+    def get(self, key: str, allow_expired: bool = False, cache_type: Optional[str] = None,
+            count: bool = True) -> Optional[Any]:
+        """
+        Get cached value if not expired.
+        With allow_expired=True an expired (stale) value is returned as well,
+        which lets callers fall back to old data when an upstream fails.
+        cache_type only labels the hit/miss counters when the key isn't cached;
+        count=False reads without counting (fallbacks after an already counted miss).
+        """
+        return self.lookup(key, allow_expired, cache_type, count)[0]
+    
+    def lookup(self, key: str, allow_expired: bool = False, cache_type: Optional[str] = None,
+               count: bool = True) -> Tuple[Optional[Any], bool]:
+        """
+        Like get(), but also says whether the value returned is stale, so a
+        stale-while-revalidate read is one lookup (and one hit/miss count).
+        Returns:
+            tuple: (value or None, stale)
+        """
+        with self._lock:
+            cache_entry = self._cache.get(key)
+            if cache_entry is None:
+                if count:
+                    self._count('misses', cache_type or 'unknown')
+                return None, False
+            
+            stale = self._is_expired(cache_entry, time.time())
+            if stale and not allow_expired:
+                if count:
+                    self._count('misses', cache_entry['cache_type'])
+                return None, False
+            if count:
+                self._count('stale_hits' if stale else 'hits', cache_entry['cache_type'])
+            
+            self._cache.move_to_end(key)
+            return cache_entry['value'], stale
     
     def set(self, key: str, value: Any, cache_type: str = 'default') -> None:
-        """Set cached value with appropriate duration."""
-        duration = self._cache_durations.get(cache_type, 60)
-        self._cache[key] = {
-            'value': value,
-            'timestamp': time.time(),
-            'duration': duration
-        }
-        logger.info(f"Cache set: {key} (type: {cache_type}, duration: {duration}s)")
+        """Set cached value with appropriate duration, evicting LRU entries if over budget."""
+        duration = self.duration_for(cache_type)
+        size = _estimate_size(value)
+        with self._lock:
+            if key in self._cache:
+                self._remove(key)
+            self._cache[key] = {
+                'value': value,
+                'timestamp': time.time(),
+                'duration': duration,
+                'cache_type': cache_type,
+                'size': size
+            }
+            self._total_bytes += size
+            self._evict_over_budget(keep=key)
+        logger.info(f"Cache set: {key} (type: {cache_type}, duration: {duration}s, size: {size}B)")
+    
+    def get_encoded(self, key: str, value: Any, render: Optional[Callable[[Any], bytes]] = None) -> EncodedBody:
+        """
+        Encoded JSON body (with ETag and compressed variants) for the value cached under key.
+        Built once per cached value and stored in its entry, so repeat requests skip encoding;
+        a new set() replaces the entry and with it the encoded body. A value that isn't the
+        one currently cached (fallbacks, errors) is encoded without being stored.
+        """
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry['value'] is value and 'encoded' in entry:
+                return entry['encoded']
+        encoded = encode_json(value, render)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry['value'] is value and 'encoded' not in entry:
+                entry['encoded'] = encoded
+                entry['size'] += encoded.size
+                self._total_bytes += encoded.size
+                self._evict_over_budget(keep=key)
+        return encoded
+    
+    def delete(self, key: str) -> None:
+        """Remove a single entry from the cache."""
+        with self._lock:
+            if key in self._cache:
+                self._remove(key)
+    
+    def get_lock(self, key: str) -> threading.Lock:
+        """
+        Returns the lock guarding fills for a key.
+        Callers that miss the cache take this lock and re-check before fetching,
+        so only one of them hits the upstream API (single-flight).
+        """
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+    
+    def get_or_load(self, key: str, loader: Callable[[], Any], cache_type: str = 'default') -> Optional[Any]:
+        """
+        Returns the cached value for key, calling loader once on a miss.
+        Concurrent callers for the same key wait for the first loader instead of
+        issuing duplicate upstream requests. Empty loader results are not cached.
+        """
+        value = self.get(key, cache_type=cache_type)
+        if not _is_empty(value):
+            return value
+        return self._fill(key, loader, cache_type)
+    
+    def _fill(self, key: str, loader: Callable[[], Any], cache_type: str) -> Optional[Any]:
+        # Single-flight fill after a (counted) miss; the re-check under the lock isn't a new lookup
+        with self.get_lock(key):
+            value = self.get(key, cache_type=cache_type, count=False)
+            if not _is_empty(value):
+                return value
+            value = loader()
+            if not _is_empty(value):
+                self.set(key, value, cache_type)
+            return value
+    
+    def get_or_refresh(self, key: str, loader: Callable[[], Any], cache_type: str = 'default') -> Optional[Any]:
+        """
+        Stale-while-revalidate read.
+        Fresh entries are returned as-is. Expired entries are returned immediately
+        while a background worker reloads them. Only a true miss blocks on loader.
+        """
+        if not self.stale_while_revalidate:
+            return self.get_or_load(key, loader, cache_type)
+        value, stale = self.lookup(key, allow_expired=True, cache_type=cache_type)
+        if not _is_empty(value):
+            if stale:
+                self.refresh(key, loader, cache_type)
+            return value
+        return self._fill(key, loader, cache_type)
+    
+    def refresh(self, key: str, loader: Callable[[], Any], cache_type: str = 'default') -> bool:
+        """
+        Reloads key in the background. Returns False if a refresh for the key
+        is already queued or a foreground request is currently filling it.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(
+                    max_workers=self._refresh_workers, thread_name_prefix='cache-refresh'
+                )
+            executor = self._refresh_executor
+        executor.submit(self._run_refresh, key, loader, cache_type)
+        return True
+    
+    def _run_refresh(self, key: str, loader: Callable[[], Any], cache_type: str) -> None:
+        lock = self.get_lock(key)
+        try:
+            # Skip if another thread is already loading this key
+            if not lock.acquire(blocking=False):
+                return
+            try:
+                value = loader()
+                if not _is_empty(value):
+                    self.set(key, value, cache_type)
+                    logger.info(f"Background refresh complete: {key}")
+                else:
+                    logger.warning(f"Background refresh returned no data for {key}, keeping stale value")
+            finally:
+                lock.release()
+        except Exception as e:
+            logger.error(f"Background refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+    
+    def expires_in(self, key: str) -> Optional[float]:
+        """Seconds until key expires (negative once stale), or None if not cached."""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            return entry['timestamp'] + entry['duration'] - time.time()
+    
+    def duration_for(self, cache_type: str) -> int:
+        """TTL in seconds used for a cache type."""
+        return self._cache_durations.get(cache_type, 60)
+    
+    def _remove(self, key: str) -> None:
+        # Caller must hold self._lock
+        entry = self._cache.pop(key)
+        self._total_bytes -= entry['size']
+        lock = self._key_locks.get(key)
+        if lock is not None and not lock.locked():
+            del self._key_locks[key]
+    
+    def _evict_over_budget(self, keep: Optional[str] = None) -> None:
+        # Caller must hold self._lock. Evicts from the LRU end until within limits.
+        while self._cache and (len(self._cache) > self.max_entries or self._total_bytes > self.max_bytes):
+            oldest = next(iter(self._cache))
+            if oldest == keep:
+                if len(self._cache) == 1:
+                    break  # A single oversized entry is kept rather than thrashing
+                self._cache.move_to_end(oldest)
+                continue
+            self._count('evictions', self._cache[oldest]['cache_type'])
+            self._remove(oldest)
+            logger.info(f"Cache evicted: {oldest}")
     
     def clear_expired(self) -> None:
-        """Remove all expired cache entries."""
+        """Remove cache entries that have been expired for longer than max_stale."""
         current_time = time.time()
-        expired_keys = [
-            key for key, entry in self._cache.items()
-            if current_time - entry['timestamp'] > entry['duration']
-        ]
-        for key in expired_keys:
-            del self._cache[key]
+        with self._lock:
+            expired_keys = [
+                key for key, entry in self._cache.items()
+                if current_time - entry['timestamp'] > entry['duration'] + self.max_stale
+            ]
+            for key in expired_keys:
+                self._count('expirations', self._cache[key]['cache_type'])
+                self._remove(key)
         if expired_keys:
             logger.info(f"Cleared {len(expired_keys)} expired cache entries")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Returns entry counts, memory usage and hit/miss counters."""
+        current_time = time.time()
+        with self._lock:
+            by_type: Dict[str, Dict[str, int]] = {}
+            stale_entries = 0
+            for entry in self._cache.values():
+                type_stats = by_type.setdefault(entry['cache_type'], {'entries': 0, 'bytes': 0})
+                type_stats['entries'] += 1
+                type_stats['bytes'] += entry['size']
+                if self._is_expired(entry, current_time):
+                    stale_entries += 1
+            return {
+                'total_entries': len(self._cache),
+                'stale_entries': stale_entries,
+                'max_entries': self.max_entries,
+                'total_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'by_type': by_type,
+                'counters_by_type': {name: dict(counters) for name, counters in self._type_stats.items()},
+                **self._stats
+            }
+    
+    def export_entries(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Copies of every entry, least recently used first, for snapshots.
+        Only references are copied under the lock; values are shared, not deep-copied
+        (cached values are replaced on set, never mutated).
+        """
+        with self._lock:
+            entries = []
+            for key, entry in self._cache.items():
+                entry = dict(entry)
+                encoded = entry.pop('encoded', None)
+                if encoded is not None:
+                    entry['size'] -= encoded.size  # Rebuilt on first request after a restore
+                entries.append((key, entry))
+            return entries
+    
+    def restore_entries(self, entries: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Inserts entries from a snapshot with their original timestamp and duration.
+        Keys cached since startup are fresher and are kept; entries that have been
+        expired for longer than max_stale are dropped. Restored entries go to the LRU
+        end, in their original order. Returns the number of entries restored.
+        """
+        current_time = time.time()
+        restored = 0
+        with self._lock:
+            for key, entry in reversed(entries):
+                if key in self._cache or current_time - entry['timestamp'] > entry['duration'] + self.max_stale:
+                    continue
+                self._cache[key] = entry
+                self._cache.move_to_end(key, last=False)
+                self._total_bytes += entry['size']
+                restored += 1
+            self._evict_over_budget()
+        return restored
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._cache)
+
+class CacheRefresher:
+    """
+    Proactively refreshes hot cache keys before they expire.
+    Each registered key is reloaded once it has used refresh_ratio of its TTL,
+    so requests for those keys never see a cold or expired entry.
+    """
+    def __init__(self, cache: APICache, refresh_ratio: float = 0.8, min_interval: float = 1.0, max_interval: float = 60.0):
+        self.cache = cache
+        self.refresh_ratio = refresh_ratio
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._jobs: Dict[str, Tuple[Callable[[], Any], str]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def register(self, key: str, loader: Callable[[], Any], cache_type: str) -> None:
+        """Registers a hot key and the loader that rebuilds it."""
+        self._jobs[key] = (loader, cache_type)
+    
+    def run_once(self) -> float:
+        """
+        Refreshes every key that is due and returns how long to sleep until the next one is.
+        """
+        next_due = self.max_interval
+        for key, (loader, cache_type) in list(self._jobs.items()):
+            duration = self.cache.duration_for(cache_type)
+            # Refresh when less than (1 - refresh_ratio) of the TTL is left
+            lead_time = duration * (1 - self.refresh_ratio)
+            remaining = self.cache.expires_in(key)
+            if remaining is None or remaining <= lead_time:
+                self.cache.refresh(key, loader, cache_type)
+                due_in = duration * self.refresh_ratio
+            else:
+                due_in = remaining - lead_time
+            next_due = min(next_due, due_in)
+        return max(self.min_interval, next_due)
+    
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                wait = self.run_once()
+            except Exception as e:
+                logger.error(f"Cache refresher error: {e}")
+                wait = self.max_interval
+            self._stop.wait(wait)
+    
+    def start(self) -> None:
+        """Starts the refresher in a daemon thread (no-op if already running)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='cache-refresher', daemon=True)
+        self._thread.start()
+        logger.info(f"Cache refresher started for {len(self._jobs)} hot keys")
+    
+    def stop(self) -> None:
+        self._stop.set()
+
+try:
+    import h2  # noqa: F401  Optional: enables HTTP/2 upstream connections through httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 class APIRequestHandler:
     """
     Handles API requests with exponential backoff and retry logic.
     Provides graceful degradation and proper error handling.
+
+    Requests reuse one pooled keep-alive session per upstream host, so repeated
+    CoinGecko calls skip the TCP+TLS handshake. Each host's pool is capped at
+    pool_maxsize connections and blocks when full: a cold-cache burst queues
+    for a connection instead of opening dozens of sockets. With http2=True (and
+    the optional h2 package installed) hosts are served by an httpx HTTP/2 client
+    that multiplexes concurrent requests over a single connection.
+
+    With a QuotaManager, each attempt first takes a token from the upstream's shared
+    budget, and an open circuit breaker fails the call at once (see quota.py).
+    With a MetricsRegistry, every attempt's outcome and latency and every retry is counted.
     """
-    def __init__(self, max_retries: int = 3, timeout: int = 10):
+    def __init__(self, max_retries: int = 3, timeout: int = 10, pool_maxsize: int = 10, http2: bool = False,
+                 quota: Optional[QuotaManager] = None, metrics: Optional[MetricsRegistry] = None):
         self.max_retries = max_retries
+        self.quota = quota
+        self.metrics = UpstreamMetrics(metrics) if metrics is not None else None
         self.timeout = timeout
-    
+        self.pool_maxsize = pool_maxsize
+        self.http2 = http2 and HTTP2_AVAILABLE
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1 keep-alive")
+        self._sessions: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._protocols: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._timeout_errors: Tuple[type, ...] = (requests.exceptions.Timeout,)
+        self._request_errors: Tuple[type, ...] = (requests.exceptions.RequestException,)
+        if self.http2:
+            import httpx
+            self._timeout_errors += (httpx.TimeoutException,)
+            self._request_errors += (httpx.HTTPError,)
+
+    @staticmethod
+    def _host(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def _session(self, host: str) -> Any:
+        """Returns the pooled session for a host, creating it on first use."""
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                if self.http2:
+                    import httpx
+                    limits = httpx.Limits(max_connections=self.pool_maxsize, max_keepalive_connections=self.pool_maxsize)
+                    session = httpx.Client(http2=True, limits=limits, follow_redirects=True)
+                else:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, pool_block=True)
+                    session.mount(host, adapter)
+                self._sessions[host] = session
+                self._stats[host] = {'requests': 0, 'connections': 0}
+            return session
+
+    def _count_connection(self, host: str) -> Callable[[str, Dict], None]:
+        """httpx trace hook counting new TCP connections (urllib3 pools count their own)."""
+        def trace(event: str, info: Dict) -> None:
+            if event == 'connection.connect_tcp.complete':
+                with self._lock:
+                    self._stats[host]['connections'] += 1
+        return trace
+
+    def _get(self, url: str, params: Optional[Dict], headers: Optional[Dict], timeout: int) -> Any:
+        host = self._host(url)
+        session = self._session(host)
+        with self._lock:
+            self._stats[host]['requests'] += 1
+        if self.http2:
+            response = session.get(url, params=params, headers=headers, timeout=timeout,
+                                   extensions={'trace': self._count_connection(host)})
+            # HTTP/2 is negotiated via ALPN, so record what the server actually spoke
+            self._protocols[host] = response.http_version
+            return response
+        return session.get(url, params=params, headers=headers, timeout=timeout)
+
+    @staticmethod
+    def _retry_after(response: Any, attempt: int) -> float:
+        """Seconds to back off after a 429: the Retry-After header if given, else exponential."""
+        try:
+            return float(response.headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            return (2 ** attempt) + random.uniform(0, 1)
+
+    def connection_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Connection reuse per upstream host.
+        Returns:
+            dict: host -> {'protocol', 'requests', 'connections', 'reused', 'pool_maxsize'}
+        """
+        with self._lock:
+            hosts = [(host, self._sessions[host], dict(self._stats[host])) for host in self._sessions]
+        stats: Dict[str, Dict[str, Any]] = {}
+        for host, session, counts in hosts:
+            connections = counts['connections']
+            if not self.http2:
+                # urllib3 counts the sockets each connection pool has opened
+                pools = session.get_adapter(host).poolmanager.pools
+                connections = sum(pools[key].num_connections for key in list(pools.keys()) if key in pools)
+            stats[host] = {
+                'protocol': self._protocols.get(host, 'HTTP/1.1'),
+                'requests': counts['requests'],
+                'connections': connections,
+                'reused': max(counts['requests'] - connections, 0),
+                'pool_maxsize': self.pool_maxsize
+            }
+        return stats
+
+    def close(self) -> None:
+        """Closes every pooled session."""
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+            self._stats = {}
+        for session in sessions:
+            session.close()
+
     def make_request(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None, timeout: Optional[int] = None) -> Tuple[Optional[Dict], Optional[str]]:
         """
         Make HTTP request with exponential backoff and retry logic.
         Returns (response_data, error_message)
         """
         request_timeout = timeout if timeout is not None else self.timeout
+        upstream = self.quota.upstream_for(url) if self.quota else None
+        metrics_label = upstream or self._host(url)
         
         for attempt in range(self.max_retries):
+            if self.quota:
+                # Take from the shared budget before sending; fail fast if the upstream is down
+                quota_error = self.quota.acquire(upstream)
+                if quota_error:
+                    logger.warning(f"Not requesting {url}: {quota_error}")
+                    return None, quota_error
+            if attempt and self.metrics:
+                self.metrics.retry(metrics_label)
+            started = time.perf_counter()
+            status = None
             try:
                 logger.info(f"Making request to {url} (attempt {attempt + 1}/{self.max_retries})")
-                response = requests.get(
-                    url, 
-                    params=params, 
-                    headers=headers, 
-                    timeout=request_timeout
-                )
+                response = self._get(url, params, headers, request_timeout)
+                status = response.status_code
+                if self.metrics:
+                    self.metrics.observe(metrics_label, status, time.perf_counter() - started)
                 
                 logger.info(f"Response status: {response.status_code}")
                 
                 if response.status_code == 429:  # Too Many Requests
-                    wait_time = (2 ** attempt) + random.uniform(0, 1)
+                    wait_time = self._retry_after(response, attempt)
                     logger.warning(f"Rate limited (attempt {attempt + 1}/{self.max_retries}). Waiting {wait_time:.1f}s")
-                    time.sleep(wait_time)
+                    if self.quota:
+                        # Every worker backs off together; the next acquire() waits or fails fast
+                        self.quota.throttle(upstream, wait_time)
+                    else:
+                        time.sleep(wait_time)
                     continue
                 
+                if self.quota:
+                    if response.status_code >= 500:
+                        self.quota.record_failure(upstream)
+                    else:
+                        self.quota.record_success(upstream)
                 response.raise_for_status()
                 return response.json(), None
                 
-            except requests.exceptions.Timeout:
+            except self._timeout_errors:
                 logger.warning(f"Request timeout (attempt {attempt + 1}/{self.max_retries})")
+                if self.metrics:
+                    self.metrics.observe(metrics_label, 'timeout', time.perf_counter() - started)
+                if self.quota:
+                    self.quota.record_failure(upstream)
                 if attempt == self.max_retries - 1:
                     return None, "Request timeout"
                 time.sleep(2 ** attempt)
                 
-            except requests.exceptions.RequestException as e:
+            except self._request_errors as e:
                 logger.error(f"Request failed (attempt {attempt + 1}/{self.max_retries}): {e}")
+                if self.metrics and status is None:
+                    self.metrics.observe(metrics_label, 'error', time.perf_counter() - started)
+                if self.quota and getattr(e, 'response', None) is None:
+                    # Connection-level failure (an HTTP error response was already recorded above)
+                    self.quota.record_failure(upstream)
                 if attempt == self.max_retries - 1:
                     return None, f"Request failed: {str(e)}"
                 time.sleep(2 ** attempt)
@@ -170,23 +698,163 @@ class APIRequestHandler:
         return None, "Max retries exceeded"
 
 # Initialize global instances
-api_cache = APICache()
-request_handler = APIRequestHandler()
+# Request latency, cache, upstream and model-fit metrics, served at /metrics
+metrics = MetricsRegistry()
+request_seconds = metrics.histogram('http_request_duration_seconds', 'Request latency by route', ['route', 'method'])
+request_count = metrics.counter('http_requests_total', 'Requests by route and status', ['route', 'method', 'status'])
+
+api_cache = APICache(
+    max_entries=int(os.getenv('CACHE_MAX_ENTRIES', 1000)),
+    max_bytes=int(os.getenv('CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+    stale_while_revalidate=os.getenv('CACHE_STALE_WHILE_REVALIDATE', 'true').lower() == 'true'
+)
+cache_refresher = CacheRefresher(api_cache)
+
+# Warm-restart snapshots of api_cache (set CACHE_SNAPSHOT_PATH to an empty string to disable)
+CACHE_SNAPSHOT_PATH = os.getenv('CACHE_SNAPSHOT_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'cache.snapshot'))
+cache_snapshotter = CacheSnapshotter(
+    api_cache, CACHE_SNAPSHOT_PATH, interval=float(os.getenv('CACHE_SNAPSHOT_INTERVAL', 60))
+) if CACHE_SNAPSHOT_PATH else None
+
+# Tracked coins (CRYPTO_SYMBOLS / CRYPTO_SYMBOLS_FILE, default BTC and ETH)
+symbol_registry = load_symbol_registry()
+
+# Components below pull in pandas, yfinance, PRAW or the sentiment lexicon, so they are
+# built on first use (get_market_data() etc.) instead of at import. Module attribute
+# access (app.market_data) goes through the same accessors, see __getattr__ at the bottom.
+
+# On-disk candle store (set PRICE_STORE_DIR to an empty string to disable)
+PRICE_STORE_DIR = os.getenv('PRICE_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'prices'))
+
+def _build_price_store() -> Optional[Any]:
+    from price_store import PriceStore
+    return PriceStore(PRICE_STORE_DIR) if PRICE_STORE_DIR else None
+
+def _build_market_data() -> Any:
+    # Shared Yahoo Finance layer: one batched download covers every symbol
+    from market_data import MarketData
+    return MarketData(api_cache, symbol_registry.yahoo_tickers(), store=get_price_store())
+
+def _build_prediction_cache() -> Any:
+    # Fitted /predict series, keyed by (symbol, window) and invalidated by new candles
+    from prediction import PredictionCache
+    return PredictionCache(api_cache, metrics=metrics)
+
+def _build_sentiment_engine() -> Any:
+    # Headline polarity scores, memoized by content hash. Batches of at least
+    # SENTIMENT_POOL_THRESHOLD new headlines are scored on worker processes (started on first use).
+    from sentiment_engine import ScoringPool, SentimentEngine
+    engine = SentimentEngine(
+        max_entries=int(os.getenv('SENTIMENT_CACHE_ENTRIES', 50000)),
+        pool=ScoringPool(workers=int(os.getenv('SENTIMENT_POOL_WORKERS', 0)) or None),
+        pool_threshold=int(os.getenv('SENTIMENT_POOL_THRESHOLD', 5000))
+    )
+    engine.lexicon  # compile TextBlob's lexicon here rather than on the first /sentiment
+    return engine
+
+# Rule set /recommendation uses when the request doesn't name one
+RECOMMENDATION_RULES = os.getenv('RECOMMENDATION_RULES', 'classic')
+
+def _build_rule_sets() -> Dict[str, Any]:
+    # Built-in /recommendation rule sets plus RECOMMENDATION_RULES_FILE
+    from recommender import load_rule_sets
+    return load_rule_sets()
+
+def _build_indicator_engine() -> Optional[Any]:
+    # SMA/EMA/RSI/MACD/Bollinger per symbol, backfilled from the store and then updated per new candle
+    from indicators import IndicatorEngine
+    store = get_price_store()
+    return IndicatorEngine(store) if store is not None else None
+
+price_store_component = Lazy('price_store', _build_price_store)
+market_data_component = Lazy('market_data', _build_market_data)
+prediction_component = Lazy('prediction_cache', _build_prediction_cache)
+sentiment_component = Lazy('sentiment_engine', _build_sentiment_engine)
+indicator_component = Lazy('indicator_engine', _build_indicator_engine)
+rule_sets_component = Lazy('recommendation_rules', _build_rule_sets)
+
+def get_price_store() -> Optional[Any]:
+    return price_store_component.get()
+
+def get_market_data() -> Any:
+    return market_data_component.get()
+
+def get_prediction_cache() -> Any:
+    return prediction_component.get()
+
+def get_sentiment_engine() -> Any:
+    return sentiment_component.get()
+
+def get_indicator_engine() -> Optional[Any]:
+    return indicator_component.get()
+
+def get_rule_sets() -> Dict[str, Any]:
+    return rule_sets_component.get()
+
+def component_stats() -> Dict[str, Optional[float]]:
+    """Load time (ms) of each lazy component, None while it hasn't been loaded."""
+    return {
+        component.name: round(component.load_seconds * 1000, 1) if component.load_seconds is not None else None
+        for component in LAZY_COMPONENTS
+    }
+
+# Headline sources (Reddit, RSS) are fetched in parallel on this pool
+SENTIMENT_SOURCE_TIMEOUT = float(os.getenv('SENTIMENT_SOURCE_TIMEOUT', 8))
+headline_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='headline-source')
+
+# CoinGecko API root (overridable to point at a mirror or the benchmark's fake upstream)
+COINGECKO_API_URL = os.getenv('COINGECKO_API_URL', 'https://api.coingecko.com/api/v3').rstrip('/')
+
+# Shared per-upstream call budgets (calls per minute) and circuit breakers
+quota_manager = QuotaManager(
+    limits={
+        'coingecko': (float(os.getenv('COINGECKO_CALLS_PER_MINUTE', 30)), None),
+        'reddit': (float(os.getenv('REDDIT_CALLS_PER_MINUTE', 60)), None),
+    },
+    hosts={
+        'api.coingecko.com': 'coingecko', urlsplit(COINGECKO_API_URL).hostname: 'coingecko',
+        'www.reddit.com': 'reddit', 'oauth.reddit.com': 'reddit'
+    },
+    # Anything else (RSS feeds) gets a budget per host
+    default_limit=(float(os.getenv('RSS_CALLS_PER_MINUTE', 30)), None),
+    max_wait=float(os.getenv('QUOTA_MAX_WAIT', 2)),
+    failure_threshold=int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5)),
+    reset_timeout=float(os.getenv('CIRCUIT_RESET_TIMEOUT', 30))
+)
+
+request_handler = APIRequestHandler(
+    pool_maxsize=int(os.getenv('UPSTREAM_POOL_MAXSIZE', 10)),
+    http2=os.getenv('UPSTREAM_HTTP2', 'false').lower() == 'true',
+    quota=quota_manager,
+    metrics=metrics
+)
 
 # Set up Reddit API client using credentials from .env
 # Why: Authenticates your app with Reddit so you can fetch posts programmatically
-try:
-    reddit = praw.Reddit(
-        client_id=os.getenv('REDDIT_CLIENT_ID'),
-        client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
-        user_agent=os.getenv('REDDIT_USER_AGENT'),
-        username=os.getenv('REDDIT_USERNAME'),
-        password=os.getenv('REDDIT_PASSWORD')
-    )
-    logger.info("Reddit API client initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize Reddit client: {e}")
-    reddit = None
+def _build_reddit() -> Optional[Any]:
+    import praw  # Reddit API wrapper
+    try:
+        client = praw.Reddit(
+            client_id=os.getenv('REDDIT_CLIENT_ID'),
+            client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
+            user_agent=os.getenv('REDDIT_USER_AGENT'),
+            username=os.getenv('REDDIT_USERNAME'),
+            password=os.getenv('REDDIT_PASSWORD')
+        )
+        logger.info("Reddit API client initialized successfully")
+        return client
+    except Exception as e:
+        logger.error(f"Failed to initialize Reddit client: {e}")
+        return None
+
+reddit_component = Lazy('reddit', _build_reddit)
+
+def get_reddit() -> Optional[Any]:
+    return reddit_component.get()
+
+# Warm-up order: /price needs market_data (and the price store) first
+LAZY_COMPONENTS = [price_store_component, market_data_component, indicator_component,
+                   rule_sets_component, prediction_component, sentiment_component, reddit_component]
 
 # JWT Authentication Functions
 def generate_token(user_id: str) -> str:
@@ -194,40 +862,67 @@ def generate_token(user_id: str) -> str:
     payload = {
         'user_id': user_id,
         'exp': datetime.utcnow() + timedelta(days=7),  # Token expires in 7 days
-        'iat': datetime.utcnow()
+        'iat': datetime.utcnow(),
+        'jti': secrets.token_hex(8)  # Unique per token, so revoking one never hits a re-issued twin
     }
     return jwt.encode(payload, app.config['SECRET_KEY'], algorithm=app.config['JWT_ALGORITHM'])
 
+# Claims of already-verified tokens, so repeat requests skip the signature check
+token_cache = TokenCache(max_entries=int(os.getenv('TOKEN_CACHE_ENTRIES', 10000)))
+
 def verify_token(token: str) -> Optional[Dict]:
     """Verify JWT token and return payload if valid."""
-    try:
-        payload = jwt.decode(token, app.config['SECRET_KEY'], algorithms=[app.config['JWT_ALGORITHM']])
-        return payload
-    except jwt.ExpiredSignatureError:
-        logger.warning("Token expired")
-        return None
-    except jwt.InvalidTokenError:
-        logger.warning("Invalid token")
+    payload = token_cache.get(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, app.config['SECRET_KEY'], algorithms=[app.config['JWT_ALGORITHM']])
+        except jwt.ExpiredSignatureError:
+            logger.warning("Token expired")
+            return None
+        except jwt.InvalidTokenError:
+            logger.warning("Invalid token")
+            return None
+        token_cache.put(token, payload)
+    if token_cache.is_revoked(token, payload):
+        logger.warning("Revoked token")
         return None
+    return payload
+
+def revoke_token(token: str) -> None:
+    """Rejects a token from now on (e.g. on logout)."""
+    payload = verify_token(token)
+    token_cache.revoke(token, payload.get('exp') if payload else None)
+
+def revoke_user_tokens(user_id: str) -> None:
+    """Rejects every token issued to a user before the current second (e.g. on /auth/logout-all)."""
+    token_cache.revoke_user(user_id)
+
+def authenticate(auth_header: Optional[str]) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Validates an Authorization header value.
+    Returns (payload, None) on success or (None, error_message) for a 401 response.
+    """
+    if not auth_header:
+        return None, 'Authorization header missing'
+    
+    try:
+        # Extract token from "Bearer <token>"
+        token = auth_header.split(' ')[1]
+    except IndexError:
+        return None, 'Invalid authorization header format'
+    
+    payload = verify_token(token)
+    if not payload:
+        return None, 'Invalid or expired token'
+    return payload, None
 
 def require_auth(f):
     """Decorator to require authentication for protected endpoints."""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        auth_header = request.headers.get('Authorization')
-        
-        if not auth_header:
-            return jsonify({'error': 'Authorization header missing'}), 401
-        
-        try:
-            # Extract token from "Bearer <token>"
-            token = auth_header.split(' ')[1]
-        except IndexError:
-            return jsonify({'error': 'Invalid authorization header format'}), 401
-        
-        payload = verify_token(token)
-        if not payload:
-            return jsonify({'error': 'Invalid or expired token'}), 401
+        payload, error = authenticate(request.headers.get('Authorization'))
+        if error:
+            return jsonify({'error': error}), 401
         
         # Add user info to request context
         request.user_id = payload['user_id']
@@ -235,6 +930,33 @@ def require_auth(f):
     
     return decorated_function
 
+def auth_busy_response():
+    """503 for when the password hashing pool is saturated; clients retry shortly."""
+    logger.warning("Password hashing pool saturated, rejecting auth request")
+    response = jsonify({'error': 'Too many sign-in attempts right now, please retry shortly'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+# Hot read endpoints answer from pre-encoded bodies (see response_cache.py)
+def encoded_response(encoded: EncodedBody) -> Response:
+    """
+    JSON response from an EncodedBody: 304 when the client's If-None-Match still
+    matches, otherwise the smallest encoding the client accepts.
+    """
+    body, content_encoding = encoded.negotiate(request.headers.get('Accept-Encoding'))
+    # private: bodies can be per-user; no-cache: clients revalidate with the ETag every time
+    headers = {'ETag': encoded.etag_for(content_encoding), 'Cache-Control': 'private, no-cache',
+               'Vary': 'Accept-Encoding'}
+    if encoded.matches(request.headers.get('If-None-Match')):
+        return Response(status=304, headers=headers)
+    if content_encoding:
+        headers['Content-Encoding'] = content_encoding
+    return Response(body, mimetype='application/json', headers=headers)
+
+def cached_json_response(key: str, value: Any, render: Optional[Callable[[Any], bytes]] = None) -> Response:
+    """encoded_response for the value cached under key, encoding it only once."""
+    return encoded_response(api_cache.get_encoded(key, value, render))
+
 # Authentication Endpoints
 @app.route('/auth/register', methods=['POST'])
 def register():
@@ -255,21 +977,19 @@ def register():
     if len(password) < 6:
         return jsonify({'error': 'Password must be at least 6 characters'}), 400
     
-    # Check if user already exists
-    if email in users_db:
+    # Why: a duplicate is rejected before hashing, so repeated sign-ups can't tie up the hashing pool
+    if user_store.get_by_email(email) is not None:
         return jsonify({'error': 'User already exists'}), 409
     
-    # Create new user
-    user_id = str(len(users_db) + 1)
-    hashed_password = generate_password_hash(password)
-    
-    users_db[email] = {
-        'id': user_id,
-        'email': email,
-        'username': username,
-        'password': hashed_password,
-        'created_at': datetime.utcnow().isoformat()
-    }
+    # Create new user; the store assigns the id and rejects an existing email atomically (concurrent sign-ups)
+    try:
+        hashed_password = password_hasher.hash(password)
+    except PasswordHasherBusy:
+        return auth_busy_response()
+    user = user_store.create(email, username, hashed_password)
+    if user is None:
+        return jsonify({'error': 'User already exists'}), 409
+    user_id = user['id']
     
     # Generate token nn
     token = generate_token(user_id)
@@ -301,13 +1021,16 @@ def login():
         return jsonify({'error': 'Email and password are required'}), 400
     
     # Check if user exists
-    if email not in users_db:
+    user = user_store.get_by_email(email)
+    if user is None:
         return jsonify({'error': 'Invalid credentials'}), 401
     
-    user = users_db[email]
-    
     # Verify password
-    if not check_password_hash(user['password'], password):
+    try:
+        valid = password_hasher.verify(user['password'], password)
+    except PasswordHasherBusy:
+        return auth_busy_response()
+    if not valid:
         return jsonify({'error': 'Invalid credentials'}), 401
     
     # Generate token
@@ -325,18 +1048,30 @@ def login():
         }
     })
 
+@app.route('/auth/logout', methods=['POST'])
+@require_auth
+def logout():
+    """Revoke the token used for this request."""
+    revoke_token(request.headers['Authorization'].split(' ')[1])
+    return jsonify({'message': 'Logged out'})
+
+@app.route('/auth/logout-all', methods=['POST'])
+@require_auth
+def logout_all():
+    """Revoke every token issued to this user, e.g. after a lost device."""
+    revoke_user_tokens(request.user_id)
+    # The user cutoff has one-second resolution; this token may be from the current second
+    revoke_token(request.headers['Authorization'].split(' ')[1])
+    return jsonify({'message': 'Logged out everywhere'})
+
 @app.route('/auth/profile', methods=['GET'])
 @require_auth
 def get_profile():
     """Get user profile (protected endpoint)."""
     user_id = request.user_id
     
-    # Find user by ID
-    user = None
-    for email, user_data in users_db.items():
-        if user_data['id'] == user_id:
-            user = user_data
-            break
+    # Find user by ID (primary key lookup)
+    user = user_store.get_by_id(user_id)
     
     if not user:
         return jsonify({'error': 'User not found'}), 404
@@ -360,28 +1095,37 @@ def get_reddit_headlines(subreddit_name: str, limit: int = 10) -> List[str]:
         list of str: List of post titles (headlines)
     """
     cache_key = f"reddit_headlines_{subreddit_name}_{limit}"
-    cached_result = api_cache.get(cache_key)
+    cached_result = api_cache.get(cache_key, cache_type='reddit_headlines')
     if cached_result:
         logger.info(f"Serving cached Reddit headlines for r/{subreddit_name}")
         return cached_result
     
     headlines = []
+    reddit = get_reddit()
+    if reddit is None:
+        logger.error("Reddit client not initialized")
+        return headlines
+    
+    quota_error = quota_manager.acquire('reddit')
+    if quota_error:
+        logger.warning(f"Skipping r/{subreddit_name}: {quota_error}")
+        return api_cache.get(cache_key, allow_expired=True, count=False) or headlines
+    
     try:
-        if reddit is None:
-            logger.error("Reddit client not initialized")
-            return headlines
-            
         subreddit = reddit.subreddit(subreddit_name)
         for submission in subreddit.hot(limit=limit):
             # Only include non-stickied posts
             if not submission.stickied:
                 headlines.append(submission.title)
         
+        quota_manager.record_success('reddit')
         api_cache.set(cache_key, headlines, 'reddit_headlines')
         logger.info(f"Fetched {len(headlines)} headlines from r/{subreddit_name}")
         
     except Exception as e:
+        quota_manager.record_failure('reddit')
         logger.error(f"Error fetching from r/{subreddit_name}: {e}")
+        return api_cache.get(cache_key, allow_expired=True, count=False) or headlines
     
     return headlines
 
@@ -398,27 +1142,40 @@ def get_rss_headlines(feed_url: str, limit: int = 10) -> List[str]:
         list of str: List of news headlines.
     """
     cache_key = f"rss_headlines_{feed_url}_{limit}"
-    cached_result = api_cache.get(cache_key)
+    cached_result = api_cache.get(cache_key, cache_type='rss_feeds')
     if cached_result:
         logger.info(f"Serving cached RSS headlines from {feed_url}")
         return cached_result
     
     headlines = []
+    upstream = quota_manager.upstream_for(feed_url)
+    quota_error = quota_manager.acquire(upstream)
+    if quota_error:
+        logger.warning(f"Skipping RSS feed {feed_url}: {quota_error}")
+        return api_cache.get(cache_key, allow_expired=True, count=False) or headlines
+    
     try:
+        import feedparser  # For parsing RSS feeds
         feed = feedparser.parse(feed_url)
+        # feedparser doesn't raise on network errors; it flags them as bozo with no entries
+        if feed.bozo and not feed.entries:
+            raise feed.bozo_exception
         for entry in feed.entries[:limit]:
             headlines.append(entry.title)
         
+        quota_manager.record_success(upstream)
         api_cache.set(cache_key, headlines, 'rss_feeds')
         logger.info(f"Fetched {len(headlines)} headlines from {feed_url}")
         
     except Exception as e:
+        quota_manager.record_failure(upstream)
         logger.error(f"Error fetching RSS feed {feed_url}: {e}")
+        return api_cache.get(cache_key, allow_expired=True, count=False) or headlines
     
     return headlines
 
 # Helper function to compute sentiment polarity for a single text
-# Why: TextBlob returns a polarity score between -1 (negative) and +1 (positive)
+# Why: TextBlob's lexicon gives a polarity score between -1 (negative) and +1 (positive)
 def get_sentiment_score(text: str) -> float:
     """
     Returns the sentiment polarity of the text.
@@ -426,9 +1183,9 @@ def get_sentiment_score(text: str) -> float:
     Args:
         text (str): The text to analyze
     Returns:
-        float: Sentiment polarity score
+        float: Sentiment polarity score (TextBlob's polarity, memoized by sentiment_engine)
     """
-    return TextBlob(text).sentiment.polarity
+    return get_sentiment_engine().score(text)
 
 # Helper function to compute average sentiment for a list of headlines
 # Why: Aggregates sentiment across multiple news items for a broader view
@@ -442,7 +1199,7 @@ def analyze_headlines_sentiment(headlines: List[str]) -> Dict[str, Any]:
     """
     if not headlines:
         return {'average': 0.0, 'scores': []}
-    scores = [get_sentiment_score(h) for h in headlines]
+    scores = get_sentiment_engine().score_many(headlines)
     avg = sum(scores) / len(scores)
     return {'average': avg, 'scores': scores}
 
@@ -454,158 +1211,235 @@ def ping():  # ping() is a function that will be called when the endpoint is acc
     # a JSON response is a way to send data in a structured format
     return {"message": "pong"}
 
+def fetch_current_prices() -> Optional[Dict[str, Dict[str, Optional[float]]]]:
+    """Returns the latest close price of every tracked coin, keyed by name (e.g. 'bitcoin')."""
+    latest = get_market_data().latest_prices()
+    if all(price is None for price in latest.values()):
+        return None
+    return {coin.name: {'usd': latest.get(coin.symbol)} for coin in symbol_registry}
+
 @app.route('/price')  # another endpoint for price
 def price():
-    # This function returns live BTC/ETH prices from Yahoo Finance with intelligent caching
-    cache_key = "current_prices_yf"
-    cached_result = api_cache.get(cache_key)
-    if cached_result:
-        logger.info("Serving cached price data (Yahoo Finance)")
-        return jsonify(cached_result)
-    btc = yf.Ticker("BTC-USD").history(period="1d")
-    eth = yf.Ticker("ETH-USD").history(period="1d")
-    btc_price = round(float(btc['Close'][-1]), 2) if not btc.empty else None
-    eth_price = round(float(eth['Close'][-1]), 2) if not eth.empty else None
-    response_data = {
-        'bitcoin': {'usd': btc_price},
-        'ethereum': {'usd': eth_price}
-    }
-    api_cache.set(cache_key, response_data, 'price')
-    return jsonify(response_data)
+    # This function returns live prices for every tracked coin from Yahoo Finance with intelligent caching
+    response_data = api_cache.get_or_refresh("current_prices_yf", fetch_current_prices, 'price')
+    if not response_data:
+        response_data = {coin.name: {'usd': None} for coin in symbol_registry}
+    return cached_json_response("current_prices_yf", response_data)
+
+# One ingestion loop for every /price/stream client. It reads the same cache entry
+# as /price, so upstream is fetched at most once per 'price' cache period.
+price_broadcaster = PriceBroadcaster(
+    lambda: api_cache.get_or_refresh("current_prices_yf", fetch_current_prices, 'price'),
+    interval=float(os.getenv('PRICE_STREAM_INTERVAL', 5))
+)
+PRICE_STREAM_HEARTBEAT = float(os.getenv('PRICE_STREAM_HEARTBEAT', 15))
+
+@app.route('/price/stream')
+def price_stream():
+    """
+    Server-Sent Events stream of live prices, replacing /price polling.
+    Sends a 'snapshot' event with every coin first, then 'prices' events holding
+    only the coins whose price changed. Comment lines keep idle connections open.
+    """
+    subscription = Subscription(price_broadcaster, heartbeat=PRICE_STREAM_HEARTBEAT)
+    return Response(
+        subscription,
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/predict')
 @require_auth
 def predict():
     requested_date = request.args.get('date')
-    window = int(request.args.get('window', 30))
-    future_days = 7  # Number of future days to extrapolate
+    try:
+        window = int(request.args.get('window', 30))
+    except ValueError:
+        return jsonify({'error': 'Invalid window'}), 400
+    # Validated before the payload cache, so bad windows are never fitted or cached
+    market_data = get_market_data()
+    if window < 2 or window > market_data.backfill_days:
+        return jsonify({'error': f'window must be between 2 and {market_data.backfill_days}'}), 400
     logger.info("Generating predictions...")
-    results = {}
+    frame = market_data.history(window)
+    prediction_cache = get_prediction_cache()
+    # The payload (and its encoded body) is reused until new candles change the data version
+    cache_key = prediction_cache.payload_key(frame, symbol_registry.symbols, window, requested_date)
+    results = api_cache.get(cache_key, cache_type='predict') if cache_key else None
+    if results is None:
+        # Fits are cached per (symbol, window) until new candles arrive; stale ones are refit in one vectorized pass
+        results = prediction_cache.predict(frame, symbol_registry.symbols, window, requested_date)
+        if not cache_key:
+            return encoded_response(encode_json(results))  # No history to key on: don't cache the empty payload
+        api_cache.set(cache_key, results, 'predict')
+    return cached_json_response(cache_key, results)
 
-    for symbol, ticker in [('BTC', 'BTC-USD'), ('ETH', 'ETH-USD')]:
-        logger.info(f"Fetching data for {symbol} ({ticker}) from Yahoo Finance...")
+@app.route('/evaluate')
+@require_auth
+def evaluate_model():
+    """
+    Walk-forward evaluation of the /predict model in a single request.
+    Query params: start, end ('YYYY-MM-DD', default the last 30 days), symbols (comma-separated,
+    default all tracked), window (closes per fit, default 30), horizon (days ahead, default 1).
+    Returns MAE, MAPE and RMSE plus per-date errors for each symbol.
+    """
+    today = datetime.utcnow().date()
+    start = request.args.get('start', (today - timedelta(days=30)).isoformat())
+    end = request.args.get('end', today.isoformat())
+    try:
+        window = int(request.args.get('window', 30))
+        horizon = int(request.args.get('horizon', 1))
+        if datetime.strptime(start, '%Y-%m-%d') > datetime.strptime(end, '%Y-%m-%d'):
+            return jsonify({'error': 'start must be on or before end'}), 400
+    except ValueError:
+        return jsonify({'error': 'Invalid start, end, window or horizon'}), 400
+    if window < 2 or horizon < 1:
+        return jsonify({'error': 'window must be at least 2 and horizon at least 1'}), 400
+    
+    symbols_param = request.args.get('symbols')
+    symbols = [s.strip().upper() for s in symbols_param.split(',') if s.strip()] if symbols_param else symbol_registry.symbols
+    unknown = [s for s in symbols if s not in symbol_registry]
+    if unknown:
+        return jsonify({'error': f"Unknown symbols: {', '.join(unknown)}"}), 400
+    
+    from backtest import evaluate, days_needed
+    logger.info(f"Evaluating {len(symbols)} symbols from {start} to {end} (window={window}, horizon={horizon})")
+    # History is loaded once for all symbols and dates
+    frame = get_market_data().history(days_needed(start, window, horizon))
+    if frame is None:
+        return jsonify({'error': 'Failed to load price history'}), 503
+    return jsonify({
+        'start': start,
+        'end': end,
+        'window': window,
+        'horizon': horizon,
+        'results': evaluate(frame, symbols, start, end, window, horizon)
+    })
+
+def fetch_headline_sources(
+    sources: Dict[str, Tuple[Callable[..., List[str]], str]],
+    limit: int = 10,
+    timeout: Optional[float] = None
+) -> Tuple[Dict[str, List[str]], Dict[str, Dict[str, Any]]]:
+    """
+    Fetches several headline sources in parallel with a shared deadline.
+    Args:
+        sources (dict): name -> (fetch function, argument), e.g. (get_rss_headlines, feed_url)
+        limit (int): Number of headlines per source
+        timeout (float): Seconds to wait for all sources; defaults to SENTIMENT_SOURCE_TIMEOUT
+    Returns:
+        tuple: (name -> headlines, name -> {'status', 'elapsed_ms', 'count'})
+        Sources that miss the deadline return no headlines and status 'timeout';
+        they keep running in the pool and fill their own cache for the next call.
+    """
+    deadline = timeout if timeout is not None else SENTIMENT_SOURCE_TIMEOUT
+    started = time.perf_counter()
+    finished_at: Dict[str, float] = {}
+    
+    def timed(name: str, fetch: Callable[..., List[str]], arg: str) -> List[str]:
         try:
-            data = yf.Ticker(ticker).history(period=f"{window}d")
-            if data.empty or len(data) < 2:
-                results[symbol] = {
-                    'dates': [],
-                    'actual': [],
-                    'predicted': [],
-                    'predicted_price': None
-                }
-                continue
-            dates = [d.strftime('%Y-%m-%d') for d in data.index]
-            prices = [float(p) for p in data['Close']]
-
-            # Train linear regression model on last 30 days
-            X = list(range(len(prices)))
-            y = prices
-            model = LinearRegression()
-            model.fit([[i] for i in X], y)
-
-            # Predict for each day in window + future_days
-            total_days = len(prices) + future_days
-            predicted_prices = model.predict([[i] for i in range(total_days)])
-
-
-            # Always include today's date as the last date if not present
-            today_str = datetime.utcnow().strftime("%Y-%m-%d")
-            if today_str not in dates:
-                dates.append(today_str)
-                prices.append(None)
-
-            # Extend dates with future dates
-            last_date = datetime.strptime(dates[-1], "%Y-%m-%d")
-            future_dates = [(last_date + timedelta(days=i+1)).strftime("%Y-%m-%d") for i in range(future_days)]
-            all_dates = dates + future_dates
-
-            # Actual prices only for historical dates
-            actual_extended = prices + [None]*future_days
-
-            # If a specific date is requested, predict for that date
-            predicted_price = None
-            if requested_date:
-                try:
-                    idx = all_dates.index(requested_date)
-                    predicted_price = float(predicted_prices[idx])
-                except Exception:
-                    predicted_price = None
-
-            results[symbol] = {
-                'dates': all_dates,
-                'actual': actual_extended,
-                'predicted': [float(p) for p in predicted_prices],
-                'predicted_price': predicted_price
-            }
+            return fetch(arg, limit=limit)
+        finally:
+            finished_at[name] = time.perf_counter()
+    
+    futures = {
+        name: headline_executor.submit(timed, name, fetch, arg)
+        for name, (fetch, arg) in sources.items()
+    }
+    wait(futures.values(), timeout=deadline)
+    
+    headlines: Dict[str, List[str]] = {}
+    status: Dict[str, Dict[str, Any]] = {}
+    for name, future in futures.items():
+        if not future.done():
+            logger.warning(f"Headline source {name} missed the {deadline}s deadline")
+            headlines[name] = []
+            status[name] = {'status': 'timeout', 'elapsed_ms': round(deadline * 1000, 1), 'count': 0}
+            continue
+        elapsed_ms = round((finished_at.get(name, time.perf_counter()) - started) * 1000, 1)
+        try:
+            result = future.result()
         except Exception as e:
-            logger.error(f"Error fetching or predicting for {symbol}: {e}")
-            results[symbol] = {
-                'dates': [],
-                'actual': [],
-                'predicted': [],
-                'predicted_price': None
-            }
+            logger.error(f"Headline source {name} failed: {e}")
+            headlines[name] = []
+            status[name] = {'status': 'error', 'elapsed_ms': elapsed_ms, 'count': 0}
+            continue
+        headlines[name] = result
+        status[name] = {'status': 'ok' if result else 'empty', 'elapsed_ms': elapsed_ms, 'count': len(result)}
+    return headlines, status
 
-    return jsonify(results)
+# News feeds shared by all coins in the sentiment payload
+NEWS_FEEDS = {
+    'coindesk': 'https://feeds.feedburner.com/CoinDesk',
+    'cointelegraph': 'https://cointelegraph.com/rss',
+}
 
-@app.route('/sentiment')
-@require_auth
-def get_sentiment_data():
+def sentiment_sources() -> Dict[str, Tuple[str, str]]:
     """
-    Fetches real Reddit headlines for BTC and ETH, and crypto news headlines from CoinDesk and CoinTelegraph.
-    Applies TextBlob sentiment analysis to each group of headlines and returns the average sentiment.
-    - Calls get_reddit_headlines for r/Bitcoin and r/Ethereum
-    - Calls get_rss_headlines for CoinDesk and CoinTelegraph
-    - Analyzes sentiment for each group
-    - Returns all headlines and sentiment scores in the API response
+    Headline sources behind /sentiment: name -> ('reddit', subreddit) or ('rss', feed_url).
     """
-    cache_key = "sentiment_data"
-    cached_result = api_cache.get(cache_key)
-    
-    if cached_result:
-        logger.info("Serving cached sentiment data")
-        return cached_result
+    sources = {
+        f"reddit_{coin.subreddit.lower()}": ('reddit', coin.subreddit)
+        for coin in symbol_registry.with_subreddit()
+    }
+    sources.update({name: ('rss', url) for name, url in NEWS_FEEDS.items()})
+    return sources
+
+def assemble_sentiment_payload(headlines: Dict[str, List[str]], sources: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Scores fetched headlines and builds the /sentiment payload, one block per coin.
+    News feeds are scored once and shared by all coins.
+    """
+    # Score every new headline in one batch; the per-group lookups below are cache hits
+    get_sentiment_engine().score_many([h for group in headlines.values() for h in group])
+    news = {
+        name: (headlines.get(name, []), analyze_headlines_sentiment(headlines.get(name, [])))
+        for name in NEWS_FEEDS
+    }
     
+    result: Dict[str, Any] = {}
+    for coin in symbol_registry:
+        reddit_headlines = headlines.get(f"reddit_{coin.subreddit.lower()}", []) if coin.subreddit else []
+        block = {
+            "symbol": coin.symbol,
+            "reddit_headlines": reddit_headlines,
+            "reddit_sentiment": analyze_headlines_sentiment(reddit_headlines),
+        }
+        for name, (feed_headlines, feed_sentiment) in news.items():
+            block[f"{name}_headlines"] = feed_headlines
+            block[f"{name}_sentiment"] = feed_sentiment
+        result[coin.symbol] = block
+    result["sources"] = sources
+    return result
+
+def build_sentiment_data() -> Dict[str, Any]:
+    """
+    Fetches real Reddit headlines for every tracked coin with a subreddit, and crypto news headlines from CoinDesk and CoinTelegraph.
+    Scores each group of headlines with TextBlob's lexicon (via sentiment_engine) and returns the average sentiment.
+    - Calls get_reddit_headlines for each coin's subreddit (r/Bitcoin, r/Ethereum, ...)
+    - Calls get_rss_headlines for CoinDesk and CoinTelegraph
+    - Analyzes sentiment for each group; news feeds are scored once and shared by all coins
+    - Reports per-source status and timing under 'sources'; slow sources are skipped
+    """
     logger.info("Fetching fresh sentiment data...")
     
-    # Fetch real headlines from Reddit for BTC and ETH
-    btc_headlines = get_reddit_headlines('Bitcoin', limit=10)
-    eth_headlines = get_reddit_headlines('Ethereum', limit=10)
-    
-    # Fetch crypto news headlines from CoinDesk and CoinTelegraph
-    coindesk_headlines = get_rss_headlines('https://feeds.feedburner.com/CoinDesk', limit=10)
-    cointelegraph_headlines = get_rss_headlines('https://cointelegraph.com/rss', limit=10)
-    
-    # Analyze sentiment for each group of headlines
-    btc_sentiment = analyze_headlines_sentiment(btc_headlines)
-    eth_sentiment = analyze_headlines_sentiment(eth_headlines)
-    coindesk_sentiment = analyze_headlines_sentiment(coindesk_headlines)
-    cointelegraph_sentiment = analyze_headlines_sentiment(cointelegraph_headlines)
-    
-    # Return all headlines and sentiment in the response
-    result = {
-        "BTC": {
-            "symbol": "BTC",
-            "reddit_headlines": btc_headlines,
-            "reddit_sentiment": btc_sentiment,
-            "coindesk_headlines": coindesk_headlines,
-            "coindesk_sentiment": coindesk_sentiment,
-            "cointelegraph_headlines": cointelegraph_headlines,
-            "cointelegraph_sentiment": cointelegraph_sentiment
-        },
-        "ETH": {
-            "symbol": "ETH",
-            "reddit_headlines": eth_headlines,
-            "reddit_sentiment": eth_sentiment,
-            "coindesk_headlines": coindesk_headlines,
-            "coindesk_sentiment": coindesk_sentiment,
-            "cointelegraph_headlines": cointelegraph_headlines,
-            "cointelegraph_sentiment": cointelegraph_sentiment
-        }
+    # Fetch every subreddit and news feed concurrently
+    source_specs = {
+        name: (get_reddit_headlines if kind == 'reddit' else get_rss_headlines, arg)
+        for name, (kind, arg) in sentiment_sources().items()
     }
-    
-    api_cache.set(cache_key, result, 'recommendation')
-    return jsonify(result)  # <-- FIXED: always return JSON
+    headlines, sources = fetch_headline_sources(source_specs, limit=10)
+    return assemble_sentiment_payload(headlines, sources)
+
+@app.route('/sentiment')
+@require_auth
+def get_sentiment_data():
+    """
+    Returns headlines and sentiment scores for every tracked coin.
+    Expired data is served immediately while build_sentiment_data runs in the background.
+    """
+    result = api_cache.get_or_refresh("sentiment_data", build_sentiment_data, 'sentiment')
+    return cached_json_response("sentiment_data", result)
 
 # Temporary route to test Reddit API integration
 # Why: Lets you quickly verify that your credentials and helper function work before integrating into main app logic
@@ -618,247 +1452,346 @@ def test_reddit():
     headlines = get_reddit_headlines('Bitcoin', limit=5)
     return jsonify(headlines)
 
-def get_price_24h_ago_cached(coin_id: str) -> Optional[float]:
-    """Get price from 24 hours ago with caching."""
-    cache_key = f"historical_price_{coin_id}"
-    cached_result = api_cache.get(cache_key)
-    
-    if cached_result is not None:
-        return cached_result
-    
-    # Otherwise, fetch and cache
-    day_ago = int(time.time()) - 24*60*60
-    url = f'https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart/range'
-    params = {
-        'vs_currency': 'usd',
-        'from': day_ago,
-        'to': int(time.time())
-    }
-    
-    response_data, error = request_handler.make_request(url, params=params)
-    
-    if error:
-        logger.error(f"Error fetching historical price for {coin_id}: {error}")
-        return None
-    
-    prices = response_data.get('prices', [])
-    if not prices:
-        logger.warning(f"No historical prices returned for {coin_id}")
+def fetch_bulk_prices(coins: List[Coin]) -> Optional[Dict[str, Dict[str, float]]]:
+    """
+    Current USD price and 24h change (%) of every coin with a CoinGecko id, in one simple/price call.
+    Concurrent misses share one call. Falls back to the last good answer when CoinGecko fails (None if there is none).
+    """
+    cache_key = "current_prices"
+    ids = [coin.coingecko_id for coin in coins if coin.coingecko_id]
+    if not ids:
         return None
-    
-    closest = min(prices, key=lambda x: abs(x[0]/1000 - day_ago))
-    historical_price = closest[1]
-    
-    api_cache.set(cache_key, historical_price, 'historical')
-    return historical_price
-
-@app.route('/recommendation')
-@require_auth
-def recommendation():
-    cache_key = "recommendation_data"
-    cached_result = api_cache.get(cache_key)
-    
-    if cached_result:
-        logger.info("Serving cached recommendation data")
-        return jsonify(cached_result)
-    
-    logger.info("Generating fresh recommendations...")
 
-    # Use cached price data
-    price_cache_key = "current_prices"
-    cached_prices = api_cache.get(price_cache_key)
-    if not cached_prices:
-        url = 'https://api.coingecko.com/api/v3/simple/price'
-        params = {'ids': 'bitcoin,ethereum', 'vs_currencies': 'usd'}
+    def load() -> Optional[Dict[str, Dict[str, float]]]:
+        url = f'{COINGECKO_API_URL}/simple/price'
+        params = {'ids': ','.join(ids), 'vs_currencies': 'usd', 'include_24hr_change': 'true'}
         response_data, error = request_handler.make_request(url, params=params)
         if error:
             logger.error(f"CoinGecko error: {error}")
-            return jsonify({"error": "Failed to fetch price"}), 503
-        api_cache.set(price_cache_key, response_data, 'price')
-        cached_prices = response_data
+            return None
+        return response_data
 
-    btc_price = cached_prices['bitcoin']['usd']
-    eth_price = cached_prices['ethereum']['usd']
+    prices = api_cache.get_or_load(cache_key, load, 'price')
+    if prices is None:
+        # Upstream down or over budget: an older answer beats none
+        prices = api_cache.get(cache_key, allow_expired=True, count=False)
+    return prices
 
-    # Use cached historical prices
-    btc_prev = get_price_24h_ago_cached('bitcoin')
-    eth_prev = get_price_24h_ago_cached('ethereum')
+def recommendation_prices(coins: List[Coin]) -> Tuple[Dict[str, Optional[float]], Dict[str, Optional[float]]]:
+    """
+    Current and 24h-ago prices of every coin, gathered in bulk:
+    - current: one CoinGecko simple/price call, Yahoo's latest close for coins it doesn't cover
+    - 24h ago: hourly candles in the price store, else derived from CoinGecko's 24h change
+    Returns (current, previous), both keyed by symbol.
+    """
+    quotes = fetch_bulk_prices(coins) or {}
+    current: Dict[str, Optional[float]] = {}
+    changes: Dict[str, Optional[float]] = {}
+    for coin in coins:
+        quote = (quotes.get(coin.coingecko_id) if coin.coingecko_id else None) or {}
+        current[coin.symbol] = quote.get('usd')
+        changes[coin.symbol] = quote.get('usd_24h_change')
+    market_data = get_market_data()
+    if any(price is None for price in current.values()):
+        latest = market_data.latest_prices()
+        current = {symbol: price if price is not None else latest.get(symbol) for symbol, price in current.items()}
+    previous = market_data.prices_ago(list(current), 24*60*60)
+    for symbol, price in current.items():
+        change = changes[symbol]
+        if previous[symbol] is None and price is not None and change is not None and change > -100:
+            previous[symbol] = price / (1 + change / 100)
+    return current, previous
 
-    btc_delta = (btc_price - btc_prev) / btc_prev if btc_prev else None
-    eth_delta = (eth_price - eth_prev) / eth_prev if eth_prev else None
+@app.route('/recommendation')
+@require_auth
+def recommendation():
+    """
+    Buy/Hold/Sell for every tracked coin, decided by a rule set: ?rules=classic|weighted|technical
+    or one from RECOMMENDATION_RULES_FILE (default RECOMMENDATION_RULES).
+    The whole table is computed in one vectorized pass, see recommender.py.
+    """
+    rule_sets = get_rule_sets()
+    rules = request.args.get('rules', RECOMMENDATION_RULES)
+    if rules not in rule_sets:
+        return jsonify({"error": f"Unknown rule set {rules!r}; available: {', '.join(rule_sets)}"}), 400
+
+    # Concurrent misses wait for one computation instead of each fetching prices
+    cache_key = f"recommendation_data_{rules}"
+    result = api_cache.get_or_load(cache_key, lambda: build_recommendations(rule_sets[rules]), 'recommendation')
+    if not result:
+        return jsonify({"error": "Failed to fetch price"}), 503
+    return cached_json_response(cache_key, result)
+
+def build_recommendations(rule_set: Any) -> Optional[Dict[str, Dict[str, Any]]]:
+    """The /recommendation table for every tracked coin under a rule set (None without any current price)."""
+    from recommender import recommend
+    logger.info(f"Generating fresh recommendations ({rule_set.name} rules)...")
+    coins = list(symbol_registry)
+    current, previous = recommendation_prices(coins)
+    if all(price is None for price in current.values()):
+        return None
 
     # Use cached sentiment data
-    sentiment_data = api_cache.get("sentiment_data")
-    if not sentiment_data:
-        logger.warning("Sentiment data not cached, fetching fresh sentiment...")
-        sentiment_response = get_sentiment_data()
-        if hasattr(sentiment_response, "get_json"):
-            sentiment_data = sentiment_response.get_json()
-        else:
-            sentiment_data = sentiment_response
-
-    def get_avg_sentiment(sent_block):
-        sent_scores = []
-        for src in ["reddit_sentiment", "coindesk_sentiment", "cointelegraph_sentiment"]:
-            if src in sent_block and "average" in sent_block[src]:
-                sent_scores.append(sent_block[src]["average"])
-        return float(np.mean(sent_scores)) if sent_scores else 0.0
-
-    btc_sentiment = get_avg_sentiment(sentiment_data.get("BTC", {}))
-    eth_sentiment = get_avg_sentiment(sentiment_data.get("ETH", {}))
-
-    def get_recommendation(sentiment: float, delta: Optional[float]) -> str:
-        if delta is None:
-            return "Hold"
-        if sentiment > 0.5 and delta > 0:
-            return "Buy"
-        elif sentiment < -0.5 and delta < 0:
-            return "Sell"
-        else:
-            return "Hold"
-
-    btc_recommendation = get_recommendation(btc_sentiment, btc_delta)
-    eth_recommendation = get_recommendation(eth_sentiment, eth_delta)
-
-    result = {
-        "BTC": {
-            "recommendation": btc_recommendation,
-            "sentiment": btc_sentiment,
-            "price_delta": btc_delta,
-            "current_price": btc_price,
-            "previous_price": btc_prev
-        },
-        "ETH": {
-            "recommendation": eth_recommendation,
-            "sentiment": eth_sentiment,
-            "price_delta": eth_delta,
-            "current_price": eth_price,
-            "previous_price": eth_prev
-        }
+    sentiment_data = api_cache.get_or_refresh("sentiment_data", build_sentiment_data, 'sentiment') or {}
+    symbols = [coin.symbol for coin in coins]
+    return recommend(rule_set, symbols, current, previous, sentiment_data, latest_indicators(symbols))
+
+# Candle intervals the indicator engine serves, and the most history points /indicators returns
+INDICATOR_INTERVALS = ('1d', '1h')
+INDICATOR_MAX_HISTORY = int(os.getenv('INDICATOR_MAX_HISTORY', 500))
+
+def latest_indicators(symbols: List[str], interval: str = '1d') -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Current indicator values per symbol (None where the store has no candles).
+    Syncs the store at most once per 'price' TTL; new candles reach the engine through
+    the store's listener, so this is O(1) per symbol once each one is backfilled.
+    """
+    engine = get_indicator_engine()
+    if engine is None:
+        return {symbol: None for symbol in symbols}
+    get_market_data().refresh_store(interval)
+    return {symbol: engine.latest(symbol, interval) for symbol in symbols}
+
+@app.route('/indicators')
+@require_auth
+def indicators():
+    """
+    Technical indicators (SMA, EMA, RSI, MACD, Bollinger Bands) for tracked coins.
+    Query: symbols (comma-separated, default all), interval (1d or 1h), history (points of past values, default 0).
+    """
+    if get_indicator_engine() is None:
+        return jsonify({"error": "Indicators need the price store (PRICE_STORE_DIR)"}), 503
+    interval = request.args.get('interval', '1d')
+    if interval not in INDICATOR_INTERVALS:
+        return jsonify({"error": f"interval must be one of {', '.join(INDICATOR_INTERVALS)}"}), 400
+    try:
+        points = min(max(int(request.args.get('history', 0)), 0), INDICATOR_MAX_HISTORY)
+    except ValueError:
+        return jsonify({"error": "history must be an integer"}), 400
+    requested = request.args.get('symbols')
+    symbols = [s.strip().upper() for s in requested.split(',') if s.strip()] if requested else symbol_registry.symbols
+    unknown = [symbol for symbol in symbols if symbol not in symbol_registry.symbols]
+    if unknown:
+        return jsonify({"error": f"Unknown symbols: {', '.join(unknown)}"}), 400
+
+    payload: Dict[str, Any] = {'interval': interval, 'indicators': latest_indicators(symbols, interval)}
+    if points:
+        engine = get_indicator_engine()
+        payload['history'] = {symbol: engine.history(symbol, interval, points) for symbol in symbols}
+    return encoded_response(encode_json(payload))
+
+def fetch_historical_1y(coingecko_id: str) -> Optional[List[List[float]]]:
+    """Fetches one year of daily [timestamp_ms, price] points for a coin from CoinGecko."""
+    logger.info(f"Fetching 1y historical data for {coingecko_id} from CoinGecko...")
+    url = f'{COINGECKO_API_URL}/coins/{coingecko_id}/market_chart'
+    params = {
+        'vs_currency': 'usd',
+        'days': 365,
+        'interval': 'daily'
     }
+    response_data, error = request_handler.make_request(url, params=params, timeout=30)
+    if error or not response_data or 'prices' not in response_data:
+        logger.error(f"Failed to fetch 1y data for {coingecko_id}: {error}")
+        return None
+    return response_data['prices']
 
-    api_cache.set(cache_key, result, 'recommendation')
-    return jsonify(result)
+def load_historical_1y(symbol: str, coingecko_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Loads one year of daily prices for a coin and precomputes every /historical timeframe view.
+    Reads the shared Yahoo Finance batch first and only calls CoinGecko if Yahoo has no data for the symbol.
+    """
+    from historical_views import build_views
+    from market_data import to_market_chart
+    series = get_market_data().series(symbol, 365)
+    if series is not None and len(series) >= 2:
+        points = to_market_chart(series)
+    elif not coingecko_id:
+        logger.warning(f"No Yahoo Finance history for {symbol} and no CoinGecko id to fall back to")
+        return None
+    else:
+        logger.warning(f"No Yahoo Finance history for {symbol}, falling back to CoinGecko")
+        points = fetch_historical_1y(coingecko_id)
+    return build_views(symbol, points) if points else None
 
 @app.route('/historical')
 @require_auth
 def historical():
-    """Fetch price history for BTC and ETH with configurable timeframe, using a single 1y fetch per coin."""
-    timeframe = request.args.get('timeframe', '7d')
-    timeframe_map = {
-        '7d': 7,
-        '30d': 30,
-        '6m': 180,
-        '1y': 365
-    }
-    days_requested = timeframe_map.get(timeframe, 7)
-    results = {}
+    """
+    Price history for every tracked coin with configurable timeframe (7d, 30d, 6m, 1y).
+    Each timeframe is built and encoded once when the 1y data is loaded, so a request is a cache read.
+    """
+    from historical_views import DEFAULT_TIMEFRAME, TIMEFRAMES
+    timeframe = request.args.get('timeframe', DEFAULT_TIMEFRAME)
+    if timeframe not in TIMEFRAMES:
+        timeframe = DEFAULT_TIMEFRAME
+    blocks = {}
 
-    for symbol, coingecko_id in [('BTC', 'bitcoin'), ('ETH', 'ethereum')]:
+    for coin in symbol_registry:
+        symbol, coingecko_id = coin.symbol, coin.coingecko_id
         cache_key = f"historical_data_{symbol}_1y"
-        # Try to get 1y data from cache (fresh or expired if needed)
-        historical_data = api_cache.get(cache_key)
+        # Stale 1y data is served while it refreshes; on a cold miss only one request fetches it
+        historical_data = api_cache.get_or_refresh(
+            cache_key,
+            lambda symbol=symbol, coingecko_id=coingecko_id: load_historical_1y(symbol, coingecko_id),
+            'historical'
+        )
         if not historical_data:
-            lock = api_cache.get_lock(cache_key) if hasattr(api_cache, "get_lock") else None
-            if lock:
-                with lock:
-                    historical_data = api_cache.get(cache_key)
-                    if not historical_data:
-                        logger.info(f"Fetching 1y historical data for {symbol} from CoinGecko...")
-                        url = f'https://api.coingecko.com/api/v3/coins/{coingecko_id}/market_chart'
-                        params = {
-                            'vs_currency': 'usd',
-                            'days': 365,
-                            'interval': 'daily'
-                        }
-                        response_data, error = request_handler.make_request(url, params=params, timeout=30)
-                        if error or not response_data or 'prices' not in response_data:
-                            logger.error(f"Failed to fetch 1y data for {symbol}: {error}")
-                            # Serve stale data if available
-                            historical_data = api_cache.get(cache_key, allow_expired=True) if hasattr(api_cache, "get") else None
-                            if not historical_data:
-                                results[symbol] = {'error': f'Failed to fetch historical data: {error or "No data"}'}
-                                continue
-                            logger.warning(f"Serving stale cached 1y data for {symbol} due to error.")
-                        else:
-                            prices = response_data['prices']
-                            api_cache.set(cache_key, prices, 'historical')
-                            historical_data = prices
-            else:
-                # No lock support, just fetch
-                logger.info(f"Fetching 1y historical data for {symbol} from CoinGecko...")
-                url = f'https://api.coingecko.com/api/v3/coins/{coingecko_id}/market_chart'
-                params = {
-                    'vs_currency': 'usd',
-                    'days': 365,
-                    'interval': 'daily'
-                }
-                response_data, error = request_handler.make_request(url, params=params, timeout=30)
-                if error or not response_data or 'prices' not in response_data:
-                    logger.error(f"Failed to fetch 1y data for {symbol}: {error}")
-                    results[symbol] = {'error': f'Failed to fetch historical data: {error or "No data"}'}
-                    continue
-                prices = response_data['prices']
-                api_cache.set(cache_key, prices, 'historical')
-                historical_data = prices
-
-        # Now slice the cached 1y data for the requested timeframe
-        if not historical_data or len(historical_data) < 2:
-            results[symbol] = {'error': 'Not enough historical data'}
+            blocks[symbol] = json.dumps({'error': 'Failed to fetch historical data'})
             continue
+        blocks[symbol] = historical_data['views'][timeframe]
 
-        # Get more data than requested to ensure we have enough after deduplication
-        # Take extra days to account for potential missing data
-        extra_days = days_requested + 3  # Get 3 extra days to be safe
-        sliced = historical_data[-extra_days:]
-        
-        # Deduplicate by date - keep only the latest price for each date
-        date_price_map = {}
-        for p in sliced:
-            date = datetime.utcfromtimestamp(p[0] / 1000).strftime('%Y-%m-%d')
-            # Keep the latest price for each date
-            date_price_map[date] = p[1]
-        
-        # Sort by date and extract unique dates and prices
-        sorted_items = sorted(date_price_map.items())
-        all_dates = [item[0] for item in sorted_items]
-        all_prices = [item[1] for item in sorted_items]
-        
-        # Take only the last N days that were requested
-        if len(all_dates) >= days_requested:
-            dates = all_dates[-days_requested:]
-            price_history = all_prices[-days_requested:]
-        else:
-            # If we don't have enough data, use what we have
-            dates = all_dates
-            price_history = all_prices
-
-        results[symbol] = {
-            'symbol': symbol,
-            'dates': dates,
-            'prices': price_history,
-            'current_price': price_history[-1] if price_history else None,
-            'price_change': price_history[-1] - price_history[0] if len(price_history) >= 2 else None,
-            'price_change_percent': ((price_history[-1] - price_history[0]) / price_history[0] * 100) if len(price_history) >= 2 else None,
-            'timeframe': timeframe
-        }
+    return encoded_response(historical_body(timeframe, blocks))
 
-    api_cache.set(f"historical_data_{timeframe}", results, 'historical')
-    return jsonify(results)
+def historical_body(timeframe: str, blocks: Dict[str, str]) -> EncodedBody:
+    """
+    Joined /historical body, encoded once per set of views.
+    Why: the per-symbol views are cached strings, so while none of them changes the
+    joined body (and its ETag and gzip variant) is reused instead of rebuilt.
+    """
+    from historical_views import join_views
+    cache_key = f"historical_response_{timeframe}"
+    sources = tuple(blocks.items())
+    cached = api_cache.get(cache_key, cache_type='historical')
+    if cached != sources:
+        api_cache.set(cache_key, sources, 'historical')
+        cached = sources
+    return api_cache.get_encoded(cache_key, cached, lambda items: join_views(dict(items)).encode())
+
+def cache_status_payload(cache: Optional[APICache] = None) -> Dict[str, Any]:
+    """
+    /cache/status payload, shared by the Flask route and the ASGI server.
+    Args:
+        cache: The cache to report on (api_cache by default)
+    """
+    cache = api_cache if cache is None else cache
+    cache.clear_expired()
+    stats = cache.stats()
+    return {
+        'total_entries': stats['total_entries'],
+        'cache_types': list(cache._cache_durations.keys()),
+        'memory_usage': {
+            'total_bytes': stats['total_bytes'],
+            'max_bytes': stats['max_bytes'],
+            'by_type': stats['by_type']
+        },
+        'stale_entries': stats['stale_entries'],
+        'max_entries': stats['max_entries'],
+        'hits': stats['hits'],
+        'misses': stats['misses'],
+        'stale_hits': stats['stale_hits'],
+        'evictions': stats['evictions'],
+        'upstream_connections': request_handler.connection_stats(),
+        'upstream_quotas': quota_manager.stats(),
+        # Status checks never trigger a lazy load
+        'sentiment_scores': get_sentiment_engine().stats() if sentiment_component.loaded else None,
+        'indicators': get_indicator_engine().stats() if indicator_component.loaded and get_indicator_engine() else None,
+        'price_stream': price_broadcaster.stats(),
+        'auth_tokens': token_cache.stats(),
+        'password_hashing': password_hasher.stats(),
+        'component_load_ms': component_stats(),
+        'snapshots': cache_snapshotter.stats() if cache_snapshotter is not None else None
+    }
 
 @app.route('/cache/status')
 def cache_status():
     """Endpoint to monitor cache usage and health."""
-    api_cache.clear_expired()
-    cache_info = {
-        'total_entries': len(api_cache._cache),
-        'cache_types': list(api_cache._cache_durations.keys()),
-        'memory_usage': 'monitored'  # Could add actual memory usage calculation
-    }
-    return jsonify(cache_info)
+    return jsonify(cache_status_payload())
+
+def observe_request(route: str, method: str, status: int, seconds: float) -> None:
+    """Records one served request; route is the URL rule (e.g. /predict), not the raw path."""
+    request_seconds.observe(seconds, route=route, method=method)
+    request_count.inc(route=route, method=method, status=status)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = getattr(g, 'request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        observe_request(route, request.method, response.status_code, time.perf_counter() - started)
+    return response
+
+def collect_cache_metrics():
+    """Reads the APICache counters at scrape time (they're kept per cache_type by the cache itself)."""
+    stats = api_cache.stats()
+    counters = sorted(stats['counters_by_type'].items())
+    yield ('cache_requests_total', 'counter', 'Cache lookups by cache_type and result', [
+        ({'cache_type': cache_type, 'result': result}, values[stat])
+        for cache_type, values in counters
+        for result, stat in (('hit', 'hits'), ('stale_hit', 'stale_hits'), ('miss', 'misses'))
+    ])
+    yield ('cache_evictions_total', 'counter', 'Entries evicted to stay within the cache budget',
+           [({'cache_type': cache_type}, values['evictions']) for cache_type, values in counters])
+    yield ('cache_expirations_total', 'counter', 'Entries dropped after outliving max_stale',
+           [({'cache_type': cache_type}, values['expirations']) for cache_type, values in counters])
+    yield ('cache_entries', 'gauge', 'Entries currently cached',
+           [({'cache_type': cache_type}, values['entries']) for cache_type, values in sorted(stats['by_type'].items())])
+    yield ('cache_bytes', 'gauge', 'Approximate bytes held by the cache', [({}, stats['total_bytes'])])
+
+metrics.add_collector(collect_cache_metrics)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint."""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+def register_hot_keys() -> None:
+    """Registers the keys the dashboard polls constantly with the background refresher."""
+    # Shared market frames first so derived keys are rebuilt from fresh data
+    cache_refresher.register("market_closes_1d", lambda: get_market_data().download('1d'), 'price')
+    cache_refresher.register("market_closes_1y", lambda: get_market_data().download('1y'), 'historical')
+    cache_refresher.register("current_prices_yf", fetch_current_prices, 'price')
+    cache_refresher.register("sentiment_data", build_sentiment_data, 'sentiment')
+    for coin in symbol_registry:
+        cache_refresher.register(
+            f"historical_data_{coin.symbol}_1y",
+            lambda symbol=coin.symbol, coingecko_id=coin.coingecko_id: load_historical_1y(symbol, coingecko_id),
+            'historical'
+        )
+
+register_hot_keys()
+
+def __getattr__(name: str) -> Any:
+    # app.market_data, app.reddit etc. resolve through the lazy accessors (PEP 562)
+    for component in LAZY_COMPONENTS:
+        if component.name == name:
+            return component.get()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def start_background_tasks() -> None:
+    """
+    Server startup work, run on a background thread so /ping is served right away:
+    restore the cache snapshot, start periodic snapshots and the cache refresher,
+    then load the lazy components (WARM_UP_COMPONENTS=false leaves them to first use).
+    Why: the refresher starts after the restore, otherwise it would refetch every
+    hot key the snapshot is about to provide.
+    """
+    def run() -> None:
+        if cache_snapshotter is not None:
+            cache_snapshotter.load()
+            cache_snapshotter.start()
+        if os.getenv('CACHE_BACKGROUND_REFRESH', 'true').lower() == 'true':
+            cache_refresher.start()
+        if os.getenv('WARM_UP_COMPONENTS', 'true').lower() == 'true':
+            warm_up(LAZY_COMPONENTS)
+
+    threading.Thread(target=run, name='startup', daemon=True).start()
+
+def stop_background_tasks() -> None:
+    """Stops the refresher and writes a final cache snapshot."""
+    cache_refresher.stop()
+    if cache_snapshotter is not None:
+        cache_snapshotter.stop()
 
 if __name__ == '__main__':
     import os
+    # Why: with debug=True the Werkzeug reloader runs this block in a watcher process too;
+    # only the child that serves requests (WERKZEUG_RUN_MAIN=true) starts the background work
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_tasks()
     port = int(os.environ.get("PORT", 5000))
     logger.info("Starting AI-Powered Crypto Trading Assistant Backend...")
     app.run(host="0.0.0.0", port=port, debug=True)
@@ -0,0 +1,475 @@
+"""
+ASGI Server Mode
+----------------
+Asyncio entry point for the backend, for serving many concurrent dashboard clients
+with a bounded number of threads.
+
+Run with:
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+How requests are served:
+- /ping, /price, /price/stream, /historical, /sentiment and /cache/status are
+  handled natively on the event loop. Cache hits never touch a thread; cache
+  misses are single-flight per key, so any number of waiting clients share one
+  fill. Price streams are asyncio queues fed by the one broadcaster thread.
+- Upstream HTTP calls made here (CoinGecko, RSS feeds) use an async httpx client
+  with non-blocking exponential backoff (asyncio.sleep instead of time.sleep).
+- Blocking libraries (yfinance, PRAW) and every other Flask route run on a bounded
+  thread pool (ASGI_BLOCKING_WORKERS, default 8); the Flask app is mounted through
+  asgiref's WSGI adapter and runs on the event loop's default thread pool.
+- At lifespan startup the cache snapshot is restored and heavy components (pandas,
+  yfinance, PRAW, the sentiment lexicon) load in the background; /ping is served
+  before they finish. Shutdown writes a final snapshot.
+"""
+import asyncio
+import functools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+import httpx
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+import app as backend
+from price_stream import HEARTBEAT
+from metrics import MetricsRegistry, UpstreamMetrics
+from quota import QuotaManager
+from response_cache import EncodedBody
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Any]
+AsyncLoader = Callable[[], Awaitable[Any]]
+# Native route bodies: raw bytes, or a cached EncodedBody (ETag, compression)
+Body = Union[bytes, EncodedBody]
+
+
+class AsyncAPIRequestHandler:
+    """
+    Async counterpart of APIRequestHandler.
+    Same retry/backoff policy and the same shared upstream quotas, but waiting
+    never blocks the event loop and all requests share one pooled httpx.AsyncClient.
+    """
+    def __init__(self, max_retries: int = 3, timeout: int = 10, max_connections: int = 100,
+                 quota: Optional[QuotaManager] = None, metrics: Optional[MetricsRegistry] = None):
+        self.max_retries = max_retries
+        self.quota = quota
+        self.metrics = UpstreamMetrics(metrics) if metrics is not None else None
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=20),
+                follow_redirects=True
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def make_request(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+                           timeout: Optional[int] = None, as_text: bool = False) -> Tuple[Optional[Any], Optional[str]]:
+        """
+        Make HTTP request with exponential backoff and retry logic.
+        Returns (response_data, error_message); response_data is parsed JSON, or text when as_text=True.
+        """
+        request_timeout = timeout if timeout is not None else self.timeout
+        upstream = self.quota.upstream_for(url) if self.quota else None
+        metrics_label = upstream or backend.APIRequestHandler._host(url)
+
+        for attempt in range(self.max_retries):
+            if self.quota:
+                quota_error, wait = self.quota.admit(upstream)
+                if quota_error:
+                    logger.warning(f"Not requesting {url}: {quota_error}")
+                    return None, quota_error
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            if attempt and self.metrics:
+                self.metrics.retry(metrics_label)
+            started = time.perf_counter()
+            status = None
+            try:
+                logger.info(f"Making async request to {url} (attempt {attempt + 1}/{self.max_retries})")
+                response = await self.client.get(url, params=params, headers=headers, timeout=request_timeout)
+                status = response.status_code
+                if self.metrics:
+                    self.metrics.observe(metrics_label, status, time.perf_counter() - started)
+
+                if response.status_code == 429:  # Too Many Requests
+                    wait_time = backend.APIRequestHandler._retry_after(response, attempt)
+                    logger.warning(f"Rate limited (attempt {attempt + 1}/{self.max_retries}). Waiting {wait_time:.1f}s")
+                    if self.quota:
+                        self.quota.throttle(upstream, wait_time)
+                    else:
+                        await asyncio.sleep(wait_time)
+                    continue
+
+                if self.quota:
+                    if response.status_code >= 500:
+                        self.quota.record_failure(upstream)
+                    else:
+                        self.quota.record_success(upstream)
+                response.raise_for_status()
+                return (response.text if as_text else response.json()), None
+
+            except httpx.TimeoutException:
+                logger.warning(f"Request timeout (attempt {attempt + 1}/{self.max_retries})")
+                if self.metrics:
+                    self.metrics.observe(metrics_label, 'timeout', time.perf_counter() - started)
+                if self.quota:
+                    self.quota.record_failure(upstream)
+                if attempt == self.max_retries - 1:
+                    return None, "Request timeout"
+                await asyncio.sleep(2 ** attempt)
+
+            except (httpx.HTTPError, ValueError) as e:
+                logger.error(f"Request failed (attempt {attempt + 1}/{self.max_retries}): {e}")
+                if self.metrics and status is None:
+                    self.metrics.observe(metrics_label, 'error', time.perf_counter() - started)
+                if self.quota and isinstance(e, httpx.TransportError):
+                    self.quota.record_failure(upstream)
+                if attempt == self.max_retries - 1:
+                    return None, f"Request failed: {str(e)}"
+                await asyncio.sleep(2 ** attempt)
+
+        return None, "Max retries exceeded"
+
+
+class AsyncBackend:
+    """
+    Native async implementations of the hot read endpoints.
+    Shares APICache with the Flask app, so both serving modes see the same data.
+    """
+    def __init__(self, cache: Any, blocking_workers: int = 8):
+        self.cache = cache
+        self.handler = AsyncAPIRequestHandler(quota=backend.quota_manager, metrics=backend.metrics)
+        self.executor = ThreadPoolExecutor(max_workers=blocking_workers, thread_name_prefix='asgi-blocking')
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def run_blocking(self, func: Callable, *args: Any) -> Any:
+        """Runs a blocking call on the bounded executor."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def _load_and_store(self, key: str, loader: Union[Loader, AsyncLoader], cache_type: str) -> Any:
+        try:
+            if asyncio.iscoroutinefunction(loader):
+                value = await loader()
+            else:
+                value = await self.run_blocking(loader)
+        except Exception as e:
+            logger.error(f"Async cache fill failed for {key}: {e}")
+            return None
+        if not backend._is_empty(value):
+            self.cache.set(key, value, cache_type)
+        return value
+
+    def _fill(self, key: str, loader: Union[Loader, AsyncLoader], cache_type: str) -> asyncio.Future:
+        """Starts (or joins) the single in-flight fill for a key."""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._load_and_store(key, loader, cache_type))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return future
+
+    async def cached(self, key: str, loader: Union[Loader, AsyncLoader], cache_type: str) -> Any:
+        """
+        Stale-while-revalidate read without blocking the loop.
+        Fresh hits return immediately, stale hits return immediately and refresh in
+        the background, misses wait on one shared fill.
+        """
+        value, stale = self.cache.lookup(key, allow_expired=self.cache.stale_while_revalidate, cache_type=cache_type)
+        if not backend._is_empty(value):
+            if stale:
+                self._fill(key, loader, cache_type)
+            return value
+        # Shield so a disconnecting client doesn't cancel the fill other clients wait on
+        return await asyncio.shield(self._fill(key, loader, cache_type))
+
+    # --- Upstream fetches ---
+
+    async def fetch_historical_1y(self, coingecko_id: str) -> Optional[List[List[float]]]:
+        url = f'{backend.COINGECKO_API_URL}/coins/{coingecko_id}/market_chart'
+        params = {'vs_currency': 'usd', 'days': 365, 'interval': 'daily'}
+        data, error = await self.handler.make_request(url, params=params, timeout=30)
+        if error or not data or 'prices' not in data:
+            logger.error(f"Failed to fetch 1y data for {coingecko_id}: {error}")
+            return None
+        return data['prices']
+
+    async def load_historical_1y(self, symbol: str, coingecko_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Async port of app.load_historical_1y: Yahoo batch first, CoinGecko over async HTTP as fallback."""
+        from historical_views import build_views
+        from market_data import to_market_chart
+        # get_market_data() may still be loading pandas/yfinance, so it runs off the loop too
+        series = await self.run_blocking(lambda: backend.get_market_data().series(symbol, 365))
+        if series is not None and len(series) >= 2:
+            points = to_market_chart(series)
+        elif coingecko_id:
+            points = await self.fetch_historical_1y(coingecko_id)
+        else:
+            return None
+        return build_views(symbol, points) if points else None
+
+    async def fetch_rss_headlines(self, feed_url: str, limit: int = 10) -> List[str]:
+        """Async port of app.get_rss_headlines: the feed is downloaded with httpx and parsed from memory."""
+        cache_key = f"rss_headlines_{feed_url}_{limit}"
+        cached_result = self.cache.get(cache_key, cache_type='rss_feeds')
+        if cached_result:
+            return cached_result
+        content, error = await self.handler.make_request(feed_url, as_text=True)
+        if error:
+            logger.error(f"Error fetching RSS feed {feed_url}: {error}")
+            return self.cache.get(cache_key, allow_expired=True, count=False) or []
+        import feedparser
+        headlines = [entry.title for entry in feedparser.parse(content).entries[:limit]]
+        self.cache.set(cache_key, headlines, 'rss_feeds')
+        return headlines
+
+    async def build_sentiment_data(self) -> Dict[str, Any]:
+        """Async port of app.build_sentiment_data with the same per-source deadline and status report."""
+        deadline = backend.SENTIMENT_SOURCE_TIMEOUT
+        started = time.perf_counter()
+
+        async def timed(kind: str, arg: str) -> Tuple[List[str], float]:
+            if kind == 'reddit':
+                result = await self.run_blocking(backend.get_reddit_headlines, arg)
+            else:
+                result = await self.fetch_rss_headlines(arg)
+            return result, round((time.perf_counter() - started) * 1000, 1)
+
+        specs = backend.sentiment_sources()
+        tasks = {name: asyncio.ensure_future(timed(kind, arg)) for name, (kind, arg) in specs.items()}
+        await asyncio.wait(tasks.values(), timeout=deadline)
+
+        headlines: Dict[str, List[str]] = {}
+        sources: Dict[str, Dict[str, Any]] = {}
+        for name, task in tasks.items():
+            if not task.done():
+                # Leave it running: it fills its own cache for the next request
+                headlines[name] = []
+                sources[name] = {'status': 'timeout', 'elapsed_ms': round(deadline * 1000, 1), 'count': 0}
+                continue
+            try:
+                result, elapsed_ms = task.result()
+            except Exception as e:
+                logger.error(f"Headline source {name} failed: {e}")
+                headlines[name] = []
+                sources[name] = {'status': 'error', 'elapsed_ms': None, 'count': 0}
+                continue
+            headlines[name] = result
+            sources[name] = {'status': 'ok' if result else 'empty', 'elapsed_ms': elapsed_ms, 'count': len(result)}
+        # Scoring is CPU work, keep it off the loop
+        return await self.run_blocking(backend.assemble_sentiment_payload, headlines, sources)
+
+    # --- Endpoints: return (status, body bytes) ---
+
+    async def ping(self, query: Dict[str, str]) -> Tuple[int, bytes]:
+        return 200, b'{"message": "pong"}'
+
+    async def price(self, query: Dict[str, str]) -> Tuple[int, Body]:
+        data = await self.cached("current_prices_yf", backend.fetch_current_prices, 'price')
+        if not data:
+            data = {coin.name: {'usd': None} for coin in backend.symbol_registry}
+        return 200, self.cache.get_encoded("current_prices_yf", data)
+
+    async def historical(self, query: Dict[str, str]) -> Tuple[int, Body]:
+        from historical_views import DEFAULT_TIMEFRAME, TIMEFRAMES
+        timeframe = query.get('timeframe', DEFAULT_TIMEFRAME)
+        if timeframe not in TIMEFRAMES:
+            timeframe = DEFAULT_TIMEFRAME
+        coins = list(backend.symbol_registry)
+        entries = await asyncio.gather(*[
+            self.cached(
+                f"historical_data_{coin.symbol}_1y",
+                functools.partial(self.load_historical_1y, coin.symbol, coin.coingecko_id),
+                'historical'
+            )
+            for coin in coins
+        ])
+        blocks = {
+            coin.symbol: entry['views'][timeframe] if entry else json.dumps({'error': 'Failed to fetch historical data'})
+            for coin, entry in zip(coins, entries)
+        }
+        return 200, backend.historical_body(timeframe, blocks)
+
+    async def sentiment(self, query: Dict[str, str]) -> Tuple[int, Body]:
+        data = await self.cached("sentiment_data", self.build_sentiment_data, 'sentiment')
+        return 200, self.cache.get_encoded("sentiment_data", data)
+
+    async def cache_status(self, query: Dict[str, str]) -> Tuple[int, bytes]:
+        return 200, json.dumps(backend.cache_status_payload(self.cache)).encode()
+
+
+class _ThreadPoolWsgiInstance(WsgiToAsgiInstance):
+    # Why: asgiref runs WSGI apps thread-sensitively by default, reusing a per-thread
+    # executor it tracks across calls. Under concurrent keep-alive clients a request can
+    # pick up an executor that has already quit and fail with a 500. Flask is thread-safe,
+    # so each call just takes a thread from the default pool.
+    run_wsgi_app = sync_to_async(WsgiToAsgiInstance.__dict__['run_wsgi_app'].func, thread_sensitive=False)
+
+
+class ThreadPoolWsgiToAsgi(WsgiToAsgi):
+    """WsgiToAsgi that runs the WSGI app on the event loop's thread pool."""
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        await _ThreadPoolWsgiInstance(self.wsgi_application, self.duplicate_header_limit)(scope, receive, send)
+
+
+class ASGIApp:
+    """
+    ASGI application: native async routes first, everything else through the Flask app.
+    """
+    def __init__(self, flask_app: Any, async_backend: AsyncBackend):
+        self.backend = async_backend
+        self.wsgi = ThreadPoolWsgiToAsgi(flask_app)
+        # path -> (handler, requires_auth)
+        self.routes: Dict[str, Tuple[Callable[[Dict[str, str]], Awaitable[Tuple[int, Body]]], bool]] = {
+            '/ping': (async_backend.ping, False),
+            '/price': (async_backend.price, False),
+            '/historical': (async_backend.historical, True),
+            '/sentiment': (async_backend.sentiment, True),
+            '/cache/status': (async_backend.cache_status, False),
+        }
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] == 'http' and scope.get('path') == '/price/stream' and scope['method'] == 'GET':
+            await self.price_stream(scope, receive, send)
+            return
+        route = self.routes.get(scope.get('path', '')) if scope['type'] == 'http' else None
+        # CORS preflight and all other routes are handled by Flask (and flask-cors)
+        if route is None or scope['method'] not in ('GET', 'HEAD'):
+            await self.wsgi(scope, receive, send)
+            return
+
+        headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+        handler, requires_auth = route
+        started = time.perf_counter()
+        error = None
+        if requires_auth:
+            _, error = backend.authenticate(headers.get('authorization'))
+        if error:
+            status, body = 401, json.dumps({'error': error}).encode()
+        else:
+            try:
+                status, body = await handler(self._query(scope))
+            except Exception as e:
+                logger.error(f"Async handler for {scope['path']} failed: {e}")
+                status, body = 500, b'{"error": "Internal server error"}'
+        await self._respond(send, status, body, headers)
+        backend.observe_request(scope['path'], scope['method'], status, time.perf_counter() - started)
+
+    async def price_stream(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        """
+        /price/stream on the event loop: one asyncio queue per client, fed from the
+        shared broadcaster thread, so idle streams hold no threads.
+        """
+        headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue(maxsize=16)
+        broadcaster = backend.price_broadcaster
+
+        def offer(event: bytes) -> None:
+            if events.full():
+                # Slow client: drop the backlog and resync it with one full snapshot
+                while not events.empty():
+                    events.get_nowait()
+                broadcaster.count_resync()
+                event = broadcaster.snapshot_event()
+            events.put_nowait(event)
+
+        subscription_id, snapshot = broadcaster.subscribe(lambda event: loop.call_soon_threadsafe(offer, event))
+        response_headers = [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ] + self._cors_headers(headers)
+        disconnect = asyncio.ensure_future(receive())
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': response_headers})
+            await send({'type': 'http.response.body', 'body': snapshot, 'more_body': True})
+            while True:
+                next_event = asyncio.ensure_future(events.get())
+                done, _ = await asyncio.wait(
+                    {next_event, disconnect}, timeout=backend.PRICE_STREAM_HEARTBEAT,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if next_event in done:
+                    body = next_event.result()
+                else:
+                    next_event.cancel()
+                    if disconnect in done:
+                        break
+                    body = HEARTBEAT
+                await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+        except OSError:
+            pass  # Client went away mid-send
+        finally:
+            disconnect.cancel()
+            broadcaster.unsubscribe(subscription_id)
+
+    @staticmethod
+    def _cors_headers(request_headers: Dict[str, str]) -> List[Tuple[bytes, bytes]]:
+        origin = request_headers.get('origin')
+        if origin in backend.CORS_ORIGINS:
+            return [(b'access-control-allow-origin', origin.encode()), (b'vary', b'Origin')]
+        return []
+
+    @staticmethod
+    def _query(scope: Dict[str, Any]) -> Dict[str, str]:
+        from urllib.parse import parse_qsl
+        return dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+
+    @staticmethod
+    async def _respond(send: Callable, status: int, body: Body, request_headers: Dict[str, str]) -> None:
+        response_headers = [(b'content-type', b'application/json')]
+        if isinstance(body, EncodedBody):
+            # Same conditional/compressed handling as app.encoded_response
+            encoded = body
+            body, content_encoding = encoded.negotiate(request_headers.get('accept-encoding'))
+            response_headers += [
+                (b'etag', encoded.etag_for(content_encoding).encode()),
+                (b'cache-control', b'private, no-cache'),
+                (b'vary', b'Accept-Encoding'),
+            ]
+            if encoded.matches(request_headers.get('if-none-match')):
+                status, body = 304, b''
+                response_headers = response_headers[1:]
+            elif content_encoding:
+                response_headers.append((b'content-encoding', content_encoding.encode()))
+        if status != 304:
+            response_headers.append((b'content-length', str(len(body)).encode()))
+        response_headers += ASGIApp._cors_headers(request_headers)
+        await send({'type': 'http.response.start', 'status': status, 'headers': response_headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                backend.start_background_tasks()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                backend.stop_background_tasks()
+                backend.price_broadcaster.stop()
+                await self.backend.handler.close()
+                self.backend.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+async_backend = AsyncBackend(backend.api_cache, blocking_workers=int(os.getenv('ASGI_BLOCKING_WORKERS', 8)))
+application = ASGIApp(backend.app, async_backend)
@@ -0,0 +1,107 @@
+"""
+Backfills sentiment scores over archived headlines.
+
+Reads headlines from text (one per line), JSONL or CSV files, scores them on a
+pool of worker processes and writes each record back with a 'polarity' field,
+in input order. Input is streamed, so archives of any size run in bounded memory.
+Throughput is reported on stderr while it runs.
+
+Examples:
+    python backfill_sentiment.py reddit_2024.txt > scores.jsonl
+    python backfill_sentiment.py archive/*.jsonl --field title --workers 8 -o scored.jsonl
+    python backfill_sentiment.py headlines.csv --field headline -o headlines_scored.csv
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List
+
+from sentiment_engine import ScoringPool
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Score archived headlines with the sentiment engine")
+    parser.add_argument('inputs', nargs='+', help="Input files (.txt, .jsonl or .csv), or - for stdin text")
+    parser.add_argument('--field', default='title', help="Headline field for JSONL/CSV input")
+    parser.add_argument('-o', '--output', default='-', help="Output file (.jsonl or .csv); default stdout JSONL")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument('--chunk-size', type=int, default=2000, help="Headlines per task sent to a worker")
+    parser.add_argument('--progress-every', type=float, default=5.0, help="Seconds between progress reports")
+    return parser.parse_args()
+
+
+def read_records(paths: List[str], field: str) -> Iterator[Dict[str, Any]]:
+    """Yields one dict per headline; text lines become {field: line}."""
+    for path in paths:
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            if path.endswith('.jsonl'):
+                for line in stream:
+                    if line.strip():
+                        yield json.loads(line)
+            elif path.endswith('.csv'):
+                yield from csv.DictReader(stream)
+            else:
+                for line in stream:
+                    line = line.rstrip('\n')
+                    if line:
+                        yield {field: line}
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+def backfill(records: Iterable[Dict[str, Any]], field: str, pool: ScoringPool, progress=None) -> Iterator[Dict[str, Any]]:
+    """Scores records on the pool and yields them, in order, with 'polarity' added."""
+    buffered: Deque[Dict[str, Any]] = deque()
+
+    def texts() -> Iterator[str]:
+        for record in records:
+            buffered.append(record)
+            yield str(record.get(field) or '')
+
+    for polarity in pool.score_stream(texts(), progress=progress):
+        record = buffered.popleft()
+        record['polarity'] = polarity
+        yield record
+
+
+def main():
+    args = parse_args()
+    pool = ScoringPool(workers=args.workers, chunk_size=args.chunk_size)
+    last_report = [time.perf_counter()]
+
+    def progress(scored: int, seconds: float) -> None:
+        if time.perf_counter() - last_report[0] >= args.progress_every:
+            last_report[0] = time.perf_counter()
+            print(f"scored {scored} headlines in {seconds:.1f}s ({scored / seconds * 60:,.0f}/min)", file=sys.stderr)
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', newline='', encoding='utf-8')
+    try:
+        results = backfill(read_records(args.inputs, args.field), args.field, pool, progress)
+        if args.output.endswith('.csv'):
+            writer = None
+            for record in results:
+                if writer is None:
+                    writer = csv.DictWriter(out, fieldnames=list(record))
+                    writer.writeheader()
+                writer.writerow(record)
+        else:
+            for record in results:
+                out.write(json.dumps(record) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        pool.shutdown()
+
+    run = pool.last_run
+    print(f"done: {run['texts']} headlines in {run['seconds']}s "
+          f"({run['per_minute'] or 0:,}/min on {run['workers']} processes)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
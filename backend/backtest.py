@@ -0,0 +1,149 @@
+"""
+Model Evaluation
+----------------
+Walk-forward backtest of the /predict linear trend model.
+
+For every target date the model is fit on the `window` closes that precede it and
+asked for the price `horizon` days after its last input, exactly what /predict
+would have said on that day. All dates and all symbols are computed at once from
+rolling sums over the (dates x symbols) close matrix, so a year of history for
+many coins is a handful of array operations instead of one HTTP call per date.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Sum of each trailing `window` rows; rows before the first full window are NaN."""
+    cumsum = np.cumsum(values, axis=0)
+    out = np.full(values.shape, np.nan)
+    out[window - 1:] = cumsum[window - 1:]
+    out[window:] -= cumsum[:-window]
+    return out
+
+
+def walk_forward_predictions(prices: np.ndarray, window: int = 30, horizon: int = 1) -> np.ndarray:
+    """
+    Predicts every row of a price matrix from the `window` rows ending `horizon` rows earlier.
+    Args:
+        prices (ndarray): (dates x symbols) closes; NaN marks missing days
+        window (int): Number of closes each fit uses
+        horizon (int): How many rows past the fit window the prediction is for
+    Returns:
+        ndarray: Same shape as prices. Row t holds the prediction for date t made
+        from rows [t - horizon - window + 1, t - horizon]. NaN where the window is
+        incomplete or contains missing closes.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if prices.ndim == 1:
+        prices = prices[:, None]
+    if window < 2:
+        raise ValueError("window must be at least 2")
+    n_rows = prices.shape[0]
+    predictions = np.full(prices.shape, np.nan)
+    if n_rows < window + horizon:
+        return predictions
+
+    valid = ~np.isnan(prices)
+    y = np.where(valid, prices, 0.0)
+    rows = np.arange(n_rows, dtype=np.float64)[:, None]
+
+    # For a window ending at row e, x runs 0..window-1 over rows e-window+1..e.
+    # sum(x * y) = sum(row * y) - (e - window + 1) * sum(y)
+    counts = _rolling_sum(valid.astype(np.float64), window)
+    sum_y = _rolling_sum(y, window)
+    sum_row_y = _rolling_sum(rows * y, window)
+    start_rows = rows - (window - 1)
+    sum_xy = sum_row_y - start_rows * sum_y
+
+    mean_x = (window - 1) / 2.0
+    sxx = window * (window * window - 1) / 12.0
+    mean_y = sum_y / window
+    slopes = (sum_xy - window * mean_x * mean_y) / sxx
+    intercepts = mean_y - slopes * mean_x
+    forecast = intercepts + slopes * (window - 1 + horizon)
+    forecast[counts < window] = np.nan
+
+    # The fit ending at row e predicts row e + horizon
+    predictions[horizon:] = forecast[:-horizon]
+    return predictions
+
+
+def error_metrics(predicted: np.ndarray, actual: np.ndarray) -> Dict[str, Optional[float]]:
+    """MAE, MAPE (percent) and RMSE over the positions where both values are present."""
+    mask = ~np.isnan(predicted) & ~np.isnan(actual)
+    if not mask.any():
+        return {'mae': None, 'mape': None, 'rmse': None, 'count': 0}
+    errors = predicted[mask] - actual[mask]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = np.abs(errors) / np.abs(actual[mask])
+    pct = pct[np.isfinite(pct)]
+    return {
+        'mae': float(np.mean(np.abs(errors))),
+        'mape': float(np.mean(pct) * 100) if pct.size else None,
+        'rmse': float(np.sqrt(np.mean(errors ** 2))),
+        'count': int(mask.sum())
+    }
+
+
+def evaluate(
+    frame: Optional[pd.DataFrame],
+    symbols: List[str],
+    start: str,
+    end: str,
+    window: int = 30,
+    horizon: int = 1
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Evaluates walk-forward predictions for several symbols over a date range.
+    Args:
+        frame (DataFrame): Daily closes, one column per symbol, including at least
+            `window + horizon` days of history before `start`
+        symbols (list of str): Symbols to evaluate
+        start, end (str): Inclusive 'YYYY-MM-DD' range of target dates
+        window (int): Closes per fit, as in /predict?window=
+        horizon (int): Days ahead each prediction is made
+    Returns:
+        dict: symbol -> {'mae', 'mape', 'rmse', 'count', 'errors': [{'date', 'predicted', 'actual', 'error'}]}
+    """
+    empty = {'mae': None, 'mape': None, 'rmse': None, 'count': 0, 'errors': []}
+    results: Dict[str, Dict[str, Any]] = {symbol: dict(empty, errors=[]) for symbol in symbols}
+    if frame is None or frame.empty:
+        return results
+    present = [symbol for symbol in symbols if symbol in frame]
+    if not present:
+        return results
+
+    matrix = frame[present].to_numpy(dtype=np.float64)
+    predictions = walk_forward_predictions(matrix, window, horizon)
+    in_range = (frame.index >= pd.Timestamp(start)) & (frame.index <= pd.Timestamp(end))
+    dates = [d.strftime('%Y-%m-%d') for d in frame.index[in_range]]
+    predicted_rows = predictions[in_range]
+    actual_rows = matrix[in_range]
+
+    for col, symbol in enumerate(present):
+        predicted = predicted_rows[:, col]
+        actual = actual_rows[:, col]
+        errors = []
+        for date, p, a in zip(dates, predicted.tolist(), actual.tolist()):
+            has_p, has_a = not np.isnan(p), not np.isnan(a)
+            errors.append({
+                'date': date,
+                'predicted': p if has_p else None,
+                'actual': a if has_a else None,
+                'error': p - a if has_p and has_a else None
+            })
+        results[symbol] = {**error_metrics(predicted, actual), 'errors': errors}
+    return results
+
+
+def days_needed(start: str, window: int, horizon: int) -> int:
+    """Days of history (ending today) required to evaluate from `start`."""
+    start_date = datetime.strptime(start, '%Y-%m-%d')
+    return (datetime.utcnow() - start_date).days + window + horizon + 1
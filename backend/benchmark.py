@@ -0,0 +1,380 @@
+"""
+Offline load benchmark for the backend.
+
+Starts the app in a child process with every upstream replaced by a local fake
+(see fake_upstreams.py: CoinGecko and RSS over HTTP, yf.download and the praw
+client in-process), drives each endpoint with concurrent clients and reports
+throughput, p50/p95/p99 latency, status codes and the server's memory growth.
+Nothing touches the network, so runs are repeatable and comparable.
+
+Before the load runs it measures cold start: a bare `import app` in fresh
+interpreters (and which heavy modules that pulled in), then the time from
+spawning the server until /ping and /price first answer. --startup-budget-ms
+turns the latter into a pass/fail check (exit status 1 when exceeded).
+
+Results are written as JSON; pass an earlier result with --compare to print deltas.
+
+Examples:
+    python benchmark.py -o bench_wsgi.json
+    python benchmark.py --server asgi --concurrency 32 --duration 20 -o bench_asgi.json
+    python benchmark.py --latency-ms 200 --jitter-ms 100 --error-rate 0.1 --endpoints sentiment,recommendation
+    python benchmark.py -o after.json --compare before.json
+    python benchmark.py --endpoints ping --duration 1 --startup-budget-ms 1500
+    python benchmark.py --cache-snapshot /tmp/bench.snapshot   # twice: the second run restarts warm
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import requests
+
+# name -> (method, path); every request carries a bearer token
+ENDPOINTS: Dict[str, Tuple[str, str]] = {
+    'ping': ('GET', '/ping'),
+    'price': ('GET', '/price'),
+    'predict': ('GET', '/predict'),
+    'evaluate': ('GET', '/evaluate'),
+    'sentiment': ('GET', '/sentiment'),
+    'recommendation': ('GET', '/recommendation'),
+    'historical': ('GET', '/historical?timeframe=30d'),
+    'profile': ('GET', '/auth/profile'),
+    'login': ('POST', '/auth/login'),
+    'cache_status': ('GET', '/cache/status'),
+    'metrics': ('GET', '/metrics'),
+}
+
+# Modules that should only load on first use (see lazy.py)
+HEAVY_MODULES = ('numpy', 'pandas', 'yfinance', 'praw', 'feedparser', 'textblob', 'sklearn')
+
+USER = {'email': 'bench@example.com', 'username': 'bench', 'password': 'benchpass123'}
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the backend against local fake upstreams")
+    parser.add_argument('--server', choices=['wsgi', 'asgi'], default='wsgi',
+                        help="Threaded Flask/werkzeug server or uvicorn with asgi.application")
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help="Comma-separated endpoint names")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent clients per endpoint")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds of load per endpoint")
+    parser.add_argument('--latency-ms', type=float, default=50.0, help="Latency added to every upstream call")
+    parser.add_argument('--jitter-ms', type=float, default=20.0, help="Extra random upstream latency (0..jitter)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of upstream calls that fail")
+    parser.add_argument('-o', '--output', help="Write results as JSON to this file")
+    parser.add_argument('--compare', help="Earlier results JSON to compare against")
+    parser.add_argument('--cache-snapshot', default='',
+                        help="Cache snapshot file kept across runs (run twice to measure a warm restart)")
+    parser.add_argument('--import-runs', type=int, default=3, help="Fresh interpreters timing `import app`")
+    parser.add_argument('--startup-budget-ms', type=float, default=0.0,
+                        help="Fail if /ping or /price take longer than this from process start (0: report only)")
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)  # Child process mode
+    return parser.parse_args(argv)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of a process in MB (Linux /proc; None elsewhere)."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+# --- Server side (child process) ---
+
+def serve(args) -> None:
+    """Starts fakes and the app, prints 'READY <port>', then serves until stdin closes."""
+    from fake_upstreams import CallCounter, FakeReddit, FakeUpstreamServer, FakeYahoo, Faults
+
+    faults = Faults(args.latency_ms, args.jitter_ms, args.error_rate)
+    upstream = FakeUpstreamServer(faults=faults).start()
+    data_dir = tempfile.mkdtemp(prefix='bench-')
+    os.environ['COINGECKO_API_URL'] = upstream.url('127.0.0.1') + '/api/v3'
+    os.environ['PRICE_STORE_DIR'] = os.path.join(data_dir, 'prices')
+    os.environ['USERS_DB_PATH'] = os.path.join(data_dir, 'users.db')
+    os.environ['CACHE_SNAPSHOT_PATH'] = args.cache_snapshot or os.path.join(data_dir, 'cache.snapshot')
+    # Measure the app, not the rate limiter (set these explicitly to benchmark with real budgets)
+    for name in ('COINGECKO_CALLS_PER_MINUTE', 'REDDIT_CALLS_PER_MINUTE', 'RSS_CALLS_PER_MINUTE'):
+        os.environ.setdefault(name, '1000000')
+
+    import app as backend
+    # Per-request INFO logs (ours and werkzeug's access log) would dominate the profile
+    for name in ('', 'werkzeug'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    in_process_calls = CallCounter()
+    build_market_data = backend.market_data_component.factory
+
+    def fake_market_data():
+        # Patched when the component loads, so the cold start isn't skewed by importing yfinance here
+        import market_data
+        market_data.yf.download = FakeYahoo(faults, in_process_calls)
+        return build_market_data()
+
+    backend.market_data_component.factory = fake_market_data
+    backend.reddit_component.set(FakeReddit(faults, in_process_calls))
+    backend.NEWS_FEEDS = {name: f"{upstream.url('localhost')}/rss/{name}" for name in backend.NEWS_FEEDS}
+
+    port = free_port()
+    # Serve on the main thread, as in production; a helper thread stops it once stdin closes
+    if args.server == 'asgi':
+        import uvicorn
+        import asgi
+        server = uvicorn.Server(uvicorn.Config(asgi.application, host='127.0.0.1', port=port, log_level='warning'))
+
+        def ready() -> None:
+            while not server.started:
+                time.sleep(0.05)
+            print(f"READY {port}", flush=True)
+            sys.stdin.read()
+            server.should_exit = True
+
+        threading.Thread(target=ready, name='bench-control', daemon=True).start()
+        server.run()
+    else:
+        from werkzeug.serving import make_server
+        backend.start_background_tasks()
+        server = make_server('127.0.0.1', port, backend.app, threaded=True)
+
+        def ready() -> None:
+            print(f"READY {port}", flush=True)
+            sys.stdin.read()
+            server.shutdown()
+
+        threading.Thread(target=ready, name='bench-control', daemon=True).start()
+        server.serve_forever()
+        backend.stop_background_tasks()
+
+    # The parent closed stdin: report how often each fake upstream was called
+    print(json.dumps({**upstream.calls.snapshot(), **in_process_calls.snapshot()}), flush=True)
+
+
+# --- Client side ---
+
+def measure_import(runs: int) -> Dict[str, Any]:
+    """Times `import app` in fresh interpreters and lists the heavy modules it loaded."""
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        "import app\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(json.dumps({{'ms': elapsed * 1000, 'heavy': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))\n"
+    )
+    data_dir = tempfile.mkdtemp(prefix='bench-import-')
+    env = {**os.environ, 'USERS_DB_PATH': os.path.join(data_dir, 'users.db'),
+           'PRICE_STORE_DIR': os.path.join(data_dir, 'prices')}
+    timings, heavy = [], []
+    for _ in range(max(1, runs)):
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, env=env,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        timings.append(result['ms'])
+        heavy = result['heavy']
+    return {'min_ms': round(min(timings), 1), 'median_ms': round(float(np.median(timings)), 1), 'heavy_modules': heavy}
+
+
+def wait_until(url: str, started: float, accept: Callable[[requests.Response], bool],
+               timeout: float = 120.0) -> Optional[float]:
+    """Polls `url` until `accept(response)`; returns ms since `started` (None on timeout)."""
+    while time.perf_counter() - started < timeout:
+        try:
+            if accept(requests.get(url, timeout=timeout)):
+                return round((time.perf_counter() - started) * 1000, 1)
+        except requests.RequestException:
+            pass
+        time.sleep(0.01)
+    return None
+
+
+def has_prices(resp: requests.Response) -> bool:
+    return resp.ok and any(coin.get('usd') is not None for coin in resp.json().values())
+
+
+def summarize(latencies: List[float], statuses: Counter, seconds: float) -> Dict[str, Any]:
+    """Throughput and latency percentiles (ms) for one endpoint run."""
+    ok = sum(n for status, n in statuses.items() if isinstance(status, int) and status < 400)
+    result: Dict[str, Any] = {
+        'requests': len(latencies),
+        'ok': ok,
+        'errors': len(latencies) - ok,
+        'throughput_rps': round(len(latencies) / seconds, 1) if seconds else 0.0,
+        'statuses': {str(status): n for status, n in sorted(statuses.items(), key=lambda item: str(item[0]))},
+    }
+    if latencies:
+        p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+        result.update({
+            'p50_ms': round(float(p50), 2),
+            'p95_ms': round(float(p95), 2),
+            'p99_ms': round(float(p99), 2),
+            'max_ms': round(max(latencies) * 1000, 2),
+        })
+    return result
+
+
+def load(base_url: str, method: str, path: str, headers: Dict[str, str], concurrency: int,
+         duration: float) -> Dict[str, Any]:
+    """Runs `concurrency` clients against one endpoint for `duration` seconds."""
+    body = {'email': USER['email'], 'password': USER['password']} if method == 'POST' else None
+    deadline = time.perf_counter() + duration
+
+    def client() -> Tuple[List[float], Counter]:
+        session = requests.Session()
+        latencies: List[float] = []
+        statuses: Counter = Counter()
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = session.request(method, base_url + path, json=body, headers=headers, timeout=120)
+                response.content
+                statuses[response.status_code] += 1
+            except requests.RequestException:
+                statuses['error'] += 1
+            latencies.append(time.perf_counter() - started)
+        session.close()
+        return latencies, statuses
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        runs = list(executor.map(lambda _: client(), range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies = [latency for run_latencies, _ in runs for latency in run_latencies]
+    statuses = sum((run_statuses for _, run_statuses in runs), Counter())
+    return summarize(latencies, statuses, elapsed)
+
+
+def print_report(results: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    def delta(name: str, field: str) -> str:
+        if not baseline or name not in baseline.get('endpoints', {}):
+            return ''
+        old, new = baseline['endpoints'][name].get(field), results['endpoints'][name].get(field)
+        if not old or new is None:
+            return ''
+        return f" ({(new - old) / old * 100:+.0f}%)"
+
+    print(f"\n{'endpoint':<16}{'req/s':>18}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>20}{'errors':>8}{'RSS +MB':>9}")
+    for name, r in results['endpoints'].items():
+        print(f"{name:<16}{str(r['throughput_rps']) + delta(name, 'throughput_rps'):>18}"
+              f"{r.get('p50_ms', '-'):>12}{r.get('p95_ms', '-'):>12}"
+              f"{str(r.get('p99_ms', '-')) + delta(name, 'p99_ms'):>20}{r['errors']:>8}"
+              f"{r.get('rss_growth_mb') if r.get('rss_growth_mb') is not None else '-':>9}")
+    startup = results.get('startup')
+    if startup:
+        imported = startup['import']
+        print(f"\nstartup: import app {imported['median_ms']} ms (heavy modules: {', '.join(imported['heavy_modules']) or 'none'}), "
+              f"listening {startup['ready_ms']} ms, first /ping {startup['ping_ms']} ms, first /price {startup['price_ms']} ms")
+    memory = results['memory']
+    print(f"server RSS: {memory['rss_start_mb']} MB -> {memory['rss_end_mb']} MB (growth {memory['growth_mb']} MB)")
+    print(f"upstream calls: {json.dumps(results['upstream_calls'])}")
+
+
+def within_budget(startup: Dict[str, Any], budget_ms: float) -> bool:
+    over = [name for name in ('ping_ms', 'price_ms') if startup[name] is None or startup[name] > budget_ms]
+    if over:
+        print(f"startup budget of {budget_ms:g} ms exceeded by {', '.join(over)}", file=sys.stderr)
+    return not over
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    args = parse_args(argv)
+    if args.serve:
+        serve(args)
+        return {}
+
+    names = [name.strip() for name in args.endpoints.split(',') if name.strip()]
+    unknown = [name for name in names if name not in ENDPOINTS]
+    if unknown:
+        raise SystemExit(f"Unknown endpoints: {', '.join(unknown)} (choose from {', '.join(ENDPOINTS)})")
+
+    print(f"timing `import app` ({args.import_runs} runs)...", file=sys.stderr)
+    import_time = measure_import(args.import_runs)
+
+    child_args = [sys.executable, os.path.abspath(__file__), '--serve', '--server', args.server,
+                  '--latency-ms', str(args.latency_ms), '--jitter-ms', str(args.jitter_ms),
+                  '--error-rate', str(args.error_rate), '--cache-snapshot', os.path.abspath(args.cache_snapshot) if args.cache_snapshot else '']
+    spawned = time.perf_counter()
+    server = subprocess.Popen(child_args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)))
+    try:
+        line = server.stdout.readline()
+        if not line.startswith('READY'):
+            raise SystemExit("Benchmark server failed to start")
+        base_url = f"http://127.0.0.1:{int(line.split()[1])}"
+        startup = {
+            'import': import_time,
+            'ready_ms': round((time.perf_counter() - spawned) * 1000, 1),
+            'ping_ms': wait_until(f"{base_url}/ping", spawned, lambda resp: resp.ok),
+            'price_ms': wait_until(f"{base_url}/price", spawned, has_prices),
+        }
+        requests.post(f"{base_url}/auth/register", json=USER, timeout=30)
+        token = requests.post(f"{base_url}/auth/login", json=USER, timeout=30).json()['token']
+        headers = {'Authorization': f'Bearer {token}'}
+
+        rss_start = rss_mb(server.pid)
+        endpoints: Dict[str, Any] = {}
+        for name in names:
+            method, path = ENDPOINTS[name]
+            before = rss_mb(server.pid)
+            print(f"{name}: {args.concurrency} clients for {args.duration:g}s...", file=sys.stderr)
+            endpoints[name] = load(base_url, method, path, headers, args.concurrency, args.duration)
+            after = rss_mb(server.pid)
+            endpoints[name]['rss_growth_mb'] = round(after - before, 1) if before is not None and after is not None else None
+        rss_end = rss_mb(server.pid)
+
+        server.stdin.close()
+        upstream_calls = json.loads(server.stdout.readline() or '{}')
+    finally:
+        if server.poll() is None:
+            server.terminate()
+        server.wait(timeout=30)
+
+    results = {
+        'started_at': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'serve')},
+        'startup': startup,
+        'endpoints': endpoints,
+        'memory': {
+            'rss_start_mb': rss_start,
+            'rss_end_mb': rss_end,
+            'growth_mb': round(rss_end - rss_start, 1) if rss_start is not None and rss_end is not None else None,
+        },
+        'upstream_calls': upstream_calls,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nresults written to {args.output}")
+    if args.startup_budget_ms and not within_budget(startup, args.startup_budget_ms):
+        raise SystemExit(1)
+    return results
+
+
+if __name__ == '__main__':
+    main()
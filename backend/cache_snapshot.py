@@ -0,0 +1,167 @@
+"""
+Cache Snapshots
+---------------
+Periodic on-disk snapshots of APICache, so a restart or deploy starts warm.
+
+Without them every new process starts with an empty cache, and the first wave of
+requests fetches the 1y CoinGecko history, every Reddit/RSS source and the Yahoo
+batches at the same moment, which is exactly when upstream rate limits bite.
+
+Format: one pickle (highest protocol) holding a version, the save time and a list
+of (key, cache_type, timestamp, duration, size, pickled value). Values are pickled
+one by one, so a value that can't be pickled (or unpickled after a library
+upgrade) costs only that entry. Entries keep their original timestamp and TTL:
+restored data is exactly as fresh as it was, and data that has outlived max_stale
+is dropped.
+
+Writes never block request threads: the cache lock is held only to copy entry
+references, serialization happens on the snapshot thread, and the file is
+replaced atomically (temp file in the same directory, fsync, os.replace), so a
+crash mid-write leaves the previous snapshot intact.
+
+The file is only ever read back by this process's code; don't point
+CACHE_SNAPSHOT_PATH at a location other users can write to (pickle executes code
+on load).
+"""
+import atexit
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+# key, cache_type, timestamp, duration, size, pickled value
+SnapshotEntry = Tuple[str, str, float, float, int, bytes]
+
+
+class CacheSnapshotter:
+    """
+    Saves `cache` to `path` every `interval` seconds and restores it at startup.
+    Args:
+        cache: The APICache to snapshot (uses export_entries / restore_entries)
+        path: Snapshot file; its directory is created on first save
+        interval: Seconds between background saves
+    """
+    def __init__(self, cache: Any, path: str, interval: float = 60.0):
+        self.cache = cache
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._save_lock = threading.Lock()
+        self.last_save: Optional[Dict[str, Any]] = None
+        self.last_load: Optional[Dict[str, Any]] = None
+
+    def save(self) -> Optional[int]:
+        """Writes a snapshot; returns the number of entries saved (None on failure)."""
+        started = time.perf_counter()
+        entries: List[SnapshotEntry] = []
+        skipped = 0
+        for key, entry in self.cache.export_entries():
+            try:
+                value = pickle.dumps(entry['value'], protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                skipped += 1
+                logger.warning(f"Cache snapshot skipped {key}: {e}")
+                continue
+            entries.append((key, entry['cache_type'], entry['timestamp'], entry['duration'], entry['size'], value))
+        payload = pickle.dumps(
+            {'version': SNAPSHOT_VERSION, 'saved_at': time.time(), 'entries': entries},
+            protocol=pickle.HIGHEST_PROTOCOL
+        )
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with self._save_lock:
+            try:
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(prefix='.cache-snapshot-', dir=directory)
+                try:
+                    with os.fdopen(fd, 'wb') as f:
+                        f.write(payload)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, self.path)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+            except OSError as e:
+                logger.error(f"Failed to write cache snapshot {self.path}: {e}")
+                return None
+        self.last_save = {
+            'at': time.time(),
+            'entries': len(entries),
+            'skipped': skipped,
+            'bytes': len(payload),
+            'ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+        logger.info(f"Cache snapshot saved: {len(entries)} entries, {len(payload)} bytes")
+        return len(entries)
+
+    def load(self) -> int:
+        """Restores entries from the snapshot file; returns how many were added to the cache."""
+        started = time.perf_counter()
+        try:
+            with open(self.path, 'rb') as f:
+                payload = pickle.load(f)
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            logger.error(f"Ignoring unreadable cache snapshot {self.path}: {e}")
+            return 0
+        if not isinstance(payload, dict) or payload.get('version') != SNAPSHOT_VERSION:
+            logger.warning(f"Ignoring cache snapshot {self.path} with unknown format")
+            return 0
+        entries: List[Tuple[str, Dict[str, Any]]] = []
+        for key, cache_type, timestamp, duration, size, value in payload['entries']:
+            try:
+                entries.append((key, {
+                    'value': pickle.loads(value),
+                    'timestamp': timestamp,
+                    'duration': duration,
+                    'cache_type': cache_type,
+                    'size': size
+                }))
+            except Exception as e:
+                logger.warning(f"Cache snapshot entry {key} could not be restored: {e}")
+        restored = self.cache.restore_entries(entries)
+        self.last_load = {
+            'at': time.time(),
+            'saved_at': payload['saved_at'],
+            'entries': restored,
+            'ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+        logger.info(f"Cache snapshot restored: {restored} of {len(payload['entries'])} entries "
+                    f"(saved {time.time() - payload['saved_at']:.0f}s ago)")
+        return restored
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.save()
+            except Exception as e:
+                logger.error(f"Cache snapshot error: {e}")
+
+    def start(self) -> None:
+        """Saves every `interval` seconds on a daemon thread, plus once at interpreter exit."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='cache-snapshot', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        logger.info(f"Cache snapshots every {self.interval:g}s to {self.path}")
+
+    def stop(self) -> None:
+        """Stops the background saves and writes a final snapshot."""
+        if self._thread is None or self._stop.is_set():
+            return
+        self._stop.set()
+        self.save()
+
+    def stats(self) -> Dict[str, Any]:
+        return {'path': self.path, 'interval': self.interval, 'last_save': self.last_save, 'last_load': self.last_load}
@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# Keep test accounts out of the local user database (and start each run empty)
+os.environ.setdefault('USERS_DB_PATH', os.path.join(tempfile.mkdtemp(prefix='users-'), 'users.db'))
+# Never restore or write the local cache snapshot from tests
+os.environ.setdefault('CACHE_SNAPSHOT_PATH', os.path.join(tempfile.mkdtemp(prefix='cache-'), 'cache.snapshot'))
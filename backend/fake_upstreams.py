@@ -0,0 +1,244 @@
+"""
+Fake Upstreams
+--------------
+Local stand-ins for every upstream the backend talks to, used by benchmark.py.
+
+- FakeUpstreamServer: a threaded HTTP server speaking just enough of the CoinGecko
+  API (simple/price, coins/{id}/market_chart and market_chart/range) and serving
+  RSS feeds at /rss/<name>.
+- FakeYahoo: drop-in for yf.download returning synthetic OHLCV frames shaped like
+  yfinance's (columns are (field, ticker) pairs).
+- FakeReddit: drop-in for the praw client (reddit.subreddit(name).hot(limit=...)).
+
+All three share a Faults setting: a fixed latency plus random jitter on every call,
+and an error rate (HTTP 503 from the server, an exception from the others).
+Prices are deterministic random walks, so runs are comparable.
+"""
+import json
+import random
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+HEADLINE_TEMPLATES = [
+    "{coin} surges past resistance as ETF inflows hit a record",
+    "{coin} slips as traders take profits after a strong week",
+    "Analysts say {coin} is very likely to rally further",
+    "Regulators are extremely worried about {coin} leverage",
+    "{coin} network upgrade ships without a hitch",
+    "Whales accumulate {coin} while retail sentiment stays flat",
+    "Exchange outage leaves {coin} traders frustrated",
+    "Why {coin} could be the best performing asset this year",
+]
+
+
+@dataclass
+class Faults:
+    """
+    Latency and error injection shared by the fakes.
+    Args:
+        latency_ms: Added to every call
+        jitter_ms: Extra uniform random latency, 0..jitter_ms
+        error_rate: Fraction of calls that fail (0..1)
+    """
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+
+    def apply(self) -> bool:
+        """Sleeps for the configured latency; returns True if this call should fail."""
+        delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        return random.random() < self.error_rate
+
+
+class CallCounter:
+    """Thread-safe per-name call and failure counts."""
+    def __init__(self):
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, failed: bool) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(name, {'calls': 0, 'errors': 0})
+            counts['calls'] += 1
+            counts['errors'] += int(failed)
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {name: dict(counts) for name, counts in self._counts.items()}
+
+
+def price_walk(name: str, points: int, start_price: float = 100.0) -> np.ndarray:
+    """Deterministic random-walk prices for a coin or ticker."""
+    rng = np.random.default_rng(zlib.crc32(name.encode()))
+    steps = rng.normal(0.0005, 0.02, points)
+    return start_price * (1 + len(name)) * np.exp(np.cumsum(steps))
+
+
+def headlines_for(name: str, count: int) -> List[str]:
+    coin = name.capitalize()
+    return [f"{HEADLINE_TEMPLATES[i % len(HEADLINE_TEMPLATES)].format(coin=coin)} ({i})" for i in range(count)]
+
+
+def rss_document(name: str, count: int = 20) -> bytes:
+    items = ''.join(
+        f"<item><title>{title}</title><link>http://localhost/{name}/{i}</link></item>"
+        for i, title in enumerate(headlines_for(name, count))
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f"<title>{name}</title><link>http://localhost/{name}</link><description>{name}</description>"
+        f"{items}</channel></rss>"
+    ).encode('utf-8')
+
+
+class _UpstreamHandler(BaseHTTPRequestHandler):
+    server: "FakeUpstreamServer"
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        segments = [s for s in parts.path.split('/') if s]
+        route = self._route(segments)
+        failed = self.server.faults.apply()
+        self.server.calls.add(route, failed)
+        if failed:
+            self._send(503, b'{"error": "injected failure"}', 'application/json')
+            return
+        if route == 'coingecko.simple_price':
+            ids = [i for i in query.get('ids', '').split(',') if i]
+            body = {}
+            for coin in ids:
+                walk = price_walk(coin, 365)
+                body[coin] = {'usd': round(float(walk[-1]), 2)}
+                if query.get('include_24hr_change') == 'true':
+                    body[coin]['usd_24h_change'] = float((walk[-1] / walk[-2] - 1) * 100)
+            self._send(200, json.dumps(body).encode(), 'application/json')
+        elif route in ('coingecko.market_chart', 'coingecko.market_chart_range'):
+            self._send(200, json.dumps(self._market_chart(segments[3], route, query)).encode(), 'application/json')
+        elif route == 'rss':
+            self._send(200, rss_document(segments[1]), 'application/rss+xml')
+        else:
+            self._send(404, b'{"error": "not found"}', 'application/json')
+
+    @staticmethod
+    def _route(segments: List[str]) -> str:
+        if segments[:3] == ['api', 'v3', 'simple']:
+            return 'coingecko.simple_price'
+        if segments[:3] == ['api', 'v3', 'coins'] and len(segments) >= 5:
+            return 'coingecko.market_chart_range' if segments[-1] == 'range' else 'coingecko.market_chart'
+        if segments[:1] == ['rss'] and len(segments) == 2:
+            return 'rss'
+        return 'unknown'
+
+    @staticmethod
+    def _market_chart(coin: str, route: str, query: Dict[str, str]) -> Dict[str, Any]:
+        now = int(time.time() // 86400 * 86400)
+        prices = price_walk(coin, 366)
+        points = [[(now - (365 - i) * 86400) * 1000, float(p)] for i, p in enumerate(prices)]
+        if route == 'coingecko.market_chart_range':
+            start, end = float(query.get('from', 0)) * 1000, float(query.get('to', now)) * 1000
+            points = [p for p in points if start <= p[0] <= end] or points[-1:]
+        else:
+            points = points[-(int(float(query.get('days', 365))) + 1):]
+        return {'prices': points, 'market_caps': [], 'total_volumes': []}
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeUpstreamServer(ThreadingHTTPServer):
+    """
+    Fake CoinGecko + RSS server on a background thread.
+    CoinGecko lives under /api/v3 (set COINGECKO_API_URL to url() + '/api/v3') and
+    feeds under /rss/<name>.
+    """
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, faults: Optional[Faults] = None):
+        super().__init__((host, port), _UpstreamHandler)
+        self.faults = faults or Faults()
+        self.calls = CallCounter()
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-upstreams', daemon=True)
+
+    def url(self, host: Optional[str] = None) -> str:
+        return f"http://{host or self.server_address[0]}:{self.server_address[1]}"
+
+    def start(self) -> "FakeUpstreamServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class FakeYahoo:
+    """
+    Callable with yf.download's signature (the arguments MarketData uses).
+    Returns daily or hourly candles for `period` (e.g. '1y') or since `start`.
+    """
+    _PERIOD_DAYS = {'1d': 1, '5d': 5, '1mo': 31, '3mo': 92, '6mo': 183, '1y': 366, '2y': 731, '5y': 1827}
+
+    def __init__(self, faults: Optional[Faults] = None, calls: Optional[CallCounter] = None):
+        self.faults = faults or Faults()
+        self.calls = calls or CallCounter()
+
+    def __call__(self, tickers: Any, period: Optional[str] = None, start: Optional[datetime] = None,
+                 interval: str = '1d', **kwargs: Any) -> pd.DataFrame:
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        failed = self.faults.apply()
+        self.calls.add(f"yahoo.{interval}", failed)
+        if failed:
+            raise ConnectionError("injected Yahoo Finance failure")
+        step = timedelta(hours=1) if interval == '1h' else timedelta(days=1)
+        end = pd.Timestamp.now('UTC').tz_localize(None).floor('h' if interval == '1h' else 'D')
+        if start is None:
+            start = end - timedelta(days=self._PERIOD_DAYS.get(period or '1y', 366))
+        index = pd.date_range(start=pd.Timestamp(start).ceil('h' if interval == '1h' else 'D'), end=end, freq=step)
+        columns: Dict[Any, np.ndarray] = {}
+        for ticker in tickers:
+            close = price_walk(ticker, len(index))
+            columns.update({
+                ('Adj Close', ticker): close, ('Close', ticker): close,
+                ('High', ticker): close * 1.01, ('Low', ticker): close * 0.99,
+                ('Open', ticker): close * 0.995, ('Volume', ticker): np.full(len(index), 1e6),
+            })
+        frame = pd.DataFrame(columns, index=index)
+        frame.columns = pd.MultiIndex.from_tuples(frame.columns, names=['Price', 'Ticker'])
+        return frame
+
+
+class FakeReddit:
+    """Stands in for praw.Reddit: subreddit(name).hot(limit=n) yields submissions with titles."""
+    def __init__(self, faults: Optional[Faults] = None, calls: Optional[CallCounter] = None):
+        self.faults = faults or Faults()
+        self.calls = calls or CallCounter()
+
+    def subreddit(self, name: str) -> SimpleNamespace:
+        def hot(limit: int = 10) -> Iterator[SimpleNamespace]:
+            failed = self.faults.apply()
+            self.calls.add('reddit.hot', failed)
+            if failed:
+                raise ConnectionError("injected Reddit failure")
+            for title in headlines_for(name, limit):
+                yield SimpleNamespace(title=title, stickied=False)
+        return SimpleNamespace(hot=hot)
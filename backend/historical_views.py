@@ -0,0 +1,90 @@
+"""
+Historical Views
+----------------
+Precomputed /historical responses.
+
+When a symbol's 1y history is fetched, its points are deduplicated into one daily
+series (parallel date/price arrays) and the response for every timeframe is built
+and JSON-encoded right away. A /historical request then only looks up the encoded
+views and joins them; nothing is re-parsed, re-sorted or re-encoded per request.
+"""
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Timeframe -> number of daily points in the response
+TIMEFRAMES = {
+    '7d': 7,
+    '30d': 30,
+    '6m': 180,
+    '1y': 365
+}
+DEFAULT_TIMEFRAME = '7d'
+
+MS_PER_DAY = 24 * 60 * 60 * 1000
+
+
+def daily_series(points: Sequence[Sequence[float]]) -> Tuple[List[str], List[float]]:
+    """
+    Deduplicates [timestamp_ms, price] points to one price per UTC day.
+    Args:
+        points: CoinGecko-style [timestamp_ms, price] pairs, in any order
+    Returns:
+        tuple: (dates as 'YYYY-MM-DD', prices), sorted by date, keeping the latest point of each day
+    """
+    if not points:
+        return [], []
+    data = np.asarray(points, dtype=np.float64)
+    order = np.argsort(data[:, 0], kind='stable')
+    timestamps = data[order, 0].astype(np.int64)
+    prices = data[order, 1]
+    days = timestamps // MS_PER_DAY
+    # Last point of each day: positions where the next point falls on a later day
+    last_of_day = np.append(days[1:] != days[:-1], True)
+    days, prices = days[last_of_day], prices[last_of_day]
+    dates = np.datetime_as_string(days.astype('datetime64[D]'), unit='D').tolist()
+    return dates, prices.tolist()
+
+
+def timeframe_view(symbol: str, dates: List[str], prices: List[float], timeframe: str) -> Dict[str, Any]:
+    """Builds the /historical block for one symbol and timeframe from its daily series."""
+    days_requested = TIMEFRAMES[timeframe]
+    # Take only the last N days that were requested (or what we have)
+    dates = dates[-days_requested:]
+    price_history = prices[-days_requested:]
+    has_change = len(price_history) >= 2
+    return {
+        'symbol': symbol,
+        'dates': dates,
+        'prices': price_history,
+        'current_price': price_history[-1] if price_history else None,
+        'price_change': price_history[-1] - price_history[0] if has_change else None,
+        'price_change_percent': ((price_history[-1] - price_history[0]) / price_history[0] * 100) if has_change else None,
+        'timeframe': timeframe
+    }
+
+
+def build_views(symbol: str, points: Sequence[Sequence[float]]) -> Optional[Dict[str, Any]]:
+    """
+    Builds the cached entry for a symbol's 1y history.
+    Returns:
+        dict: {'dates', 'prices', 'views': timeframe -> encoded JSON block}, or None
+        if there are fewer than 2 daily points.
+    """
+    dates, prices = daily_series(points)
+    if len(dates) < 2:
+        return None
+    return {
+        'dates': dates,
+        'prices': prices,
+        'views': {
+            timeframe: json.dumps(timeframe_view(symbol, dates, prices, timeframe))
+            for timeframe in TIMEFRAMES
+        }
+    }
+
+
+def join_views(blocks: Dict[str, str]) -> str:
+    """Joins already-encoded per-symbol JSON blocks into one JSON object."""
+    return '{' + ','.join(f'{json.dumps(symbol)}:{block}' for symbol, block in blocks.items()) + '}'
@@ -0,0 +1,400 @@
+"""
+Technical Indicators
+--------------------
+SMA, EMA, RSI, MACD and Bollinger Bands over the candles in the price store.
+
+Two ways to compute the same numbers:
+- Backfill (vectorized): whole close arrays at once. Rolling windows use
+  sliding_window_view; the recursive filters (EMA, Wilder's RSI smoothing) use
+  ema_filter, which evaluates the recurrence in blocks with cumsum instead of a
+  Python loop per candle.
+- Incremental (O(1) per indicator per candle): per (symbol, interval) state
+  built once from the backfill, then advanced by each candle the store appends.
+  The still-open latest candle is never folded into the state: it is applied on
+  top with peek(), so when Yahoo revises it the state doesn't need undoing.
+
+IndicatorEngine keeps that state and listens to PriceStore.append, so new or
+updated candles cost a handful of float operations instead of a recomputation.
+
+Conventions: SMA/EMA seeds are the simple average of the first `period` closes,
+RSI uses Wilder's smoothing (alpha = 1/period), Bollinger Bands use the
+population standard deviation. Values are NaN (None in JSON) until enough
+candles exist.
+"""
+import logging
+import math
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from price_store import PriceStore
+
+logger = logging.getLogger(__name__)
+
+SMA_PERIODS = (20, 50)
+EMA_PERIODS = (12, 26)
+RSI_PERIOD = 14
+MACD_PERIODS = (12, 26, 9)   # fast, slow, signal
+BOLLINGER = (20, 2.0)        # period, standard deviations
+
+# Output names, in response order
+FIELDS = (
+    [f"sma_{p}" for p in SMA_PERIODS] + [f"ema_{p}" for p in EMA_PERIODS] + [f"rsi_{RSI_PERIOD}"]
+    + ['macd', 'macd_signal', 'macd_histogram', 'bb_middle', 'bb_upper', 'bb_lower', 'bb_percent_b']
+)
+
+# Largest growth factor allowed inside one ema_filter block (keeps the rescaling exact to ~1e-12)
+_MAX_BLOCK_GROWTH = 8.0
+
+
+# --- Vectorized backfill ---
+
+def ema_filter(values: np.ndarray, alpha: float, initial: float) -> np.ndarray:
+    """
+    Evaluates y[t] = (1 - alpha) * y[t-1] + alpha * x[t] with y[-1] = initial.
+    Within a block, y[j] = d^(j+1) * (y0 + alpha * sum_{i<=j} d^-(i+1) * x[i]) with d = 1 - alpha,
+    which is one cumsum; blocks are sized so d^-block stays small enough to be exact.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.empty_like(values)
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        out[:] = values
+        return out
+    block = max(1, int(_MAX_BLOCK_GROWTH / -math.log(decay)))
+    steps = np.arange(1, block + 1)
+    grow, shrink = decay ** -steps, decay ** steps
+    y = initial
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        n = len(chunk)
+        out[start:start + n] = shrink[:n] * (y + alpha * np.cumsum(chunk * grow[:n]))
+        y = out[start + n - 1]
+    return out
+
+
+def sma(values: np.ndarray, period: int) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if len(values) >= period:
+        out[period - 1:] = np.lib.stride_tricks.sliding_window_view(values, period).mean(axis=1)
+    return out
+
+
+def rolling_std(values: np.ndarray, period: int) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if len(values) >= period:
+        out[period - 1:] = np.lib.stride_tricks.sliding_window_view(values, period).std(axis=1)
+    return out
+
+
+def ema(values: np.ndarray, period: int) -> np.ndarray:
+    """EMA seeded with the SMA of the first `period` values (NaN before that)."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if len(values) >= period:
+        seed = values[:period].mean()
+        out[period - 1] = seed
+        out[period:] = ema_filter(values[period:], 2.0 / (period + 1), seed)
+    return out
+
+
+def wilder_averages(closes: np.ndarray, period: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Wilder-smoothed average gain and loss per close (NaN until `period` changes exist)."""
+    closes = np.asarray(closes, dtype=np.float64)
+    avg_gain = np.full(len(closes), np.nan)
+    avg_loss = np.full(len(closes), np.nan)
+    if len(closes) > period:
+        changes = np.diff(closes)
+        gains, losses = np.maximum(changes, 0.0), np.maximum(-changes, 0.0)
+        avg_gain[period] = gains[:period].mean()
+        avg_loss[period] = losses[:period].mean()
+        avg_gain[period + 1:] = ema_filter(gains[period:], 1.0 / period, avg_gain[period])
+        avg_loss[period + 1:] = ema_filter(losses[period:], 1.0 / period, avg_loss[period])
+    return avg_gain, avg_loss
+
+
+def rsi_from_averages(avg_gain: Any, avg_loss: Any) -> Any:
+    """RSI from average gain/loss: 100 with no losses, 50 when flat."""
+    avg_gain, avg_loss = np.asarray(avg_gain, dtype=np.float64), np.asarray(avg_loss, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    rsi = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), rsi)
+    return np.where(np.isnan(avg_gain) | np.isnan(avg_loss), np.nan, rsi)
+
+
+def rsi_value(avg_gain: float, avg_loss: float) -> float:
+    """Scalar rsi_from_averages for the incremental path."""
+    if avg_loss == 0:
+        return 50.0 if avg_gain == 0 else 100.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+def macd(closes: np.ndarray, fast: int, slow: int, signal: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD line, signal line (EMA of the MACD line, seeded once it exists) and histogram."""
+    line = ema(closes, fast) - ema(closes, slow)
+    signal_line = np.full(len(line), np.nan)
+    valid = np.flatnonzero(~np.isnan(line))
+    if len(valid):
+        signal_line[valid[0]:] = ema(line[valid[0]:], signal)
+    return line, signal_line, line - signal_line
+
+
+def compute(closes: np.ndarray) -> Dict[str, np.ndarray]:
+    """Every indicator in FIELDS for a close array, vectorized."""
+    closes = np.asarray(closes, dtype=np.float64)
+    result: Dict[str, np.ndarray] = {}
+    for p in SMA_PERIODS:
+        result[f"sma_{p}"] = sma(closes, p)
+    for p in EMA_PERIODS:
+        result[f"ema_{p}"] = ema(closes, p)
+    result[f"rsi_{RSI_PERIOD}"] = rsi_from_averages(*wilder_averages(closes, RSI_PERIOD))
+    result['macd'], result['macd_signal'], result['macd_histogram'] = macd(closes, *MACD_PERIODS)
+    period, width = BOLLINGER
+    middle, std = sma(closes, period), rolling_std(closes, period)
+    result['bb_middle'], result['bb_upper'], result['bb_lower'] = middle, middle + width * std, middle - width * std
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result['bb_percent_b'] = (closes - result['bb_lower']) / (result['bb_upper'] - result['bb_lower'])
+    return result
+
+
+# --- Incremental state: push() folds in a closed candle, peek() evaluates one more close without storing it ---
+
+class RollingWindow:
+    """Last `period` closes with running sum and sum of squares (SMA, Bollinger)."""
+    def __init__(self, period: int, closes: Any = ()):
+        self.period = period
+        self.window: Deque[float] = deque((float(c) for c in list(closes)[-period:]), maxlen=period)
+        self._resum()
+
+    def _resum(self) -> None:
+        # Re-adding from the window every `period` pushes stops float drift (amortized O(1))
+        self.total = math.fsum(self.window)
+        self.total_sq = math.fsum(c * c for c in self.window)
+        self._pushes = 0
+
+    def push(self, close: float) -> None:
+        if len(self.window) == self.period:
+            oldest = self.window[0]
+            self.total -= oldest
+            self.total_sq -= oldest * oldest
+        self.window.append(close)
+        self.total += close
+        self.total_sq += close * close
+        self._pushes += 1
+        if self._pushes >= self.period:
+            self._resum()
+
+    def peek(self, close: float) -> Tuple[float, float]:
+        """(mean, population std) of the window with `close` appended; NaN if it isn't full."""
+        total, total_sq, n = self.total + close, self.total_sq + close * close, len(self.window) + 1
+        if n > self.period:
+            oldest = self.window[0]
+            total, total_sq, n = total - oldest, total_sq - oldest * oldest, self.period
+        if n < self.period:
+            return math.nan, math.nan
+        mean = total / n
+        return mean, math.sqrt(max(total_sq / n - mean * mean, 0.0))
+
+
+class EMAState:
+    """EMA value, or the closes collected so far while it is still being seeded."""
+    def __init__(self, period: int, closes: Any = ()):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        closes = np.asarray(closes, dtype=np.float64)
+        self.value = float(ema(closes, period)[-1]) if len(closes) >= period else None
+        self.seed: List[float] = [] if self.value is not None else closes.tolist()
+
+    def push(self, close: float) -> None:
+        if self.value is None:
+            self.seed.append(close)
+            if len(self.seed) == self.period:
+                self.value, self.seed = sum(self.seed) / self.period, []
+        else:
+            self.value += self.alpha * (close - self.value)
+
+    def peek(self, close: float) -> float:
+        if self.value is not None:
+            return self.value + self.alpha * (close - self.value)
+        if len(self.seed) + 1 == self.period:
+            return (sum(self.seed) + close) / self.period
+        return math.nan
+
+
+class RSIState:
+    """Previous close plus Wilder's average gain/loss (or the changes seen while seeding)."""
+    def __init__(self, period: int, closes: Any = ()):
+        self.period = period
+        closes = np.asarray(closes, dtype=np.float64)
+        self.prev = float(closes[-1]) if len(closes) else None
+        self.avg_gain = self.avg_loss = None
+        self.seed: List[float] = []
+        if len(closes) > period:
+            gains, losses = wilder_averages(closes, period)
+            self.avg_gain, self.avg_loss = float(gains[-1]), float(losses[-1])
+        else:
+            self.seed = np.diff(closes).tolist()
+
+    def _advance(self, close: float) -> Tuple[Optional[float], Optional[float], List[float]]:
+        change = close - self.prev
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        if self.avg_gain is not None:
+            n = self.period
+            return (self.avg_gain * (n - 1) + gain) / n, (self.avg_loss * (n - 1) + loss) / n, []
+        seed = self.seed + [change]
+        if len(seed) == self.period:
+            return (sum(max(c, 0.0) for c in seed) / self.period,
+                    sum(max(-c, 0.0) for c in seed) / self.period, [])
+        return None, None, seed
+
+    def push(self, close: float) -> None:
+        if self.prev is not None:
+            self.avg_gain, self.avg_loss, self.seed = self._advance(close)
+        self.prev = close
+
+    def peek(self, close: float) -> float:
+        if self.prev is None:
+            return math.nan
+        avg_gain, avg_loss, _ = self._advance(close)
+        return math.nan if avg_gain is None else rsi_value(avg_gain, avg_loss)
+
+
+class MACDState:
+    """Fast and slow EMAs plus the signal EMA of their difference."""
+    def __init__(self, fast: int, slow: int, signal: int, closes: Any = ()):
+        closes = np.asarray(closes, dtype=np.float64)
+        self.fast, self.slow = EMAState(fast, closes), EMAState(slow, closes)
+        line = macd(closes, fast, slow, signal)[0]
+        self.signal = EMAState(signal, line[~np.isnan(line)])
+
+    def push(self, close: float) -> None:
+        self.fast.push(close)
+        self.slow.push(close)
+        if self.fast.value is not None and self.slow.value is not None:
+            self.signal.push(self.fast.value - self.slow.value)
+
+    def peek(self, close: float) -> Tuple[float, float, float]:
+        line = self.fast.peek(close) - self.slow.peek(close)
+        if math.isnan(line):
+            return math.nan, math.nan, math.nan
+        signal = self.signal.peek(line)
+        return line, signal, line - signal
+
+
+class IndicatorState:
+    """All indicators for one (symbol, interval): committed closed candles plus the live one."""
+    def __init__(self, timestamps: np.ndarray, closes: np.ndarray):
+        committed = closes[:-1]
+        self.smas = {p: RollingWindow(p, committed) for p in SMA_PERIODS}
+        self.emas = {p: EMAState(p, committed) for p in EMA_PERIODS}
+        self.rsi = RSIState(RSI_PERIOD, committed)
+        self.macd = MACDState(*MACD_PERIODS, committed)
+        self.bollinger = RollingWindow(BOLLINGER[0], committed)
+        self.live_ts, self.live_close = int(timestamps[-1]), float(closes[-1])
+
+    def update(self, ts: int, close: float) -> bool:
+        """
+        Applies one candle in O(1): a newer timestamp commits the live candle and
+        replaces it, the same timestamp revises it. Returns False for an older one.
+        """
+        if ts < self.live_ts:
+            return False
+        if ts > self.live_ts:
+            for state in (*self.smas.values(), *self.emas.values(), self.rsi, self.macd, self.bollinger):
+                state.push(self.live_close)
+            self.live_ts = ts
+        self.live_close = close
+        return True
+
+    def values(self) -> Dict[str, float]:
+        close = self.live_close
+        result = {f"sma_{p}": window.peek(close)[0] for p, window in self.smas.items()}
+        result.update({f"ema_{p}": state.peek(close) for p, state in self.emas.items()})
+        result[f"rsi_{RSI_PERIOD}"] = self.rsi.peek(close)
+        result['macd'], result['macd_signal'], result['macd_histogram'] = self.macd.peek(close)
+        middle, std = self.bollinger.peek(close)
+        width = BOLLINGER[1]
+        upper, lower = middle + width * std, middle - width * std
+        result.update({
+            'bb_middle': middle, 'bb_upper': upper, 'bb_lower': lower,
+            'bb_percent_b': (close - lower) / (upper - lower) if upper > lower else math.nan
+        })
+        return result
+
+
+def _clean(value: float) -> Optional[float]:
+    return None if value is None or math.isnan(value) else round(float(value), 6)
+
+
+class IndicatorEngine:
+    """
+    Indicator state for every (symbol, interval) in the price store.
+    State is backfilled (vectorized) from the store on first read and then kept
+    current by the store's append listener.
+    """
+    def __init__(self, store: PriceStore):
+        self.store = store
+        self._states: Dict[Tuple[str, str], IndicatorState] = {}
+        self._lock = threading.Lock()
+        self.backfills = 0
+        self.updates = 0
+        store.add_listener(self.on_candles)
+
+    def _closes(self, symbol: str, interval: str) -> Tuple[np.ndarray, np.ndarray]:
+        candles = self.store.read(symbol, interval)
+        return np.asarray(candles['ts'], dtype=np.int64), np.asarray(candles['close'], dtype=np.float64)
+
+    def _state(self, symbol: str, interval: str) -> Optional[IndicatorState]:
+        # Caller must hold self._lock
+        state = self._states.get((symbol, interval))
+        if state is None:
+            timestamps, closes = self._closes(symbol, interval)
+            if not len(closes):
+                return None
+            state = self._states[(symbol, interval)] = IndicatorState(timestamps, closes)
+            self.backfills += 1
+        return state
+
+    def on_candles(self, symbol: str, interval: str, candles: np.ndarray) -> None:
+        """PriceStore listener: advances the state with newly written candles (ts order)."""
+        with self._lock:
+            state = self._states.get((symbol, interval))
+            if state is None:
+                return  # Backfilled from the store on first read
+            for ts, close in zip(candles['ts'].tolist(), candles['close'].tolist()):
+                if not state.update(ts, close):
+                    # Out-of-order write: rebuild from the store next time
+                    del self._states[(symbol, interval)]
+                    return
+                self.updates += 1
+
+    def latest(self, symbol: str, interval: str = '1d') -> Optional[Dict[str, Any]]:
+        """Current indicator values for a symbol (None if the store has no candles for it)."""
+        with self._lock:
+            state = self._state(symbol, interval)
+            if state is None:
+                return None
+            values = state.values()
+            ts, close = state.live_ts, state.live_close
+        return {'ts': ts, 'close': close, **{name: _clean(values[name]) for name in FIELDS}}
+
+    def history(self, symbol: str, interval: str = '1d', points: int = 100) -> Optional[Dict[str, List[Any]]]:
+        """Last `points` values of every indicator, computed vectorized from the stored closes."""
+        timestamps, closes = self._closes(symbol, interval)
+        if not len(closes):
+            return None
+        series = compute(closes)
+        tail = slice(-points, None)
+        return {
+            'ts': timestamps[tail].tolist(),
+            'close': closes[tail].tolist(),
+            **{name: [_clean(v) for v in series[name][tail].tolist()] for name in FIELDS}
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'states': len(self._states), 'backfills': self.backfills, 'updates': self.updates}
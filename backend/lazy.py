@@ -0,0 +1,76 @@
+"""
+Lazy Components
+---------------
+Deferred construction for the backend's heavy pieces.
+
+Importing pandas, yfinance, PRAW and the sentiment lexicon takes most of a second,
+and none of it is needed to answer /ping. Components that need them are wrapped in
+Lazy: the factory (which does its own imports) runs on the first get(), once, even
+when several request threads ask at the same time.
+
+Servers call warm_up() right after they start listening, so the components load
+in the background while cheap routes are already being served; a request that
+arrives first simply waits for the load in progress instead of starting another.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Generic, Iterable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class Lazy(Generic[T]):
+    """
+    A value built by `factory` on first use.
+    Args:
+        name: Used in logs and load timings
+        factory: Zero-argument callable returning the value
+    """
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self.factory = factory
+        self._value: Optional[T] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.load_seconds: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self) -> T:
+        if self._loaded:
+            return self._value  # type: ignore[return-value]
+        with self._lock:
+            if not self._loaded:
+                start = time.perf_counter()
+                self._value = self.factory()
+                self.load_seconds = time.perf_counter() - start
+                self._loaded = True
+                logger.info(f"Loaded {self.name} in {self.load_seconds * 1000:.0f} ms")
+        return self._value  # type: ignore[return-value]
+
+    def set(self, value: T) -> None:
+        """Replaces the value without running the factory (tests, benchmarks)."""
+        with self._lock:
+            self._value = value
+            self._loaded = True
+
+
+def warm_up(components: Iterable[Lazy]) -> threading.Thread:
+    """Loads `components` in order on a daemon thread; failures are logged and retried on next use."""
+    components = list(components)
+
+    def run() -> None:
+        for component in components:
+            try:
+                component.get()
+            except Exception as e:
+                logger.error(f"Warm-up of {component.name} failed: {e}")
+
+    thread = threading.Thread(target=run, name='warm-up', daemon=True)
+    thread.start()
+    return thread
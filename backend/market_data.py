@@ -0,0 +1,251 @@
+"""
+Market Data Layer
+-----------------
+Shared Yahoo Finance price source for /price, /predict and /historical.
+
+All configured tickers are fetched with a single batched yf.download call and
+decoded into one columnar pandas DataFrame (index: UTC dates, columns: symbols,
+values: daily close). Adding a symbol widens the frame but never adds a round trip.
+Frames are cached in the shared APICache, so concurrent endpoints reuse one download.
+
+With a PriceStore attached, candles are persisted on disk and each refresh only
+downloads what arrived after the last stored candle; frames are then built from
+the store's memory-mapped files.
+"""
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from price_store import INTERVAL_SECONDS, PriceStore, decode_candles
+
+logger = logging.getLogger(__name__)
+
+# Yahoo Finance periods we download, smallest first, with the number of days each covers
+_PERIOD_DAYS = [('1d', 1), ('1y', 365), ('2y', 730), ('5y', 1825), ('max', None)]
+
+
+def period_for_days(days: int) -> str:
+    """Returns the smallest Yahoo Finance period that covers the last `days` days."""
+    for period, covered in _PERIOD_DAYS[1:]:
+        if covered is None or days <= covered:
+            return period
+    return 'max'
+
+
+def decode_closes(raw: pd.DataFrame, tickers: Dict[str, str]) -> pd.DataFrame:
+    """
+    Turns a yf.download result into a close-price frame with one column per symbol.
+    Args:
+        raw (DataFrame): Output of yf.download for one or more tickers
+        tickers (dict): symbol -> Yahoo ticker, e.g. {'BTC': 'BTC-USD'}
+    Returns:
+        DataFrame: float64 closes indexed by tz-naive UTC date, columns in `tickers` order.
+        Symbols Yahoo returned nothing for are all-NaN columns.
+    """
+    symbols = list(tickers)
+    if raw is None or raw.empty:
+        return pd.DataFrame(columns=symbols, dtype='float64')
+
+    if isinstance(raw.columns, pd.MultiIndex):
+        closes = raw['Close']
+    else:
+        # Older yfinance versions return flat columns for a single ticker
+        closes = raw[['Close']].rename(columns={'Close': next(iter(tickers.values()))})
+
+    by_ticker = {ticker: symbol for symbol, ticker in tickers.items()}
+    closes = closes.rename(columns=by_ticker).reindex(columns=symbols).astype('float64')
+
+    index = pd.DatetimeIndex(closes.index)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    closes.index = index.normalize()
+    # Keep the latest row per day and drop days no symbol traded
+    closes = closes[~closes.index.duplicated(keep='last')].sort_index()
+    return closes.dropna(how='all')
+
+
+class MarketData:
+    """
+    Batched, cached access to daily close prices for every configured symbol.
+    One frame per Yahoo period is cached; '1d' uses the short 'price' TTL so
+    live prices stay fresh, longer periods use the 'historical' TTL.
+    """
+    def __init__(self, cache: Any, tickers: Dict[str, str], store: Optional[PriceStore] = None,
+                 backfill_days: int = 400, intraday_backfill_days: int = 30):
+        self.cache = cache
+        self.tickers = dict(tickers)
+        self.store = store
+        self.backfill_days = backfill_days                    # Daily history kept in the store
+        self.intraday_backfill_days = intraday_backfill_days  # Hourly history kept in the store
+
+    def download(self, period: str) -> Optional[pd.DataFrame]:
+        """
+        Returns a fresh close-price frame for a Yahoo period. Returns None on failure.
+        Uses the price store (incremental sync) when the period fits in it,
+        otherwise downloads the full period for all tickers in one request.
+        """
+        days = dict(_PERIOD_DAYS).get(period)
+        if self.store is not None and days is not None and days <= self.backfill_days:
+            self.sync('1d')
+            closes = self.store_frame(days)
+            return closes if not closes.empty else None
+        tickers = list(self.tickers.values())
+        logger.info(f"Downloading {period} closes for {len(tickers)} tickers from Yahoo Finance...")
+        try:
+            raw = yf.download(
+                tickers=tickers,
+                period=period,
+                interval='1d',
+                group_by='column',
+                auto_adjust=False,
+                progress=False,
+                threads=True
+            )
+        except Exception as e:
+            logger.error(f"Yahoo Finance batch download failed ({period}): {e}")
+            return None
+        closes = decode_closes(raw, self.tickers)
+        if closes.empty:
+            logger.warning(f"Yahoo Finance returned no {period} data")
+            return None
+        return closes
+
+    def _download_candles(self, tickers: Dict[str, str], start: datetime, interval: str) -> Dict[str, np.ndarray]:
+        logger.info(f"Downloading {interval} candles since {start:%Y-%m-%d %H:%M} for {len(tickers)} tickers...")
+        try:
+            raw = yf.download(
+                tickers=list(tickers.values()),
+                start=start,
+                interval=interval,
+                group_by='column',
+                auto_adjust=False,
+                progress=False,
+                threads=True
+            )
+        except Exception as e:
+            logger.error(f"Yahoo Finance candle download failed ({interval}): {e}")
+            return {}
+        return decode_candles(raw, tickers)
+
+    def sync(self, interval: str = '1d') -> int:
+        """
+        Brings the price store up to date for every ticker.
+        Symbols already in the store are fetched together starting from the oldest
+        "last stored candle"; symbols not stored yet are backfilled in a second
+        batch. Returns the number of candles written.
+        """
+        if self.store is None:
+            return 0
+        now = datetime.utcnow()
+        backfill = self.intraday_backfill_days if interval != '1d' else self.backfill_days
+        stored: Dict[str, str] = {}
+        missing: Dict[str, str] = {}
+        last_seen: List[int] = []
+        for symbol, ticker in self.tickers.items():
+            last_ts = self.store.last_timestamp(symbol, interval)
+            if last_ts is None:
+                missing[symbol] = ticker
+            else:
+                stored[symbol] = ticker
+                last_seen.append(last_ts)
+
+        batches = []
+        if stored:
+            # Re-fetch the newest stored candle too: it may have been the still-open one
+            batches.append((stored, datetime.utcfromtimestamp(min(last_seen))))
+        if missing:
+            batches.append((missing, now - timedelta(days=backfill)))
+
+        written = 0
+        for tickers, start in batches:
+            for symbol, candles in self._download_candles(tickers, start, interval).items():
+                written += self.store.append(symbol, interval, candles)
+        logger.info(f"Price store sync ({interval}): {written} candles written")
+        return written
+
+    def _synced_at(self, interval: str) -> float:
+        """Syncs the store and returns the sync time, for throttling syncs through the cache."""
+        self.sync(interval)
+        return time.time()
+
+    def refresh_store(self, interval: str = '1d') -> None:
+        """Keeps the store's `interval` candles at most one 'price' TTL old (syncs on a miss)."""
+        if interval == '1d':
+            self.closes('1d')  # Refreshing the daily frame syncs the daily store
+        else:
+            self.cache.get_or_load(f'market_sync_{interval}', lambda: self._synced_at(interval), 'price')
+
+    def store_frame(self, days: int, interval: str = '1d') -> pd.DataFrame:
+        """Builds a close-price frame (dates x symbols) for the last `days` days from the store."""
+        since = int(time.time()) - (days + 1) * INTERVAL_SECONDS['1d']
+        series = [self.store.close_series(symbol, interval, since) for symbol in self.tickers]
+        closes = pd.concat(series, axis=1) if series else pd.DataFrame()
+        closes = closes.reindex(columns=list(self.tickers)).sort_index()
+        if interval == '1d':
+            closes.index = pd.DatetimeIndex(closes.index).normalize()
+        return closes.iloc[-days:] if days > 1 else closes
+
+    def prices_ago(self, symbols: List[str], seconds: int) -> Dict[str, Optional[float]]:
+        """
+        Close prices about `seconds` ago for several symbols, from hourly candles in the store.
+        The hourly store is synced at most once per 'price' TTL for all symbols together.
+        """
+        prices: Dict[str, Optional[float]] = {symbol: None for symbol in symbols}
+        if self.store is None:
+            return prices
+        self.refresh_store('1h')
+        ts = int(time.time()) - seconds
+        for symbol in symbols:
+            if symbol in self.tickers:
+                prices[symbol] = self.store.price_at(symbol, '1h', ts)
+        return prices
+
+    def closes(self, period: str = '1y') -> Optional[pd.DataFrame]:
+        """Returns the cached close-price frame for a Yahoo period, downloading it on a miss."""
+        cache_type = 'price' if period == '1d' else 'historical'
+        return self.cache.get_or_refresh(
+            f"market_closes_{period}", lambda: self.download(period), cache_type
+        )
+
+    def history(self, days: int) -> Optional[pd.DataFrame]:
+        """Returns the last `days` rows of daily closes for all symbols (days must be at least 1)."""
+        if days < 1:
+            raise ValueError(f"days must be at least 1, got {days}")
+        frame = self.closes(period_for_days(days))
+        if frame is None:
+            return None
+        return frame.iloc[-days:]
+
+    def series(self, symbol: str, days: int = 365) -> Optional[pd.Series]:
+        """Returns one symbol's daily closes over the last `days` days, without gaps."""
+        frame = self.history(days)
+        if frame is None or symbol not in frame:
+            return None
+        series = frame[symbol].dropna()
+        return series if not series.empty else None
+
+    def latest_prices(self) -> Dict[str, Optional[float]]:
+        """Returns the most recent close for every symbol (None if Yahoo has no data)."""
+        frame = self.closes('1d')
+        if frame is None:
+            # Fall back to whatever daily history is already cached, without another download
+            frame = self.cache.get('market_closes_1y', allow_expired=True)
+        prices: Dict[str, Optional[float]] = {symbol: None for symbol in self.tickers}
+        if frame is None:
+            return prices
+        for symbol in self.tickers:
+            column = frame[symbol].dropna() if symbol in frame else None
+            if column is not None and not column.empty:
+                prices[symbol] = round(float(column.iloc[-1]), 2)
+        return prices
+
+
+def to_market_chart(series: pd.Series) -> List[List[float]]:
+    """Converts a close series into CoinGecko-style [timestamp_ms, price] points."""
+    timestamps = pd.DatetimeIndex(series.index).as_unit('ms').asi8
+    return [[int(ts), float(price)] for ts, price in zip(timestamps, series.to_numpy(dtype=np.float64))]
@@ -0,0 +1,100 @@
+"""
+Password Hasher
+---------------
+Runs password hashing and verification on a small dedicated thread pool.
+
+scrypt/pbkdf2 are slow on purpose (~0.1s of CPU per call at the defaults), and
+inline in the request thread a burst of logins holds every web worker, so cheap
+cached endpoints like /price and /ping queue behind them. hashlib releases the
+GIL while it hashes, so a few threads are enough to use the cores set aside for
+it without blocking the rest of the app.
+
+Admission control: at most `workers + max_queue` hash jobs are admitted at once.
+A request that can't get a slot within `admission_timeout` gets PasswordHasherBusy
+(the auth endpoints answer 503) instead of piling up behind the others.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool is saturated."""
+
+
+class PasswordHasher:
+    """
+    Bounded executor for generate_password_hash / check_password_hash.
+    Args:
+        workers: Hashing threads
+        max_queue: Jobs allowed to wait for a thread beyond the ones running
+        admission_timeout: Seconds a request may wait for a slot before PasswordHasherBusy
+        method: werkzeug hash method incl. cost, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'
+                (verification reads the cost from the stored hash, so old hashes keep working)
+    """
+    def __init__(self, workers: int = 2, max_queue: int = 8, admission_timeout: float = 0.5,
+                 method: str = 'scrypt'):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.admission_timeout = admission_timeout
+        self.method = method
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, Deque[float]] = {'hash': deque(maxlen=500), 'verify': deque(maxlen=500)}
+        self._in_flight = 0
+        self.rejected = 0
+
+    def _run(self, op: str, fn: Callable[..., Any], *args) -> Any:
+        if not self._slots.acquire(timeout=self.admission_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusy(f"password {op} pool is saturated")
+        with self._lock:
+            self._in_flight += 1
+        start = time.perf_counter()
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            elapsed = time.perf_counter() - start
+            self._slots.release()
+            with self._lock:
+                self._in_flight -= 1
+                self._latencies[op].append(elapsed)
+
+    def hash(self, password: str) -> str:
+        return self._run('hash', generate_password_hash, password, self.method)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return self._run('verify', check_password_hash, password_hash, password)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size, current load, rejections and per-operation latency (ms, incl. queueing)."""
+        def summarize(samples: Deque[float]) -> Optional[Dict[str, Any]]:
+            if not samples:
+                return None
+            ordered = sorted(samples)
+            return {
+                'count': len(ordered),
+                'avg_ms': round(sum(ordered) / len(ordered) * 1000, 1),
+                'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+                'max_ms': round(ordered[-1] * 1000, 1)
+            }
+
+        with self._lock:
+            return {
+                'method': self.method.split(':')[0],
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'in_flight': self._in_flight,
+                'rejected': self.rejected,
+                'hash': summarize(self._latencies['hash']),
+                'verify': summarize(self._latencies['verify'])
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,249 @@
+"""
+Price Prediction
+----------------
+Linear trend predictions for every tracked symbol at once.
+
+Instead of fitting one LinearRegression per symbol, the closes of all symbols are
+laid out as a (days x symbols) matrix and every column's least-squares line is
+solved in a single vectorized pass. Fitting 200 symbols costs a few array
+operations more than fitting 2.
+"""
+import hashlib
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FUTURE_DAYS = 7  # Number of future days to extrapolate
+
+
+def fit_linear_trends(prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Fits price = intercept + slope * x for every column of a price matrix.
+    Args:
+        prices (ndarray): (days x symbols) closes; NaN marks missing days
+    Returns:
+        tuple: (slopes, intercepts, counts), one entry per column.
+        x counts each column's valid rows only (0, 1, 2, ...), the same as fitting
+        the column with its NaNs dropped. Columns with fewer than 2 points get NaN.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if prices.ndim == 1:
+        prices = prices[:, None]
+    mask = ~np.isnan(prices)
+    counts = mask.sum(axis=0)
+    x = np.cumsum(mask, axis=0) - 1.0
+    y = np.where(mask, prices, 0.0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Centered sums avoid cancellation when prices are large
+        mean_x = np.where(mask, x, 0.0).sum(axis=0) / counts
+        mean_y = y.sum(axis=0) / counts
+        dx = np.where(mask, x - mean_x, 0.0)
+        dy = np.where(mask, prices - mean_y, 0.0)
+        sxx = (dx * dx).sum(axis=0)
+        slopes = np.where(sxx > 0, (dx * dy).sum(axis=0) / sxx, np.nan)
+        intercepts = mean_y - slopes * mean_x
+    return slopes, intercepts, counts
+
+
+def empty_prediction() -> Dict[str, Any]:
+    return {
+        'dates': [],
+        'actual': [],
+        'predicted': [],
+        'predicted_price': None
+    }
+
+
+def data_version(frame: pd.DataFrame, symbol: str) -> str:
+    """
+    Identifies the candles a symbol's fit depends on.
+    Changes when a new candle arrives, the latest close moves, or the UTC day rolls over.
+    """
+    column = frame[symbol].dropna() if symbol in frame else pd.Series(dtype='float64')
+    if column.empty:
+        return 'empty'
+    today_str = datetime.utcnow().strftime("%Y-%m-%d")
+    return f"{column.index[-1]:%Y-%m-%d}|{len(column)}|{float(column.iloc[-1])!r}|{today_str}"
+
+
+def build_prediction_series(
+    frame: Optional[pd.DataFrame],
+    symbols: List[str],
+    future_days: int = FUTURE_DAYS
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Fits every symbol in one pass and builds its dated actual/predicted series.
+    Args:
+        frame (DataFrame): Daily closes, one column per symbol
+        symbols (list of str): Symbols to fit
+        future_days (int): Days to extrapolate past the last candle
+    Returns:
+        dict: symbol -> {'dates', 'actual', 'predicted', 'date_index'}, where
+        date_index maps 'YYYY-MM-DD' to its position in 'predicted'.
+        Symbols with fewer than 2 closes are omitted.
+    """
+    series: Dict[str, Dict[str, Any]] = {}
+    if frame is None or frame.empty:
+        return series
+    fitted = [symbol for symbol in symbols if symbol in frame]
+    if not fitted:
+        return series
+
+    matrix = frame[fitted].to_numpy(dtype=np.float64)
+    slopes, intercepts, counts = fit_linear_trends(matrix)
+    steps = np.arange(len(frame) + future_days, dtype=np.float64)
+    # Predicted line for every symbol: (steps x symbols)
+    predicted_matrix = intercepts[None, :] + slopes[None, :] * steps[:, None]
+    today_str = datetime.utcnow().strftime("%Y-%m-%d")
+
+    for col, symbol in enumerate(fitted):
+        if counts[col] < 2:
+            continue
+        valid = ~np.isnan(matrix[:, col])
+        dates = [d.strftime('%Y-%m-%d') for d in frame.index[valid]]
+        prices: List[Optional[float]] = matrix[valid, col].tolist()
+        predicted_prices = predicted_matrix[:counts[col] + future_days, col].tolist()
+
+        # Always include today's date as the last date if not present
+        if today_str not in dates:
+            dates.append(today_str)
+            prices.append(None)
+
+        # Extend dates with future dates
+        last_date = datetime.strptime(dates[-1], "%Y-%m-%d")
+        future_dates = [(last_date + timedelta(days=i + 1)).strftime("%Y-%m-%d") for i in range(future_days)]
+        all_dates = dates + future_dates
+
+        series[symbol] = {
+            'dates': all_dates,
+            'actual': prices + [None] * future_days,
+            'predicted': predicted_prices,
+            # Only dates that have a predicted value are indexed
+            'date_index': {date: i for i, date in enumerate(all_dates[:len(predicted_prices)])}
+        }
+    return series
+
+
+def to_payload(series: Optional[Dict[str, Any]], requested_date: Optional[str]) -> Dict[str, Any]:
+    """Turns a built series into the /predict response block, looking up requested_date in O(1)."""
+    if series is None:
+        return empty_prediction()
+    predicted_price = None
+    if requested_date:
+        idx = series['date_index'].get(requested_date)
+        if idx is not None:
+            predicted_price = float(series['predicted'][idx])
+    return {
+        'dates': series['dates'],
+        'actual': series['actual'],
+        'predicted': series['predicted'],
+        'predicted_price': predicted_price
+    }
+
+
+def build_predictions(
+    frame: Optional[pd.DataFrame],
+    symbols: List[str],
+    requested_date: Optional[str] = None,
+    future_days: int = FUTURE_DAYS
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Builds the /predict payload for every symbol from one close-price frame, without caching.
+    Args:
+        frame (DataFrame): Daily closes, one column per symbol
+        symbols (list of str): Symbols to include in the response
+        requested_date (str): Optional 'YYYY-MM-DD' to return a single predicted price for
+        future_days (int): Days to extrapolate past the last candle
+    Returns:
+        dict: symbol -> {'dates', 'actual', 'predicted', 'predicted_price'}
+    """
+    series = build_prediction_series(frame, symbols, future_days)
+    return {symbol: to_payload(series.get(symbol), requested_date) for symbol in symbols}
+
+
+class PredictionCache:
+    """
+    Caches fitted prediction series per (symbol, window) in the shared APICache.
+    Each entry records the data version it was fit on, so it is reused until a
+    new candle arrives (or the 'predict' TTL runs out). Only symbols whose data
+    changed are refit, and they are refit together in one vectorized pass.
+    With a MetricsRegistry, each fit pass is timed in model_fit_duration_seconds.
+    """
+    def __init__(self, cache: Any, future_days: int = FUTURE_DAYS, metrics: Optional[Any] = None):
+        self.cache = cache
+        self.future_days = future_days
+        self.fit_seconds = None
+        if metrics is not None:
+            self.fit_seconds = metrics.histogram(
+                'model_fit_duration_seconds', 'Time to fit /predict models, per vectorized pass', ['window']
+            )
+
+    @staticmethod
+    def _key(symbol: str, window: int) -> str:
+        return f"predict_model_{symbol}_{window}"
+
+    def get_series(self, frame: Optional[pd.DataFrame], symbols: List[str], window: int) -> Dict[str, Dict[str, Any]]:
+        """Returns symbol -> cached or freshly built series for this window."""
+        if frame is None or frame.empty:
+            return {}
+        series: Dict[str, Dict[str, Any]] = {}
+        versions = {symbol: data_version(frame, symbol) for symbol in symbols}
+        stale: List[str] = []
+        for symbol in symbols:
+            entry = self.cache.get(self._key(symbol, window), cache_type='predict')
+            if entry and entry['version'] == versions[symbol]:
+                series[symbol] = entry['series']
+            else:
+                stale.append(symbol)
+
+        if stale:
+            logger.info(f"Fitting prediction models for {len(stale)} symbols (window={window})")
+            started = time.perf_counter()
+            fresh = build_prediction_series(frame, stale, self.future_days)
+            if self.fit_seconds is not None:
+                self.fit_seconds.observe(time.perf_counter() - started, window=window)
+            for symbol in stale:
+                if symbol not in fresh:
+                    continue
+                series[symbol] = fresh[symbol]
+                self.cache.set(
+                    self._key(symbol, window),
+                    {'version': versions[symbol], 'series': fresh[symbol]},
+                    'predict'
+                )
+        return series
+
+    def payload_key(
+        self,
+        frame: Optional[pd.DataFrame],
+        symbols: List[str],
+        window: int,
+        requested_date: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Cache key for a whole /predict payload; it changes whenever any symbol's data version does.
+        Returns None when there is no history, so empty payloads are never cached.
+        """
+        if frame is None or frame.empty:
+            return None
+        versions = '/'.join(f"{symbol}={data_version(frame, symbol)}" for symbol in symbols)
+        digest = hashlib.blake2b(versions.encode(), digest_size=8).hexdigest()
+        return f"predict_payload_{window}_{requested_date or 'latest'}_{digest}"
+
+    def predict(
+        self,
+        frame: Optional[pd.DataFrame],
+        symbols: List[str],
+        window: int,
+        requested_date: Optional[str] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Builds the /predict payload, reusing cached fits where the data has not changed."""
+        series = self.get_series(frame, symbols, window)
+        return {symbol: to_payload(series.get(symbol), requested_date) for symbol in symbols}
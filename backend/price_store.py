@@ -0,0 +1,212 @@
+"""
+Price Store
+-----------
+On-disk OHLCV candle store shared by /historical, /predict and /recommendation.
+
+Each (interval, symbol) pair is one append-only binary file of fixed-size records
+(see CANDLE_DTYPE) under PRICE_STORE_DIR, e.g. data/prices/1d/BTC.bin. Because the
+records are fixed-size and sorted by timestamp:
+- reads are zero-copy np.memmap views that can be sliced or binary-searched,
+- refreshes only fetch candles after the last stored timestamp and append them,
+- the still-open latest candle is rewritten in place as it updates.
+
+Data survives restarts, so a cold process no longer re-downloads a year of history.
+"""
+import logging
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl  # Cross-process file locks (not available on Windows)
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CANDLE_DTYPE = np.dtype([
+    ('ts', '<i8'),       # Candle open time, seconds since epoch (UTC)
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+])
+
+# Seconds per candle for the intervals we store
+INTERVAL_SECONDS = {'1h': 3600, '1d': 86400}
+
+# Called as listener(symbol, interval, candles) with the candles append() just wrote
+CandleListener = Callable[[str, str, np.ndarray], None]
+
+
+def empty_candles() -> np.ndarray:
+    return np.empty(0, dtype=CANDLE_DTYPE)
+
+
+def decode_candles(raw: pd.DataFrame, tickers: Dict[str, str]) -> Dict[str, np.ndarray]:
+    """
+    Splits a multi-ticker yf.download result into per-symbol candle arrays.
+    Args:
+        raw (DataFrame): yf.download(..., group_by='column') output
+        tickers (dict): symbol -> Yahoo ticker
+    Returns:
+        dict: symbol -> sorted CANDLE_DTYPE array without rows missing a close
+    """
+    candles: Dict[str, np.ndarray] = {}
+    if raw is None or raw.empty:
+        return candles
+    index = pd.DatetimeIndex(raw.index)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    timestamps = index.as_unit('s').asi8
+
+    for symbol, ticker in tickers.items():
+        def field(name: str) -> np.ndarray:
+            if isinstance(raw.columns, pd.MultiIndex):
+                key = (name, ticker)
+                if key not in raw.columns:
+                    return np.full(len(raw), np.nan)
+                return raw[key].to_numpy(dtype=np.float64)
+            return raw[name].to_numpy(dtype=np.float64) if name in raw.columns else np.full(len(raw), np.nan)
+
+        rows = np.empty(len(raw), dtype=CANDLE_DTYPE)
+        rows['ts'] = timestamps
+        for name in ('open', 'high', 'low', 'close', 'volume'):
+            rows[name] = field(name.capitalize())
+        rows = rows[~np.isnan(rows['close'])]
+        rows = rows[np.argsort(rows['ts'], kind='stable')]
+        # Keep the last row per timestamp
+        if len(rows):
+            keep = np.append(rows['ts'][1:] != rows['ts'][:-1], True)
+            rows = rows[keep]
+        candles[symbol] = rows
+    return candles
+
+
+class PriceStore:
+    """
+    Append-only candle files with memory-mapped reads.
+    One writer lock per file in-process, plus an flock where the OS supports it.
+    """
+    def __init__(self, root: str):
+        self.root = root
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._listeners: List[CandleListener] = []
+
+    def add_listener(self, listener: CandleListener) -> None:
+        """Registers a callback for every successful append (e.g. incremental indicators)."""
+        self._listeners.append(listener)
+
+    def path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, interval, f"{symbol}.bin")
+
+    def _lock(self, path: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def count(self, symbol: str, interval: str) -> int:
+        """Number of complete records stored (a torn trailing write is ignored)."""
+        try:
+            return os.path.getsize(self.path(symbol, interval)) // CANDLE_DTYPE.itemsize
+        except OSError:
+            return 0
+
+    def read(self, symbol: str, interval: str) -> np.ndarray:
+        """
+        Returns all candles as a read-only memory-mapped structured array.
+        Slicing it, or taking a field like read(...)['close'], does not copy.
+        """
+        n = self.count(symbol, interval)
+        if n == 0:
+            return empty_candles()
+        return np.memmap(self.path(symbol, interval), dtype=CANDLE_DTYPE, mode='r', shape=(n,))
+
+    def last_timestamp(self, symbol: str, interval: str) -> Optional[int]:
+        candles = self.read(symbol, interval)
+        return int(candles['ts'][-1]) if len(candles) else None
+
+    def append(self, symbol: str, interval: str, candles: np.ndarray) -> int:
+        """
+        Stores candles newer than the last stored one; a candle with the same
+        timestamp as the last stored one replaces it (the live candle updating).
+        Returns the number of records written.
+        """
+        if len(candles) == 0:
+            return 0
+        path = self.path(symbol, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock(path):
+            written = self._write(path, candles)
+            # Still under the in-process lock, so listeners see each file's writes in order
+            for listener in self._listeners:
+                try:
+                    listener(symbol, interval, written)
+                except Exception as e:
+                    logger.error(f"Price store listener failed for {symbol} {interval}: {e}")
+        return len(written)
+
+    def _write(self, path: str, candles: np.ndarray) -> np.ndarray:
+        """Appends under the file lock; returns the candles actually written (live candle first)."""
+        with open(path, 'a+b') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                size = f.seek(0, os.SEEK_END)
+                n = size // CANDLE_DTYPE.itemsize
+                if size % CANDLE_DTYPE.itemsize:
+                    # Drop a torn record left by an interrupted write
+                    f.truncate(n * CANDLE_DTYPE.itemsize)
+                last_ts = None
+                if n:
+                    f.seek((n - 1) * CANDLE_DTYPE.itemsize)
+                    last_ts = int(np.frombuffer(f.read(CANDLE_DTYPE.itemsize), dtype=CANDLE_DTYPE)['ts'][0])
+                candles = np.ascontiguousarray(candles, dtype=CANDLE_DTYPE)
+                if last_ts is not None:
+                    candles = candles[candles['ts'] >= last_ts]
+                if len(candles) == 0:
+                    return candles
+                new = candles
+                if last_ts is not None and candles['ts'][0] == last_ts:
+                    # 'a' mode always appends, so rewrite the live candle through a second handle
+                    with open(path, 'r+b') as rf:
+                        rf.seek((n - 1) * CANDLE_DTYPE.itemsize)
+                        rf.write(candles[:1].tobytes())
+                    new = candles[1:]
+                f.seek(0, os.SEEK_END)
+                f.write(new.tobytes())
+                f.flush()
+                return candles
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def close_series(self, symbol: str, interval: str, since: Optional[int] = None) -> pd.Series:
+        """Close prices indexed by tz-naive UTC timestamps, optionally from `since` (epoch seconds)."""
+        candles = self.read(symbol, interval)
+        if since is not None and len(candles):
+            candles = candles[np.searchsorted(candles['ts'], since):]
+        return pd.Series(
+            np.asarray(candles['close']),
+            index=pd.to_datetime(np.asarray(candles['ts']), unit='s'),
+            name=symbol,
+            dtype='float64'
+        )
+
+    def price_at(self, symbol: str, interval: str, ts: int) -> Optional[float]:
+        """Close of the stored candle nearest to `ts` (binary search, no copy)."""
+        candles = self.read(symbol, interval)
+        if not len(candles):
+            return None
+        timestamps = candles['ts']
+        i = int(np.searchsorted(timestamps, ts))
+        candidates = [j for j in (i - 1, i) if 0 <= j < len(candles)]
+        best = min(candidates, key=lambda j: abs(int(timestamps[j]) - ts))
+        # Don't answer with a candle far away from the requested time
+        if abs(int(timestamps[best]) - ts) > 2 * INTERVAL_SECONDS.get(interval, 86400):
+            return None
+        return float(candles['close'][best])
@@ -0,0 +1,178 @@
+"""
+Price Stream
+------------
+Server-Sent Events push for live prices (/price/stream).
+
+One ingestion loop per process reads the current prices on a fixed interval (from
+the same cache entry /price uses, so upstream is fetched at most once per cache
+period no matter how many clients are connected). When a price changes, only the
+changed coins are encoded - once - as an SSE event and handed to every subscriber.
+
+Each subscriber has a small bounded queue. A client that can't keep up doesn't
+grow a backlog: its queue is replaced by one full snapshot so it resyncs.
+The loop starts with the first subscriber and stops after the last one leaves.
+"""
+import itertools
+import json
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[bytes], None]
+
+
+def encode_event(event: str, data: Any, event_id: Optional[int] = None) -> bytes:
+    """Encodes one SSE message."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+
+HEARTBEAT = b": keepalive\n\n"
+
+
+class PriceBroadcaster:
+    """
+    Polls a price source on one background thread and fans changes out to subscribers.
+    Args:
+        fetch: Returns the current {coin: {'usd': price}} dict (or None when unavailable)
+        interval: Seconds between polls
+    """
+    def __init__(self, fetch: Callable[[], Optional[Dict[str, Any]]], interval: float = 5.0):
+        self.fetch = fetch
+        self.interval = interval
+        self._subscribers: Dict[int, Deliver] = {}
+        self._ids = itertools.count(1)
+        self._prices: Dict[str, Any] = {}
+        self._version = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.polls = 0
+        self.updates = 0
+        self.resyncs = 0
+
+    def subscribe(self, deliver: Deliver) -> Tuple[int, bytes]:
+        """
+        Registers a subscriber; deliver(event_bytes) is called from the ingestion thread.
+        Returns:
+            tuple: (subscription id, snapshot event to send first)
+        """
+        with self._lock:
+            subscription_id = next(self._ids)
+            self._subscribers[subscription_id] = deliver
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='price-stream', daemon=True)
+                self._thread.start()
+        return subscription_id, self.snapshot_event()
+
+    def unsubscribe(self, subscription_id: int) -> None:
+        with self._lock:
+            self._subscribers.pop(subscription_id, None)
+
+    def snapshot_event(self) -> bytes:
+        with self._lock:
+            return encode_event('snapshot', self._prices, self._version)
+
+    def count_resync(self) -> None:
+        with self._lock:
+            self.resyncs += 1
+
+    def poll_once(self) -> Optional[bytes]:
+        """Fetches prices and broadcasts the changed coins. Returns the event sent, if any."""
+        prices = self.fetch()
+        with self._lock:
+            self.polls += 1
+            if not prices:
+                return None
+            changed = {name: value for name, value in prices.items() if self._prices.get(name) != value}
+            if not changed:
+                return None
+            self._prices = {**self._prices, **changed}
+            self._version += 1
+            self.updates += 1
+            event = encode_event('prices', changed, self._version)
+            subscribers = list(self._subscribers.values())
+        # Deliver outside the lock; every subscriber gets the same encoded bytes
+        for deliver in subscribers:
+            try:
+                deliver(event)
+            except Exception as e:
+                logger.error(f"Price stream delivery failed: {e}")
+        return event
+
+    def _run(self) -> None:
+        logger.info("Price stream ingestion started")
+        while True:
+            with self._lock:
+                if not self._subscribers or self._stop.is_set():
+                    self._thread = None
+                    logger.info("Price stream ingestion stopped")
+                    return
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"Price stream poll failed: {e}")
+            self._stop.wait(self.interval)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'running': self._thread is not None,
+                'polls': self.polls,
+                'updates': self.updates,
+                'resyncs': self.resyncs,
+                'version': self._version
+            }
+
+
+class Subscription:
+    """
+    One blocking SSE client (WSGI): iterating yields encoded events, with a
+    heartbeat comment when nothing happened for `heartbeat` seconds.
+    """
+    def __init__(self, broadcaster: PriceBroadcaster, max_pending: int = 16, heartbeat: float = 15.0):
+        self.broadcaster = broadcaster
+        self.heartbeat = heartbeat
+        self.queue: "queue.Queue[bytes]" = queue.Queue(maxsize=max_pending)
+        # The snapshot is held apart from the queue: the ingestion thread may deliver
+        # (and fill the queue) before subscribe() even returns
+        self.id, self.snapshot = broadcaster.subscribe(self._deliver)
+
+    def _deliver(self, event: bytes) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # Slow client: drop the backlog and resync it with one full snapshot
+            while True:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            self.broadcaster.count_resync()
+            self.queue.put_nowait(self.broadcaster.snapshot_event())
+
+    def __iter__(self) -> Iterator[bytes]:
+        try:
+            yield self.snapshot
+            while True:
+                try:
+                    yield self.queue.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield HEARTBEAT
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self.broadcaster.unsubscribe(self.id)
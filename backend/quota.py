@@ -0,0 +1,235 @@
+"""
+Upstream Quotas
+---------------
+Shared rate budgets and circuit breakers for the APIs the backend calls
+(CoinGecko, Reddit, RSS feeds).
+
+- Every upstream gets a token bucket sized to its published limit (e.g. CoinGecko's
+  calls per minute). Callers take a token *before* sending a request, so all
+  workers share one budget instead of each discovering the limit through a 429.
+- If the next token is further away than the caller is willing to wait, the call
+  is refused immediately and the caller falls back to cached data.
+- A circuit breaker per upstream opens after consecutive failures. While it is
+  open calls fail fast (no timeouts, no retries); after reset_timeout one probe
+  request is let through to see if the upstream has recovered.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at rate_per_minute, holding at most burst tokens.
+    Tokens may go negative: that is a reservation by a caller already waiting for it.
+    """
+    def __init__(self, rate_per_minute: float, burst: Optional[int] = None):
+        self.rate = rate_per_minute / 60.0
+        self.burst = float(burst if burst is not None else max(1, int(rate_per_minute // 6)))
+        self.tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, max_wait: float = 0.0) -> Optional[float]:
+        """
+        Takes one token.
+        Returns:
+            float: Seconds the caller must wait before sending (0 if a token was free),
+            or None if that would exceed max_wait (nothing is taken in that case).
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            wait = (1 - self.tokens) / self.rate if self.rate > 0 else float('inf')
+            if wait > max_wait:
+                return None
+            self.tokens -= 1
+            return wait
+
+    def penalize(self, seconds: float) -> None:
+        """Holds back the next token for at least `seconds` (e.g. a 429 Retry-After)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self.tokens
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after failure_threshold consecutive failures; open -> half-open
+    after reset_timeout, where a single probe decides between closed and open.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probing = False
+            # Half-open: let exactly one probe through
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def release_probe(self) -> None:
+        """Gives back a half-open probe slot that was granted but not used."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"Circuit opened after {self.failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+class QuotaManager:
+    """
+    Per-upstream token buckets and circuit breakers, shared by every worker thread.
+    Upstreams are named (e.g. 'coingecko'); URLs map to a name through their host,
+    and unknown hosts get their own budget with the default limit.
+    """
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Tuple[float, Optional[int]]]] = None,
+        hosts: Optional[Dict[str, str]] = None,
+        default_limit: Tuple[float, Optional[int]] = (30, None),
+        max_wait: float = 2.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0
+    ):
+        self.limits = dict(limits or {})
+        self.hosts = dict(hosts or {})
+        self.default_limit = default_limit
+        self.max_wait = max_wait
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._rejected: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def upstream_for(self, url: str) -> str:
+        host = urlsplit(url).hostname or url
+        return self.hosts.get(host, host)
+
+    def _get(self, upstream: str) -> Tuple[TokenBucket, CircuitBreaker]:
+        with self._lock:
+            if upstream not in self._buckets:
+                rate, burst = self.limits.get(upstream, self.default_limit)
+                self._buckets[upstream] = TokenBucket(rate, burst)
+                self._breakers[upstream] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self._rejected[upstream] = 0
+            return self._buckets[upstream], self._breakers[upstream]
+
+    def admit(self, upstream: str, max_wait: Optional[float] = None) -> Tuple[Optional[str], float]:
+        """
+        Asks to send one request to an upstream.
+        Returns:
+            tuple: (error, wait). error is None if admitted; the caller then sleeps
+            `wait` seconds (time.sleep or asyncio.sleep) before sending.
+        """
+        bucket, breaker = self._get(upstream)
+        if not breaker.allow():
+            self._reject(upstream)
+            return f"{upstream} unavailable (circuit open)", 0.0
+        wait = bucket.reserve(self.max_wait if max_wait is None else max_wait)
+        if wait is None:
+            # A probe that never got sent must not leave the breaker stuck half-open
+            breaker.release_probe()
+            self._reject(upstream)
+            return f"{upstream} rate limit budget exhausted", 0.0
+        return None, wait
+
+    def acquire(self, upstream: str, max_wait: Optional[float] = None) -> Optional[str]:
+        """Blocking admit(): waits for the token. Returns an error message if refused."""
+        error, wait = self.admit(upstream, max_wait)
+        if error is None and wait > 0:
+            time.sleep(wait)
+        return error
+
+    def _reject(self, upstream: str) -> None:
+        with self._lock:
+            self._rejected[upstream] += 1
+
+    def record_success(self, upstream: str) -> None:
+        self._get(upstream)[1].record_success()
+
+    def record_failure(self, upstream: str) -> None:
+        self._get(upstream)[1].record_failure()
+
+    def throttle(self, upstream: str, seconds: float) -> None:
+        """
+        The upstream said to slow down (HTTP 429): hold the shared budget back.
+        A 429 says nothing about whether the upstream recovered, so a half-open
+        probe that got one is given back instead of deciding the breaker's state.
+        """
+        bucket, breaker = self._get(upstream)
+        bucket.penalize(seconds)
+        breaker.release_probe()
+
+    def is_open(self, upstream: str) -> bool:
+        return self._get(upstream)[1].state == CircuitBreaker.OPEN
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            upstreams = list(self._buckets)
+        stats = {}
+        for upstream in upstreams:
+            bucket, breaker = self._get(upstream)
+            stats[upstream] = {
+                'state': breaker.state,
+                'failures': breaker.failures,
+                'tokens': round(bucket.available(), 2),
+                'rate_per_minute': bucket.rate * 60,
+                'rejected': self._rejected[upstream]
+            }
+        return stats
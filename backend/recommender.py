@@ -0,0 +1,201 @@
+"""
+Recommendation Engine
+---------------------
+Buy/Hold/Sell table for every tracked coin, computed in one pass.
+
+The inputs for all coins arrive together (current prices and 24h changes from one
+CoinGecko call, 24h-ago closes from the price store, the cached /sentiment payload,
+the indicator engine) and are laid out as columns: one NumPy array per signal, one
+element per coin. A rule set then decides every coin at once with array comparisons,
+so adding coins adds array elements, not requests or Python-level branches.
+
+Columns:
+- price_delta: (current - previous) / previous
+- sentiment: mean of the coin's Reddit/CoinDesk/CoinTelegraph averages (0 without any)
+- momentum: price_delta / momentum_scale, clipped to [-1, 1]
+- signal: sentiment and momentum averaged with the rule set's weights
+- indicator columns from the indicator engine (rsi_14, macd_histogram, bb_percent_b, ...)
+
+A rule set is an ordered list of rules; a rule is an action plus conditions
+[column, operator, threshold]. The first rule whose conditions all hold decides a
+coin, and coins no rule matches get the default action. Missing inputs are NaN and
+every comparison with NaN is false, so a coin without a price delta gets the default.
+
+Rule sets: 'classic' (the original thresholds), 'weighted' and 'technical' are built
+in; RECOMMENDATION_RULES_FILE adds more (or replaces built-ins) from a JSON list, e.g.
+  [{"name": "cautious", "momentum_scale": 0.1, "default": "Hold",
+    "rules": [{"action": "Buy", "when": [["signal", ">", 0.5], ["rsi_14", "<", 60]]}]}]
+RECOMMENDATION_RULES names the rule set used when a request doesn't pick one.
+"""
+import json
+import logging
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from indicators import FIELDS as INDICATOR_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Per-coin blocks of the /sentiment payload that feed the sentiment column
+SENTIMENT_SOURCES = ('reddit_sentiment', 'coindesk_sentiment', 'cointelegraph_sentiment')
+
+COLUMNS = ('price_delta', 'sentiment', 'momentum', 'signal') + tuple(INDICATOR_FIELDS)
+
+OPERATORS = {'>': np.greater, '>=': np.greater_equal, '<': np.less, '<=': np.less_equal}
+
+# column, operator, threshold
+Condition = Tuple[str, str, float]
+
+
+class Rule(NamedTuple):
+    action: str                   # e.g. 'Buy'
+    when: List[Condition]         # All must hold
+    reason: Optional[str] = None  # Shown with the recommendation
+
+
+class RuleSet(NamedTuple):
+    name: str
+    rules: List[Rule]             # First match wins
+    default: str = 'Hold'
+    sentiment_weight: float = 1.0
+    momentum_weight: float = 1.0
+    momentum_scale: float = 0.05  # A 5% move is full momentum
+
+
+BUILTIN_RULE_SETS: Dict[str, RuleSet] = {rule_set.name: rule_set for rule_set in [
+    RuleSet('classic', [
+        Rule('Buy', [('sentiment', '>', 0.5), ('price_delta', '>', 0.0)], 'Strongly positive sentiment and rising price'),
+        Rule('Sell', [('sentiment', '<', -0.5), ('price_delta', '<', 0.0)], 'Strongly negative sentiment and falling price'),
+    ]),
+    RuleSet('weighted', [
+        Rule('Buy', [('signal', '>', 0.3)], 'Sentiment-weighted signal is positive'),
+        Rule('Sell', [('signal', '<', -0.3)], 'Sentiment-weighted signal is negative'),
+    ]),
+    RuleSet('technical', [
+        Rule('Buy', [('signal', '>', 0.2), ('rsi_14', '<', 70.0), ('macd_histogram', '>', 0.0)],
+             'Positive signal with upward MACD momentum, not overbought'),
+        Rule('Sell', [('signal', '<', -0.2), ('rsi_14', '>', 30.0), ('macd_histogram', '<', 0.0)],
+             'Negative signal with downward MACD momentum, not oversold'),
+    ]),
+]}
+
+
+def rule_set_from_config(entry: Dict[str, Any]) -> RuleSet:
+    """Builds a RuleSet from a config object, rejecting unknown columns and operators."""
+    rules = []
+    for rule in entry.get('rules', []):
+        conditions = []
+        for column, op, threshold in rule['when']:
+            if column not in COLUMNS:
+                raise ValueError(f"Rule set {entry['name']}: unknown column {column!r}")
+            if op not in OPERATORS:
+                raise ValueError(f"Rule set {entry['name']}: unknown operator {op!r}")
+            conditions.append((column, op, float(threshold)))
+        rules.append(Rule(rule['action'], conditions, rule.get('reason')))
+    return RuleSet(
+        name=entry['name'],
+        rules=rules,
+        default=entry.get('default', 'Hold'),
+        sentiment_weight=float(entry.get('sentiment_weight', 1.0)),
+        momentum_weight=float(entry.get('momentum_weight', 1.0)),
+        momentum_scale=float(entry.get('momentum_scale', 0.05))
+    )
+
+
+def load_rule_sets() -> Dict[str, RuleSet]:
+    """Built-in rule sets plus those in RECOMMENDATION_RULES_FILE (which win on name clashes)."""
+    rule_sets = dict(BUILTIN_RULE_SETS)
+    path = os.getenv('RECOMMENDATION_RULES_FILE')
+    if path:
+        with open(path) as f:
+            entries = json.load(f)
+        for entry in entries:
+            rule_sets[entry['name']] = rule_set_from_config(entry)
+        logger.info(f"Loaded {len(entries)} recommendation rule sets from {path}")
+    return rule_sets
+
+
+def _column(values: List[Optional[float]]) -> np.ndarray:
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def _value(x: float) -> Optional[float]:
+    return None if np.isnan(x) else float(x)
+
+
+def sentiment_column(sentiment_data: Dict[str, Any], symbols: List[str]) -> np.ndarray:
+    """Mean source sentiment per coin as one (coins x sources) matrix reduction; 0 where no source has data."""
+    matrix = _column([
+        sentiment_data.get(symbol, {}).get(source, {}).get('average')
+        for symbol in symbols for source in SENTIMENT_SOURCES
+    ]).reshape(len(symbols), len(SENTIMENT_SOURCES))
+    present = ~np.isnan(matrix)
+    counts = present.sum(axis=1)
+    totals = np.where(present, matrix, 0.0).sum(axis=1)
+    return np.divide(totals, counts, out=np.zeros(len(symbols)), where=counts > 0)
+
+
+def build_columns(rule_set: RuleSet, current: np.ndarray, previous: np.ndarray, sentiment: np.ndarray,
+                  indicators: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Every column a rule can test, one element per coin."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delta = (current - previous) / previous
+    delta[~np.isfinite(delta)] = np.nan
+    momentum = np.clip(delta / rule_set.momentum_scale, -1.0, 1.0)
+    weights = rule_set.sentiment_weight + rule_set.momentum_weight
+    signal = (rule_set.sentiment_weight * sentiment + rule_set.momentum_weight * momentum) / (weights or 1.0)
+    return {'price_delta': delta, 'sentiment': sentiment, 'momentum': momentum, 'signal': signal, **indicators}
+
+
+def decide(rule_set: RuleSet, columns: Dict[str, np.ndarray], n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Actions and the index of the deciding rule (-1 for the default) for all coins at once."""
+    actions = np.full(n, rule_set.default, dtype=object)
+    matched = np.full(n, -1)
+    for i, rule in enumerate(rule_set.rules):
+        mask = matched < 0
+        for column, op, threshold in rule.when:
+            mask &= OPERATORS[op](columns[column], threshold)
+        actions[mask] = rule.action
+        matched[mask] = i
+    return actions, matched
+
+
+def recommend(rule_set: RuleSet, symbols: List[str], current: Dict[str, Optional[float]],
+              previous: Dict[str, Optional[float]], sentiment_data: Dict[str, Any],
+              indicators: Dict[str, Optional[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Builds the /recommendation table.
+    Args:
+        rule_set: Rules deciding each coin
+        symbols: Coins to include, in output order
+        current: symbol -> current price (None if unknown)
+        previous: symbol -> price 24h ago (None if unknown)
+        sentiment_data: The /sentiment payload
+        indicators: symbol -> latest indicator values from the indicator engine (or None)
+    Returns:
+        symbol -> recommendation, reason, signal, sentiment, price_delta, prices and indicators
+    """
+    current_prices = _column([current.get(s) for s in symbols])
+    previous_prices = _column([previous.get(s) for s in symbols])
+    indicator_columns = {
+        field: _column([(indicators.get(s) or {}).get(field) for s in symbols]) for field in INDICATOR_FIELDS
+    }
+    columns = build_columns(rule_set, current_prices, previous_prices,
+                            sentiment_column(sentiment_data, symbols), indicator_columns)
+    actions, matched = decide(rule_set, columns, len(symbols))
+
+    return {
+        symbol: {
+            "recommendation": actions[i],
+            "reason": rule_set.rules[matched[i]].reason if matched[i] >= 0 else None,
+            "signal": _value(columns['signal'][i]),
+            "sentiment": float(columns['sentiment'][i]),
+            "price_delta": _value(columns['price_delta'][i]),
+            "current_price": current.get(symbol),
+            "previous_price": previous.get(symbol),
+            "indicators": indicators.get(symbol)
+        }
+        for i, symbol in enumerate(symbols)
+    }
@@ -0,0 +1,126 @@
+"""
+Encoded Responses
+-----------------
+Pre-encoded JSON bodies for the hot read endpoints (/price, /predict, /historical,
+/sentiment, /recommendation), cached next to the Python value in APICache.
+
+An EncodedBody is built once per cached value: the JSON bytes, their ETag and,
+for bodies over MIN_COMPRESS_BYTES, gzip and brotli variants. Each variant has
+its own strong ETag ("<hash>", "<hash>-gzip", "<hash>-br"), as RFC 9110 requires
+for different content codings of one resource. A request is then a dictionary
+lookup plus a header check:
+- If-None-Match matching the ETag of any variant answers 304 with no body,
+- otherwise the smallest variant the client accepts is sent as-is.
+
+JSON is encoded with orjson when it is installed (several times faster than the
+stdlib encoder on float-heavy payloads, and it handles numpy scalars); brotli is
+used when the brotli package is installed. Both are optional.
+"""
+import gzip
+import hashlib
+import json
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import orjson  # Optional: faster JSON encoding
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import brotli  # Optional: br content encoding
+except ImportError:
+    brotli = None
+
+# Smaller bodies go out uncompressed: headers alone outweigh the savings
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def dumps(value: Any) -> bytes:
+    """Encodes a value as compact UTF-8 JSON."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            pass  # Types orjson doesn't know (or ints beyond 64 bits): fall back to the stdlib
+    return json.dumps(value, separators=(',', ':'), default=str).encode('utf-8')
+
+
+class EncodedBody:
+    """
+    A JSON body with its ETag and compressed variants.
+    Args:
+        body: Encoded JSON
+    """
+    __slots__ = ('body', 'etag', 'variants')
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        # Content-Encoding -> bytes, only where compression actually helps
+        self.variants: Dict[str, bytes] = {}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            if brotli is not None:
+                self.variants['br'] = brotli.compress(body, quality=BROTLI_QUALITY)
+            self.variants['gzip'] = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(variant) for variant in self.variants.values())
+
+    def etag_for(self, content_encoding: Optional[str]) -> str:
+        """ETag of the variant sent with a Content-Encoding (None for the identity body)."""
+        if content_encoding is None:
+            return self.etag
+        return self.etag[:-1] + '-' + content_encoding + '"'
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """True if If-None-Match names any variant: they all carry the same JSON."""
+        return any(etag_matches(if_none_match, self.etag_for(encoding))
+                   for encoding in (None, *self.variants))
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """Returns (body, Content-Encoding) for an Accept-Encoding header, preferring br over gzip."""
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and encoding in accepted:
+                return self.variants[encoding], encoding
+        return self.body, None
+
+
+def encode_json(value: Any, render: Optional[Callable[[Any], bytes]] = None) -> EncodedBody:
+    """Builds the EncodedBody for a value (render turns it into bytes, dumps by default)."""
+    return EncodedBody((render or dumps)(value))
+
+
+def accepted_encodings(header: Optional[str]) -> set:
+    """Content codings a client accepts (q > 0) from its Accept-Encoding header."""
+    accepted = set()
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted.add(coding)
+    if '*' in accepted:
+        accepted.update(('br', 'gzip'))
+    return accepted
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in if_none_match.split(','))
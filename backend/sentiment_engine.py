@@ -0,0 +1,459 @@
+"""
+Sentiment Engine
+----------------
+Batched, memoized replacement for calling TextBlob(text).sentiment.polarity once
+per headline.
+
+- Scores are cached by a hash of the headline text, so a headline is scored once
+  no matter how many refreshes or coins it shows up in.
+- Headlines that do need scoring are tokenized, mapped to integer ids and scored
+  together: TextBlob's pattern lexicon is compiled into lookup arrays indexed by
+  token id, and its left-to-right rules (negation, intensifying adverbs,
+  exclamation marks) are evaluated as prefix scans over the whole
+  (headlines x tokens) matrix instead of a Python loop per word.
+- Very large batches (archive backfills) are split into chunks and scored on a
+  ScoringPool of worker processes, streaming results back in input order.
+
+Accuracy: polarity matches TextBlob's PatternAnalyzer to within POLARITY_TOLERANCE
+(1e-9) for text made of words and punctuation. Emoticons (":-)") and the "(!)"
+irony marker are not scored, so text containing them may differ.
+"""
+import hashlib
+import itertools
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Maximum |engine - TextBlob| polarity difference for text without emoticons
+POLARITY_TOLERANCE = 1e-9
+
+# Same constants as pattern's Sentiment (textblob/_text.py)
+NEGATIONS = ('no', 'not', "n't", 'never')
+# Without '.': pattern never splits leading periods off a word
+PUNCTUATION = ",;:!?()[]{}`''\"@#$^&*+-|=~_"
+PUNCTUATION_CHARS = tuple(PUNCTUATION)
+TRAILING = PUNCTUATION_CHARS + ('.',)
+ABBREVIATIONS = frozenset((
+    "a.", "adj.", "adv.", "al.", "a.m.", "c.", "cf.", "comp.", "conf.", "def.",
+    "ed.", "e.g.", "esp.", "etc.", "ex.", "f.", "fig.", "gen.", "id.", "i.e.",
+    "int.", "l.", "m.", "Med.", "Mil.", "Mr.", "n.", "n.q.", "orig.", "pl.",
+    "pred.", "pres.", "p.m.", "ref.", "v.", "vs.", "w/"
+))
+RE_ABBR1 = re.compile(r"^[A-Za-z]\.$")        # single letter, "T. De Smedt"
+RE_ABBR2 = re.compile(r"^([A-Za-z]\.)+$")     # alternating letters, "U.S."
+RE_ABBR3 = re.compile(r"^[A-Z][b|c|d|f|g|h|j|k|l|m|n|p|q|r|s|t|v|w|x|z]+.$")  # capital + consonants, "Mr."
+QUOTES = ("“", "”", "‘", "’", "'", '"')
+EXCLAMATION_BOOST = 1.25
+NEGATION_FACTOR = -0.5
+
+
+def _is_abbreviation(token: str) -> bool:
+    return (
+        token in ABBREVIATIONS
+        or RE_ABBR1.match(token) is not None
+        or RE_ABBR2.match(token) is not None
+        or RE_ABBR3.match(token) is not None
+    )
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text into the lowercase tokens TextBlob's tokenizer would produce.
+    Punctuation other than '!' and '...' is dropped: it never affects polarity.
+    """
+    text = text.replace("n't", " n't")
+    for quote in QUOTES:
+        text = text.replace(quote, ' ')
+    tokens: List[str] = []
+    for chunk in text.split():
+        # Leading punctuation except '.' is split off
+        rest = chunk.lstrip(PUNCTUATION)
+        tokens.extend('!' * chunk[:len(chunk) - len(rest)].count('!'))
+        # Trailing punctuation, ellipses and periods too, unless the word is an abbreviation
+        tail: List[str] = []
+        while rest.endswith(TRAILING):
+            if rest.endswith(PUNCTUATION_CHARS):
+                tail.append(rest[-1])
+                rest = rest[:-1]
+            if rest.endswith('...'):
+                tail.append('...')
+                rest = rest[:-3].rstrip('.')
+            if rest.endswith('.'):
+                if _is_abbreviation(rest):
+                    break
+                rest = rest[:-1]
+        if rest:
+            tokens.append(rest.lower())
+        tokens.extend(t for t in reversed(tail) if t in ('!', '...'))
+    return tokens
+
+
+class LexiconArrays(NamedTuple):
+    """The per-token-id arrays of a Lexicon as they were when a batch was encoded."""
+    known: np.ndarray
+    polarity: np.ndarray
+    intensity: np.ndarray
+    modifier: np.ndarray
+    negation: np.ndarray
+    breaks_negation: np.ndarray
+    breaks_modifier: np.ndarray
+    exclamation: np.ndarray
+    ly: np.ndarray
+
+
+class Lexicon:
+    """
+    TextBlob's sentiment lexicon compiled into per-token-id arrays.
+    Token ids are assigned on first sight; unknown tokens get an id too so that
+    their length-based rules (short words don't break a negation) are precomputed.
+    """
+    def __init__(self, words: Optional[Dict[str, Sequence[float]]] = None, modifiers: Iterable[str] = (),
+                 max_tokens: int = 500_000):
+        if words is None:
+            words, modifiers = self._textblob_lexicon()
+        self._words = dict(words)
+        self._modifiers = set(modifiers)
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+        self._reset()
+
+    @staticmethod
+    def _textblob_lexicon():
+        from textblob.en import sentiment as pattern_sentiment
+        entries = dict(pattern_sentiment.items())  # Triggers the lazy XML load
+        # Untagged text is looked up with pos=None: the average over all senses
+        words = {w: tuple(tags[None]) for w, tags in entries.items() if None in tags}
+        modifiers = [w for w, tags in entries.items() if 'RB' in tags]
+        return words, modifiers
+
+    def _reset(self) -> None:
+        # Fresh dict and arrays rather than clearing in place: snapshots handed out
+        # by encode() keep the old ones and stay valid for their ids
+        self.ids: Dict[str, int] = {'': 0}  # Id 0 pads rows and is inert
+        size = len(self._words) + 1024
+        self.known = np.zeros(size, dtype=bool)
+        self.polarity = np.zeros(size)
+        self.intensity = np.ones(size)
+        self.modifier = np.zeros(size, dtype=bool)
+        self.negation = np.zeros(size, dtype=bool)
+        self.breaks_negation = np.zeros(size, dtype=bool)
+        self.breaks_modifier = np.zeros(size, dtype=bool)
+        self.exclamation = np.zeros(size, dtype=bool)
+        self.ly = np.zeros(size, dtype=bool)
+        for word in self._words:
+            self._add(word)
+
+    def _grow(self) -> None:
+        for name in LexiconArrays._fields:
+            array = getattr(self, name)
+            grown = np.ones(len(array) * 2) if name == 'intensity' else np.zeros(len(array) * 2, dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    def _add(self, token: str) -> int:
+        i = len(self.ids)
+        if i >= len(self.known):
+            self._grow()
+        self.ids[token] = i
+        entry = self._words.get(token)
+        if entry is not None:
+            self.known[i] = True
+            self.polarity[i] = entry[0]
+            self.intensity[i] = entry[2]
+            self.modifier[i] = token in self._modifiers
+        self.negation[i] = token in NEGATIONS
+        self.breaks_negation[i] = len(token.strip("'")) > 1
+        self.breaks_modifier[i] = len(token) > 2
+        self.exclamation[i] = token == '!'
+        self.ly[i] = token.endswith('ly')
+        return i
+
+    def encode(self, token_lists: List[List[str]]) -> Tuple[np.ndarray, LexiconArrays]:
+        """
+        Maps tokenized texts to a (texts x max_len) id matrix padded with 0.
+        Returns:
+            tuple: the id matrix and the arrays its ids index into
+        """
+        with self._lock:
+            if len(self.ids) > self.max_tokens:
+                # Vocabulary of unseen words grew unbounded: start over from the lexicon
+                self._reset()
+            width = max((len(tokens) for tokens in token_lists), default=0)
+            matrix = np.zeros((len(token_lists), max(width, 1)), dtype=np.int64)
+            for row, tokens in enumerate(token_lists):
+                matrix[row, :len(tokens)] = [self.ids.get(t) or self._add(t) for t in tokens]
+            # Why: another thread's encode() may grow or reset the lexicon while this
+            # batch is scored. Both swap in new arrays and _add() only writes ids past
+            # this matrix, so the arrays captured here keep matching its ids.
+            return matrix, LexiconArrays(*(getattr(self, name) for name in LexiconArrays._fields))
+
+
+def _last_before(mask: np.ndarray, inclusive: bool = False) -> np.ndarray:
+    """Per row, the last column <= j (inclusive) or < j where mask is set, else -1."""
+    positions = np.where(mask, np.arange(mask.shape[1]), -1)
+    last = np.maximum.accumulate(positions, axis=1)
+    if inclusive:
+        return last
+    shifted = np.full_like(last, -1)
+    shifted[:, 1:] = last[:, :-1]
+    return shifted
+
+
+def _next_after(mask: np.ndarray) -> np.ndarray:
+    """Per row, the first column > j where mask is set, else the row width."""
+    width = mask.shape[1]
+    positions = np.where(mask, np.arange(width), width)
+    first = np.minimum.accumulate(positions[:, ::-1], axis=1)[:, ::-1]
+    shifted = np.full_like(first, width)
+    shifted[:, :-1] = first[:, 1:]
+    return shifted
+
+
+def score_matrix(ids: np.ndarray, lexicon: LexiconArrays) -> np.ndarray:
+    """
+    Vectorized port of pattern's Sentiment.assessments() + average for a batch.
+    Args:
+        ids (ndarray): (texts x tokens) token ids from Lexicon.encode
+        lexicon (LexiconArrays): the arrays Lexicon.encode returned with the ids
+    Returns:
+        ndarray: polarity per text
+    """
+    known = lexicon.known[ids]
+    if not known.any():
+        return np.zeros(ids.shape[0])
+    rows = np.arange(ids.shape[0])[:, None]
+    negation = lexicon.negation[ids]
+    is_modifier = known & lexicon.modifier[ids]
+    last_modifier = _last_before(is_modifier)
+
+    # A negation right after an "-ly" adverb ("really not good") negates the adverb's
+    # assessment instead of the next word, and doesn't end the adverb's scope
+    after_ly = (last_modifier >= 0) & lexicon.ly[ids[rows, np.maximum(last_modifier, 0)]]
+    ly_negation = negation & ~known & after_ly
+
+    # A known adverb ("very") merges into the next known word's assessment unless
+    # a known word or an unknown word longer than 2 chars comes in between
+    modifier_breaks = (known & ~is_modifier) | (~known & lexicon.breaks_modifier[ids] & ~ly_negation)
+    modifier_active = last_modifier > _last_before(modifier_breaks)
+    modified = known & modifier_active
+    negates_modifier = ly_negation & modifier_active
+
+    # A negation applies to the next known word unless a known word or a longer
+    # unknown word comes in between ("not a good" still negates)
+    negation_set = negation & ~negates_modifier
+    negation_breaks = (~negation & (known | lexicon.breaks_negation[ids])) | negates_modifier
+    negated = known & (_last_before(negation_set) > _last_before(negation_breaks))
+
+    # Merged word: polarity scaled by the modifier's intensity (inverted if the modifier was negated)
+    intensity = lexicon.intensity[ids]
+    effective_intensity = np.where(negated, 1.0 / intensity, intensity)
+    previous_known = np.maximum(_last_before(known), 0)
+    polarity = np.where(
+        modified,
+        np.clip(lexicon.polarity[ids] * effective_intensity[rows, previous_known], -1.0, 1.0),
+        lexicon.polarity[ids]
+    )
+
+    # A chain ("not very good") is negated if any of its words was
+    chain_start = _last_before(known & ~modified, inclusive=True)
+    # (a negation after an "-ly" adverb lands between its chain's words)
+    width = ids.shape[1]
+    next_known = _next_after(known)
+    last_negation = _last_before(negated | negates_modifier, inclusive=True)
+    chain_negated = known & (last_negation[rows, next_known - 1] >= chain_start)
+
+    # An assessment is replaced when the next known word merges into it
+    padded_modified = np.concatenate([modified, np.zeros((ids.shape[0], 1), dtype=bool)], axis=1)
+    superseded = padded_modified[rows, next_known]
+
+    # Each '!' before the next known word boosts the current assessment
+    exclamations = np.cumsum(lexicon.exclamation[ids], axis=1)
+    boosts = exclamations[rows, np.minimum(next_known, width) - 1] - exclamations
+    polarity = np.clip(polarity * EXCLAMATION_BOOST ** boosts, -1.0, 1.0)
+
+    polarity = np.where(chain_negated, polarity * NEGATION_FACTOR, polarity)
+    kept = known & ~superseded
+    counts = kept.sum(axis=1)
+    return np.where(kept, polarity, 0.0).sum(axis=1) / np.maximum(counts, 1)
+
+
+def score_texts(texts: Sequence[str], lexicon: Lexicon, batch_size: int = 4096) -> List[float]:
+    """Scores texts without caching, in batches so the padded id matrix stays small."""
+    scores: List[float] = []
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start:start + batch_size]
+        ids, arrays = lexicon.encode([tokenize(text) for text in batch])
+        scores.extend(score_matrix(ids, arrays).tolist())
+    return scores
+
+
+# Each pool worker process compiles its own lexicon once, in the initializer
+_worker_lexicon: Optional[Lexicon] = None
+
+
+def _init_worker() -> None:
+    global _worker_lexicon
+    _worker_lexicon = Lexicon()
+
+
+def _score_chunk(texts: List[str]) -> List[float]:
+    return score_texts(texts, _worker_lexicon)
+
+
+class ScoringPool:
+    """
+    Process pool for scoring far more headlines than one core keeps up with.
+    Input is cut into chunks; at most workers * 2 chunks are in flight, so an
+    arbitrarily long input streams through with bounded memory.
+    """
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 2000):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.last_run: Dict[str, Any] = {}
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+            return self._executor
+
+    def score_stream(self, texts: Iterable[str],
+                     progress: Optional[Callable[[int, float], None]] = None) -> Iterator[float]:
+        """
+        Yields the polarity of each text, in input order, as chunks complete.
+        Args:
+            texts: Any iterable of strings (e.g. lines of an archive file)
+            progress: Optional callback(scored, seconds) called after each chunk
+        """
+        started = time.perf_counter()
+        scored = 0
+        pending: Deque[Future] = deque()
+        iterator = iter(texts)
+        while True:
+            chunk = list(itertools.islice(iterator, self.chunk_size))
+            if not chunk:
+                break
+            pending.append(self.executor.submit(_score_chunk, chunk))
+            if len(pending) >= self.workers * 2:
+                scored += yield from self._drain_one(pending)
+                self._report(scored, started, progress)
+        while pending:
+            scored += yield from self._drain_one(pending)
+            self._report(scored, started, progress)
+        if not scored:
+            self._report(0, started, None)
+
+    @staticmethod
+    def _drain_one(pending: Deque[Future]):
+        scores = pending.popleft().result()
+        yield from scores
+        return len(scores)
+
+    def _report(self, scored: int, started: float, progress: Optional[Callable[[int, float], None]]) -> None:
+        seconds = time.perf_counter() - started
+        self.last_run = {
+            'texts': scored,
+            'seconds': round(seconds, 3),
+            'per_minute': round(scored / seconds * 60) if seconds > 0 else None,
+            'workers': self.workers
+        }
+        if progress is not None:
+            progress(scored, seconds)
+
+    def score(self, texts: Sequence[str]) -> List[float]:
+        scores = list(self.score_stream(texts))
+        logger.info(f"Scored {self.last_run['texts']} headlines on {self.workers} processes "
+                    f"in {self.last_run['seconds']}s ({self.last_run['per_minute']}/min)")
+        return scores
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+class SentimentEngine:
+    """
+    Polarity scorer with a content-hash keyed LRU cache and batch scoring of misses.
+    With a ScoringPool, batches of at least pool_threshold uncached headlines are
+    scored on the pool instead of in-process.
+    """
+    def __init__(self, lexicon: Optional[Lexicon] = None, max_entries: int = 50_000,
+                 pool: Optional[ScoringPool] = None, pool_threshold: int = 5000):
+        self._lexicon = lexicon
+        self.max_entries = max_entries
+        self.pool = pool
+        self.pool_threshold = pool_threshold
+        self._scores: "OrderedDict[bytes, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._lexicon_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def lexicon(self) -> Lexicon:
+        # Compiled on first use so importing the app doesn't parse the lexicon XML
+        if self._lexicon is None:
+            with self._lexicon_lock:
+                if self._lexicon is None:
+                    self._lexicon = Lexicon()
+        return self._lexicon
+
+    @staticmethod
+    def _key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+    def score_many(self, texts: Sequence[str]) -> List[float]:
+        """
+        Polarity for each text, -1 (negative) to +1 (positive).
+        Cached texts are looked up; the rest are scored in one batch and cached.
+        """
+        keys = [self._key(text) for text in texts]
+        scores: List[Optional[float]] = [None] * len(texts)
+        missing: Dict[bytes, List[int]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                score = self._scores.get(key)
+                if score is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    self._scores.move_to_end(key)
+                    scores[i] = score
+            self.hits += len(texts) - sum(len(v) for v in missing.values())
+            self.misses += len(missing)
+
+        if missing:
+            batch = [texts[positions[0]] for positions in missing.values()]
+            if self.pool is not None and len(batch) >= self.pool_threshold:
+                batch_scores = self.pool.score(batch)
+            else:
+                batch_scores = score_texts(batch, self.lexicon)
+            with self._lock:
+                for (key, positions), score in zip(missing.items(), batch_scores):
+                    for i in positions:
+                        scores[i] = score
+                    self._scores[key] = score
+                    self._scores.move_to_end(key)
+                while len(self._scores) > self.max_entries:
+                    self._scores.popitem(last=False)
+        return scores  # type: ignore[return-value]
+
+    def score(self, text: str) -> float:
+        return self.score_many([text])[0]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._scores), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,117 @@
+"""
+Symbol Registry
+---------------
+Single source of truth for which coins the backend tracks.
+
+Each coin maps its display symbol (e.g. 'BTC') to the identifiers every upstream
+needs: the Yahoo Finance ticker, the CoinGecko id, the key used in /price
+responses, and an optional subreddit for sentiment.
+
+Configuration (first match wins):
+- CRYPTO_SYMBOLS_FILE: path to a JSON list of coin objects, e.g.
+  [{"symbol": "SOL", "yahoo": "SOL-USD", "coingecko_id": "solana", "subreddit": "solana"}]
+- CRYPTO_SYMBOLS: comma-separated symbols, e.g. "BTC,ETH,SOL". Known symbols use
+  the built-in table below; unknown ones get a "<SYMBOL>-USD" Yahoo ticker only.
+- Default: BTC and ETH.
+"""
+import json
+import logging
+import os
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Coin(NamedTuple):
+    symbol: str                   # Display symbol, e.g. 'BTC'
+    yahoo: str                    # Yahoo Finance ticker, e.g. 'BTC-USD'
+    coingecko_id: Optional[str]   # CoinGecko id, e.g. 'bitcoin'
+    name: str                     # Lowercase key used in /price, e.g. 'bitcoin'
+    subreddit: Optional[str]      # Subreddit for sentiment headlines, e.g. 'Bitcoin'
+
+
+# Built-in metadata for common coins so CRYPTO_SYMBOLS can stay a short list
+KNOWN_COINS: Dict[str, Coin] = {coin.symbol: coin for coin in [
+    Coin('BTC', 'BTC-USD', 'bitcoin', 'bitcoin', 'Bitcoin'),
+    Coin('ETH', 'ETH-USD', 'ethereum', 'ethereum', 'Ethereum'),
+    Coin('SOL', 'SOL-USD', 'solana', 'solana', 'solana'),
+    Coin('BNB', 'BNB-USD', 'binancecoin', 'binancecoin', 'bnbchainofficial'),
+    Coin('XRP', 'XRP-USD', 'ripple', 'ripple', 'XRP'),
+    Coin('ADA', 'ADA-USD', 'cardano', 'cardano', 'cardano'),
+    Coin('DOGE', 'DOGE-USD', 'dogecoin', 'dogecoin', 'dogecoin'),
+    Coin('AVAX', 'AVAX-USD', 'avalanche-2', 'avalanche', 'Avax'),
+    Coin('DOT', 'DOT-USD', 'polkadot', 'polkadot', 'Polkadot'),
+    Coin('LTC', 'LTC-USD', 'litecoin', 'litecoin', 'litecoin'),
+    Coin('LINK', 'LINK-USD', 'chainlink', 'chainlink', 'Chainlink'),
+    Coin('MATIC', 'MATIC-USD', 'matic-network', 'polygon', '0xPolygon'),
+]}
+
+DEFAULT_SYMBOLS = ['BTC', 'ETH']
+
+
+class SymbolRegistry:
+    """
+    Ordered collection of tracked coins.
+    Iterating yields Coin tuples in configuration order; lookups are by symbol.
+    """
+    def __init__(self, coins: List[Coin]):
+        if not coins:
+            raise ValueError("Symbol registry needs at least one coin")
+        self._coins: Dict[str, Coin] = {}
+        for coin in coins:
+            self._coins[coin.symbol] = coin
+
+    def __iter__(self) -> Iterator[Coin]:
+        return iter(self._coins.values())
+
+    def __len__(self) -> int:
+        return len(self._coins)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._coins
+
+    def get(self, symbol: str) -> Optional[Coin]:
+        return self._coins.get(symbol)
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._coins)
+
+    def yahoo_tickers(self) -> Dict[str, str]:
+        """symbol -> Yahoo ticker, in registry order."""
+        return {coin.symbol: coin.yahoo for coin in self}
+
+    def with_coingecko(self) -> List[Coin]:
+        """Coins that have a CoinGecko id."""
+        return [coin for coin in self if coin.coingecko_id]
+
+    def with_subreddit(self) -> List[Coin]:
+        """Coins that have a subreddit for sentiment."""
+        return [coin for coin in self if coin.subreddit]
+
+
+def coin_from_config(entry: Dict[str, Optional[str]]) -> Coin:
+    """Builds a Coin from a config object, filling gaps from KNOWN_COINS."""
+    symbol = str(entry['symbol']).upper()
+    known = KNOWN_COINS.get(symbol)
+    coingecko_id = entry.get('coingecko_id', known.coingecko_id if known else None)
+    return Coin(
+        symbol=symbol,
+        yahoo=entry.get('yahoo') or (known.yahoo if known else f"{symbol}-USD"),
+        coingecko_id=coingecko_id,
+        name=entry.get('name') or (known.name if known else (coingecko_id or symbol.lower())),
+        subreddit=entry.get('subreddit', known.subreddit if known else None)
+    )
+
+
+def load_symbol_registry() -> SymbolRegistry:
+    """Loads the registry from CRYPTO_SYMBOLS_FILE, CRYPTO_SYMBOLS, or the BTC/ETH default."""
+    path = os.getenv('CRYPTO_SYMBOLS_FILE')
+    if path:
+        with open(path) as f:
+            entries = json.load(f)
+        logger.info(f"Loaded {len(entries)} symbols from {path}")
+        return SymbolRegistry([coin_from_config(entry) for entry in entries])
+
+    symbols = [s.strip() for s in os.getenv('CRYPTO_SYMBOLS', ','.join(DEFAULT_SYMBOLS)).split(',') if s.strip()]
+    return SymbolRegistry([coin_from_config({'symbol': s}) for s in symbols])
@@ -1,5 +1,13 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from json import loads as json_loads
+
+import jwt
 import pytest
-from app import app
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app import app, APICache, APIRequestHandler, CacheRefresher, fetch_headline_sources
 
 @pytest.fixture
 def client():
@@ -50,17 +58,47 @@ def test_register_login_profile(client):
     profile = resp.get_json()
     assert profile["email"] == "testuser2@example.com"
 
-def test_register_duplicate(client):
+def test_register_duplicate(client, monkeypatch):
+    import app as app_module
     payload = {
         "email": "dupe@example.com",
         "username": "dupeuser",
         "password": "testpass123"
     }
     client.post('/auth/register', json=payload)
+    # Duplicates are rejected before the password is hashed
+    monkeypatch.setattr(app_module.password_hasher, 'hash', lambda password: pytest.fail("hashed a duplicate"))
     resp = client.post('/auth/register', json=payload)
     assert resp.status_code == 409
     assert "error" in resp.get_json()
 
+def test_logout_revokes_token(client):
+    payload = {"email": "logouttest@example.com", "username": "logouttest", "password": "testpass123"}
+    token = client.post('/auth/register', json=payload).get_json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get('/auth/profile', headers=headers).status_code == 200
+    assert client.get('/auth/profile', headers=headers).status_code == 200  # Served from the token cache
+    assert client.post('/auth/logout', headers=headers).status_code == 200
+    resp = client.get('/auth/profile', headers=headers)
+    assert resp.status_code == 401
+    assert resp.get_json() == {"error": "Invalid or expired token"}
+
+def test_logout_all_revokes_every_token_of_the_user(client):
+    payload = {"email": "logoutall@example.com", "username": "logoutall", "password": "testpass123"}
+    resp = client.post('/auth/register', json=payload).get_json()
+    user_id, token = resp["user"]["id"], resp["token"]
+    # A token from another device, issued a minute ago
+    now = datetime.utcnow()
+    older = jwt.encode({'user_id': user_id, 'iat': now - timedelta(minutes=1), 'exp': now + timedelta(days=1)},
+                       app.config['SECRET_KEY'], algorithm=app.config['JWT_ALGORITHM'])
+    assert client.get('/auth/profile', headers={"Authorization": f"Bearer {older}"}).status_code == 200
+    assert client.post('/auth/logout-all', headers={"Authorization": f"Bearer {token}"}).status_code == 200
+    for revoked in (token, older):
+        assert client.get('/auth/profile', headers={"Authorization": f"Bearer {revoked}"}).status_code == 401
+    # Logging back in right away (likely the same second) gives a working token
+    relogin = client.post('/auth/login', json=payload).get_json()["token"]
+    assert client.get('/auth/profile', headers={"Authorization": f"Bearer {relogin}"}).status_code == 200
+
 def test_login_invalid(client):
     payload = {
         "email": "notarealuser@example.com",
@@ -122,6 +160,153 @@ def test_predict_sentiment_recommendation_historical(client):
     resp = client.get('/historical', headers=headers)
     assert resp.status_code in (200, 503, 500)
 
+def test_historical_serves_precomputed_views(client, monkeypatch):
+    import pandas as pd
+    import app as app_module
+
+    series = pd.Series([float(i) for i in range(1, 41)], index=pd.date_range('2025-01-01', periods=40, freq='D'))
+    monkeypatch.setattr(app_module.market_data, 'series', lambda symbol, days=365: series)
+    for symbol in app_module.symbol_registry.symbols:
+        app_module.api_cache.delete(f"historical_data_{symbol}_1y")
+
+    client.post('/auth/register', json={"email": "histtest@example.com", "username": "histtest", "password": "testpass123"})
+    token = client.post('/auth/login', json={"email": "histtest@example.com", "password": "testpass123"}).get_json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    data = client.get('/historical?timeframe=30d', headers=headers).get_json()
+    assert data["BTC"]["timeframe"] == "30d"
+    assert len(data["BTC"]["dates"]) == 30
+    assert data["BTC"]["price_change"] == 29.0
+    data = client.get('/historical?timeframe=bogus', headers=headers).get_json()
+    assert data["ETH"]["timeframe"] == "7d"
+    for symbol in app_module.symbol_registry.symbols:
+        app_module.api_cache.delete(f"historical_data_{symbol}_1y")
+
+def test_historical_etag_and_compression(client, monkeypatch):
+    import gzip
+    import pandas as pd
+    import app as app_module
+
+    series = pd.Series([float(i) for i in range(1, 401)], index=pd.date_range('2024-01-01', periods=400, freq='D'))
+    monkeypatch.setattr(app_module.market_data, 'series', lambda symbol, days=365: series)
+    for symbol in app_module.symbol_registry.symbols:
+        app_module.api_cache.delete(f"historical_data_{symbol}_1y")
+
+    client.post('/auth/register', json={"email": "etagtest@example.com", "username": "etagtest", "password": "testpass123"})
+    token = client.post('/auth/login', json={"email": "etagtest@example.com", "password": "testpass123"}).get_json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    resp = client.get('/historical?timeframe=1y', headers=headers)
+    etag = resp.headers['ETag']
+    assert len(resp.get_json()["BTC"]["prices"]) == 365
+
+    resp = client.get('/historical?timeframe=1y', headers={**headers, 'If-None-Match': etag})
+    assert resp.status_code == 304
+    assert resp.data == b''
+
+    resp = client.get('/historical?timeframe=1y', headers={**headers, 'Accept-Encoding': 'gzip'})
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    gzip_etag = resp.headers['ETag']
+    assert gzip_etag == etag[:-1] + '-gzip"'  # Each content coding has its own strong ETag
+    assert len(json_loads(gzip.decompress(resp.data))["ETH"]["dates"]) == 365
+
+    # Either tag revalidates the unchanged body; the 304 names the variant that would be sent
+    resp = client.get('/historical?timeframe=1y', headers={**headers, 'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert resp.status_code == 304 and resp.headers['ETag'] == gzip_etag
+    for symbol in app_module.symbol_registry.symbols:
+        app_module.api_cache.delete(f"historical_data_{symbol}_1y")
+
+def test_predict_validates_window(client):
+    client.post('/auth/register', json={"email": "windowtest@example.com", "username": "windowtest", "password": "testpass123"})
+    token = client.post('/auth/login', json={"email": "windowtest@example.com", "password": "testpass123"}).get_json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    for window in ('abc', '0', '1', '-5', '100000'):
+        resp = client.get(f'/predict?window={window}', headers=headers)
+        assert resp.status_code == 400, window
+        assert "error" in resp.get_json()
+
+def test_evaluate_requires_auth(client):
+    resp = client.get('/evaluate')
+    assert resp.status_code == 401
+
+def test_evaluate_validates_params(client):
+    client.post('/auth/register', json={"email": "evaltest@example.com", "username": "evaltest", "password": "testpass123"})
+    token = client.post('/auth/login', json={"email": "evaltest@example.com", "password": "testpass123"}).get_json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    resp = client.get('/evaluate?start=2025-02-01&end=2025-01-01', headers=headers)
+    assert resp.status_code == 400
+    resp = client.get('/evaluate?symbols=NOTACOIN', headers=headers)
+    assert resp.status_code == 400
+
+def test_indicators_endpoint(client, monkeypatch, tmp_path):
+    import numpy as np
+    import app as app_module
+    from indicators import IndicatorEngine
+    from price_store import CANDLE_DTYPE, PriceStore
+
+    store = PriceStore(str(tmp_path))
+    candles = np.zeros(60, dtype=CANDLE_DTYPE)
+    candles['ts'] = np.arange(60) * 86400
+    candles['close'] = np.linspace(100.0, 160.0, 60)
+    store.append('BTC', '1d', candles)
+    engine = IndicatorEngine(store)
+    monkeypatch.setattr(app_module, 'get_indicator_engine', lambda: engine)
+    monkeypatch.setattr(app_module.market_data, 'refresh_store', lambda interval='1d': None)
+
+    client.post('/auth/register', json={"email": "inditest@example.com", "username": "inditest", "password": "testpass123"})
+    token = client.post('/auth/login', json={"email": "inditest@example.com", "password": "testpass123"}).get_json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get('/indicators').status_code == 401
+    assert client.get('/indicators?interval=5m', headers=headers).status_code == 400
+    assert client.get('/indicators?symbols=NOTACOIN', headers=headers).status_code == 400
+    resp = client.get('/indicators?symbols=btc&history=3', headers=headers)
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data['interval'] == '1d'
+    assert data['indicators']['BTC']['sma_50'] == pytest.approx(np.mean(candles['close'][-50:]))
+    assert data['indicators']['BTC']['rsi_14'] == 100.0
+    assert len(data['history']['BTC']['macd']) == 3
+
+def test_recommendation_uses_bulk_prices_and_rule_sets(client, monkeypatch):
+    import app as app_module
+
+    calls = []
+    def fake_request(url, params=None, **kwargs):
+        calls.append((url, params))
+        time.sleep(0.1)  # Slow upstream: concurrent cold requests overlap
+        return {'bitcoin': {'usd': 110.0, 'usd_24h_change': 10.0}, 'ethereum': {'usd': 90.0, 'usd_24h_change': -10.0}}, None
+    monkeypatch.setattr(app_module.request_handler, 'make_request', fake_request)
+    monkeypatch.setattr(app_module.market_data, 'prices_ago', lambda symbols, seconds: {s: None for s in symbols})
+    monkeypatch.setattr(app_module, 'latest_indicators', lambda symbols, interval='1d': {s: None for s in symbols})
+    app_module.api_cache.set("sentiment_data", {
+        'BTC': {'reddit_sentiment': {'average': 0.8}}, 'ETH': {'reddit_sentiment': {'average': -0.8}}
+    }, 'sentiment')
+    for key in ("current_prices", "recommendation_data_classic", "recommendation_data_weighted"):
+        app_module.api_cache.delete(key)
+
+    client.post('/auth/register', json={"email": "rectest@example.com", "username": "rectest", "password": "testpass123"})
+    token = client.post('/auth/login', json={"email": "rectest@example.com", "password": "testpass123"}).get_json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get('/recommendation?rules=nope', headers=headers).status_code == 400
+
+    responses = []
+    def fetch():
+        with app.test_client() as c:
+            responses.append(c.get('/recommendation', headers=headers).get_json())
+    threads = [threading.Thread(target=fetch) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(r == responses[0] for r in responses)
+    data = responses[0]
+    assert data['BTC']['recommendation'] == 'Buy' and data['ETH']['recommendation'] == 'Sell'
+    assert data['BTC']['previous_price'] == pytest.approx(100.0)
+    data = client.get('/recommendation?rules=weighted', headers=headers).get_json()
+    assert data['BTC']['signal'] == pytest.approx(0.9)
+    # Both coins and both rule sets were served from one simple/price call
+    assert len(calls) == 1 and calls[0][1]['ids'] == 'bitcoin,ethereum'
+    for key in ("sentiment_data", "current_prices", "recommendation_data_classic", "recommendation_data_weighted"):
+        app_module.api_cache.delete(key)
+
 def test_test_reddit(client):
     resp = client.get('/test_reddit')
     assert resp.status_code == 200
@@ -132,4 +317,160 @@ def test_cache_status(client):
     assert resp.status_code == 200
     data = resp.get_json()
     assert "total_entries" in data
-    assert "cache_types" in data
\ No newline at end of file
+    assert "cache_types" in data
+    assert "total_bytes" in data["memory_usage"]
+
+def test_cache_lru_eviction_by_entries():
+    cache = APICache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+def test_cache_byte_budget():
+    cache = APICache(max_bytes=20000)
+    cache.set("big1", "x" * 8000)
+    cache.set("big2", "y" * 8000)
+    cache.set("big3", "z" * 8000)
+    stats = cache.stats()
+    assert stats["total_bytes"] <= 20000
+    assert cache.get("big1") is None
+    assert cache.get("big3") == "z" * 8000
+
+def test_cache_stale_read():
+    cache = APICache()
+    cache.set("k", [1, 2, 3], "price")
+    cache._cache["k"]["timestamp"] -= 120  # Age the entry past its 60s TTL
+    assert cache.get("k") is None
+    assert cache.get("k", allow_expired=True) == [1, 2, 3]
+
+def test_cache_single_flight():
+    cache = APICache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"value": 42}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("sf", loader))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert results == [{"value": 42}] * 8
+
+def test_cache_stale_while_revalidate():
+    cache = APICache()
+    cache.set("swr", {"v": 1}, "price")
+    cache._cache["swr"]["timestamp"] -= 120
+    refreshed = threading.Event()
+
+    def loader():
+        refreshed.set()
+        return {"v": 2}
+
+    # Stale value comes back immediately, refresh happens in the background
+    assert cache.get_or_refresh("swr", loader, "price") == {"v": 1}
+    assert refreshed.wait(2)
+    for _ in range(50):
+        if cache.get("swr") == {"v": 2}:
+            break
+        time.sleep(0.02)
+    assert cache.get("swr") == {"v": 2}
+
+def test_cache_refresher_refreshes_before_expiry():
+    cache = APICache()
+    refresher = CacheRefresher(cache, refresh_ratio=0.8)
+    refresher.register("hot", lambda: {"fresh": True}, "price")
+    cache.set("hot", {"fresh": False}, "price")
+    # 70% of the 60s TTL used: not due yet, next check in ~6s
+    cache._cache["hot"]["timestamp"] -= 42
+    assert 5 <= refresher.run_once() <= 7
+    assert cache.get("hot") == {"fresh": False}
+    # 90% used: due for refresh
+    cache._cache["hot"]["timestamp"] -= 12
+    refresher.run_once()
+    for _ in range(50):
+        if cache.get("hot") == {"fresh": True}:
+            break
+        time.sleep(0.02)
+    assert cache.get("hot") == {"fresh": True}
+
+def test_fetch_headline_sources_partial_results():
+    def fast(name, limit=10):
+        return [f"{name} headline"]
+
+    def slow(name, limit=10):
+        time.sleep(1)
+        return ["too late"]
+
+    def broken(name, limit=10):
+        raise RuntimeError("feed down")
+
+    started = time.perf_counter()
+    headlines, sources = fetch_headline_sources({
+        'fast': (fast, 'a'),
+        'slow': (slow, 'b'),
+        'broken': (broken, 'c'),
+    }, timeout=0.3)
+    # Sources run concurrently, so the deadline bounds the total wait
+    assert time.perf_counter() - started < 0.9
+    assert headlines == {'fast': ['a headline'], 'slow': [], 'broken': []}
+    assert sources['fast']['status'] == 'ok'
+    assert sources['slow']['status'] == 'timeout'
+    assert sources['broken']['status'] == 'error'
+    assert sources['fast']['count'] == 1
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def do_GET(self):
+        time.sleep(0.02)
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def upstream():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _JSONHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_request_handler_reuses_connections(upstream):
+    handler = APIRequestHandler(pool_maxsize=4)
+    for _ in range(5):
+        data, error = handler.make_request(f"{upstream}/simple/price")
+        assert error is None and data == {"ok": True}
+    stats = handler.connection_stats()[upstream]
+    assert stats['requests'] == 5
+    assert stats['connections'] == 1
+    assert stats['reused'] == 4
+    handler.close()
+
+def test_request_handler_caps_connections_per_host(upstream):
+    handler = APIRequestHandler(pool_maxsize=2)
+    threads = [threading.Thread(target=handler.make_request, args=(f"{upstream}/x",)) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = handler.connection_stats()[upstream]
+    assert stats['requests'] == 10
+    assert stats['connections'] <= 2
+    handler.close()
@@ -0,0 +1,87 @@
+import asyncio
+
+import httpx
+
+import app as app_module
+from app import APICache
+from asgi import AsyncBackend, application
+
+
+def request(method, path, **kwargs):
+    async def run():
+        transport = httpx.ASGITransport(app=application)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            return await client.request(method, path, **kwargs)
+    return asyncio.run(run())
+
+
+def test_asgi_ping():
+    resp = request("GET", "/ping")
+    assert resp.status_code == 200
+    assert resp.json() == {"message": "pong"}
+
+
+def test_asgi_price_revalidates_with_etag():
+    resp = request("GET", "/price")
+    assert resp.status_code == 200
+    etag = resp.headers["etag"]
+    resp = request("GET", "/price", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
+
+
+def test_asgi_cache_status_matches_flask():
+    resp = request("GET", "/cache/status")
+    assert resp.status_code == 200
+    flask_status = app_module.app.test_client().get('/cache/status').get_json()
+    assert set(resp.json()) == set(flask_status)
+
+
+def test_asgi_historical_requires_auth():
+    resp = request("GET", "/historical")
+    assert resp.status_code == 401
+
+
+def test_asgi_falls_back_to_flask_routes():
+    payload = {"email": "asgitest@example.com", "username": "asgitest", "password": "testpass123"}
+    request("POST", "/auth/register", json=payload)
+    resp = request("POST", "/auth/login", json={"email": payload["email"], "password": payload["password"]})
+    assert resp.status_code == 200
+    token = resp.json()["token"]
+    resp = request("GET", "/auth/profile", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 200
+    assert resp.json()["email"] == payload["email"]
+
+
+def test_asgi_historical_serves_views(monkeypatch):
+    import pandas as pd
+    dates = pd.date_range("2025-01-01", periods=10, freq="D")
+    series = pd.Series(range(100, 110), index=dates, dtype="float64")
+    monkeypatch.setattr(app_module.market_data, "series", lambda symbol, days: series)
+    for symbol in app_module.symbol_registry.symbols:
+        app_module.api_cache.delete(f"historical_data_{symbol}_1y")
+    payload = {"email": "asgihist@example.com", "username": "asgihist", "password": "testpass123"}
+    request("POST", "/auth/register", json=payload)
+    token = request("POST", "/auth/login", json={"email": payload["email"], "password": payload["password"]}).json()["token"]
+    resp = request("GET", "/historical?timeframe=30d", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["BTC"]["prices"][-1] == 109.0
+    assert data["BTC"]["timeframe"] == "30d"
+
+
+def test_async_cached_single_flight():
+    backend = AsyncBackend(APICache())
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"value": 1}
+
+    async def run():
+        return await asyncio.gather(*[backend.cached("k", loader, "price") for _ in range(20)])
+
+    results = asyncio.run(run())
+    assert all(r == {"value": 1} for r in results)
+    assert len(calls) == 1
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from backtest import error_metrics, evaluate, walk_forward_predictions
+
+
+def test_walk_forward_matches_per_date_polyfit():
+    rng = np.random.default_rng(1)
+    prices = 30000 + rng.normal(0, 300, size=(60, 3)).cumsum(axis=0)
+    window = 10
+    predictions = walk_forward_predictions(prices, window=window, horizon=1)
+    assert np.isnan(predictions[:window]).all()
+    for t in (window, 25, 59):
+        for col in range(3):
+            slope, intercept = np.polyfit(np.arange(window), prices[t - window:t, col], 1)
+            assert np.isclose(predictions[t, col], intercept + slope * window)
+
+
+def test_walk_forward_skips_windows_with_gaps():
+    prices = np.arange(20, dtype=float)[:, None]
+    prices[5] = np.nan
+    predictions = walk_forward_predictions(prices, window=4, horizon=1)
+    # Windows covering row 5 are rows 2..5 through 5..8, predicting rows 6..9
+    assert np.isnan(predictions[6:10, 0]).all()
+    assert np.isclose(predictions[10, 0], 10.0)
+
+
+def test_error_metrics():
+    metrics = error_metrics(np.array([110.0, 90.0, np.nan]), np.array([100.0, 100.0, 100.0]))
+    assert metrics == {'mae': 10.0, 'mape': 10.0, 'rmse': 10.0, 'count': 2}
+
+
+def test_evaluate_date_range():
+    index = pd.date_range('2025-01-01', periods=40, freq='D')
+    frame = pd.DataFrame({'BTC': np.arange(40, dtype=float) * 2 + 100}, index=index)
+    results = evaluate(frame, ['BTC', 'DOGE'], '2025-01-20', '2025-01-29', window=5)
+    btc = results['BTC']
+    assert len(btc['errors']) == 10
+    assert btc['errors'][0]['date'] == '2025-01-20'
+    # A perfectly linear series is predicted exactly
+    assert np.isclose(btc['mae'], 0.0) and btc['count'] == 10
+    assert results['DOGE']['count'] == 0
@@ -0,0 +1,47 @@
+from collections import Counter
+
+import pytest
+import requests
+
+from benchmark import summarize
+from fake_upstreams import FakeReddit, FakeUpstreamServer, FakeYahoo, Faults, price_walk
+
+
+def test_summarize_counts_errors_and_percentiles():
+    result = summarize([0.01] * 99 + [1.0], Counter({200: 98, 503: 1, 'error': 1}), seconds=2.0)
+    assert result['requests'] == 100
+    assert result['ok'] == 98
+    assert result['errors'] == 2
+    assert result['throughput_rps'] == 50.0
+    assert result['p50_ms'] == 10.0
+    assert result['max_ms'] == 1000.0
+
+
+def test_fake_coingecko_serves_deterministic_prices():
+    server = FakeUpstreamServer().start()
+    try:
+        resp = requests.get(f"{server.url()}/api/v3/simple/price", params={'ids': 'bitcoin', 'vs_currencies': 'usd'})
+        assert resp.json() == {'bitcoin': {'usd': round(float(price_walk('bitcoin', 365)[-1]), 2)}}
+        chart = requests.get(f"{server.url()}/api/v3/coins/bitcoin/market_chart", params={'days': 30}).json()
+        assert len(chart['prices']) == 31
+    finally:
+        server.stop()
+    assert server.calls.snapshot()['coingecko.simple_price'] == {'calls': 1, 'errors': 0}
+
+
+def test_faults_inject_errors():
+    server = FakeUpstreamServer(faults=Faults(error_rate=1.0)).start()
+    try:
+        assert requests.get(f"{server.url()}/rss/coindesk").status_code == 503
+    finally:
+        server.stop()
+    with pytest.raises(ConnectionError):
+        FakeYahoo(Faults(error_rate=1.0))('BTC-USD', period='1y')
+    with pytest.raises(ConnectionError):
+        list(FakeReddit(Faults(error_rate=1.0)).subreddit('bitcoin').hot(limit=3))
+
+
+def test_fake_yahoo_matches_yfinance_layout():
+    frame = FakeYahoo()(['BTC-USD', 'ETH-USD'], period='1mo', interval='1d')
+    assert ('Close', 'BTC-USD') in frame.columns
+    assert len(frame) >= 30
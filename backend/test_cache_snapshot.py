@@ -0,0 +1,60 @@
+import os
+import threading
+
+from app import APICache
+from cache_snapshot import CacheSnapshotter
+
+
+def test_snapshot_round_trip_keeps_ttls(tmp_path):
+    path = str(tmp_path / 'cache.snapshot')
+    cache = APICache(max_stale=600)
+    cache.set('fresh', {'bitcoin': {'usd': 1.0}}, 'price')
+    cache.set('stale', [1, 2, 3], 'price')
+    cache._cache['stale']['timestamp'] -= 120  # expired 60s ago, still within max_stale
+    cache.set('gone', 'x', 'price')
+    cache._cache['gone']['timestamp'] -= 3600  # past max_stale
+    assert CacheSnapshotter(cache, path).save() == 3
+    assert not [name for name in os.listdir(tmp_path) if name.startswith('.cache-snapshot-')]
+
+    restored = APICache(max_stale=600)
+    assert CacheSnapshotter(restored, path).load() == 2
+    assert restored.get('fresh') == {'bitcoin': {'usd': 1.0}}
+    assert restored.get('stale') is None
+    assert restored.get('stale', allow_expired=True) == [1, 2, 3]
+    assert restored.get('gone', allow_expired=True) is None
+    assert abs(restored.expires_in('fresh') - cache.expires_in('fresh')) < 1
+
+
+def test_restore_keeps_newer_entries_and_skips_unpicklable(tmp_path):
+    path = str(tmp_path / 'cache.snapshot')
+    cache = APICache()
+    cache.set('price', 'old', 'price')
+    cache.set('lock', threading.Lock(), 'price')
+    assert CacheSnapshotter(cache, path).save() == 1
+
+    restored = APICache()
+    restored.set('price', 'new', 'price')
+    assert CacheSnapshotter(restored, path).load() == 0
+    assert restored.get('price') == 'new'
+
+
+def test_unreadable_snapshot_is_ignored(tmp_path):
+    path = tmp_path / 'cache.snapshot'
+    path.write_bytes(b'not a pickle')
+    cache = APICache()
+    snapshotter = CacheSnapshotter(cache, str(path))
+    assert snapshotter.load() == 0
+    assert len(cache) == 0
+    assert CacheSnapshotter(cache, str(tmp_path / 'missing')).load() == 0
+
+
+def test_stop_writes_final_snapshot(tmp_path):
+    path = str(tmp_path / 'sub' / 'cache.snapshot')
+    cache = APICache()
+    snapshotter = CacheSnapshotter(cache, path, interval=3600)
+    snapshotter.start()
+    cache.set('sentiment_data', {'BTC': 0.1}, 'sentiment')
+    snapshotter.stop()
+    restored = APICache()
+    assert CacheSnapshotter(restored, path).load() == 1
+    assert restored.get('sentiment_data') == {'BTC': 0.1}
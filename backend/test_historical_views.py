@@ -0,0 +1,38 @@
+import json
+
+from historical_views import TIMEFRAMES, build_views, daily_series, join_views
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+def test_daily_series_dedupes_and_sorts():
+    points = [
+        [2 * DAY_MS + 5, 30.0],
+        [0, 10.0],
+        [DAY_MS + 1000, 20.0],
+        [DAY_MS + 9000, 21.0],  # Later point on the same day wins
+    ]
+    dates, prices = daily_series(points)
+    assert dates == ['1970-01-01', '1970-01-02', '1970-01-03']
+    assert prices == [10.0, 21.0, 30.0]
+
+
+def test_build_views_precomputes_every_timeframe():
+    points = [[i * DAY_MS, 100.0 + i] for i in range(400)]
+    entry = build_views('BTC', points)
+    assert set(entry['views']) == set(TIMEFRAMES)
+    week = json.loads(entry['views']['7d'])
+    assert len(week['dates']) == 7
+    assert week['current_price'] == 499.0
+    assert week['price_change'] == 6.0
+    assert round(week['price_change_percent'], 4) == round(6.0 / 493.0 * 100, 4)
+    assert len(json.loads(entry['views']['1y'])['prices']) == 365
+
+
+def test_build_views_needs_two_days():
+    assert build_views('BTC', [[0, 1.0], [1000, 2.0]]) is None
+
+
+def test_join_views():
+    body = join_views({'BTC': '{"a": 1}', 'ETH': '{"error": "x"}'})
+    assert json.loads(body) == {'BTC': {'a': 1}, 'ETH': {'error': 'x'}}
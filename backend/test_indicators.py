@@ -0,0 +1,93 @@
+import math
+
+import numpy as np
+import pytest
+
+from indicators import FIELDS, IndicatorEngine, IndicatorState, compute, ema, ema_filter
+from price_store import CANDLE_DTYPE, PriceStore
+
+DAY = 86400
+
+
+def make_candles(start_ts, closes):
+    candles = np.zeros(len(closes), dtype=CANDLE_DTYPE)
+    candles['ts'] = start_ts + np.arange(len(closes)) * DAY
+    candles['close'] = closes
+    return candles
+
+
+def random_walk(n, seed=7):
+    rng = np.random.default_rng(seed)
+    return 30000 * np.exp(np.cumsum(rng.normal(0, 0.03, n)))
+
+
+def assert_matches(values, expected):
+    for name in FIELDS:
+        if math.isnan(expected[name]):
+            assert math.isnan(values[name]), name
+        else:
+            assert values[name] == pytest.approx(expected[name], rel=1e-9, abs=1e-9), name
+
+
+def test_ema_filter_matches_the_recurrence():
+    values = random_walk(500)
+    for alpha in (2 / 13, 2 / 3, 1 / 14):
+        expected, y = [], 123.0
+        for x in values:
+            y = (1 - alpha) * y + alpha * x
+            expected.append(y)
+        np.testing.assert_allclose(ema_filter(values, alpha, 123.0), expected, rtol=1e-11)
+    assert np.isnan(ema(values[:5], 12)).all()
+
+
+def test_vectorized_indicators_against_reference_values():
+    closes = np.arange(1.0, 61.0)
+    result = compute(closes)
+    assert result['sma_20'][-1] == pytest.approx(np.mean(closes[-20:]))
+    assert np.isnan(result['sma_50'][48]) and not np.isnan(result['sma_50'][49])
+    assert result['rsi_14'][-1] == 100.0                     # Only gains
+    assert result['bb_middle'][-1] == pytest.approx(50.5)
+    assert result['bb_upper'][-1] - result['bb_middle'][-1] == pytest.approx(2 * np.std(closes[-20:]))
+    # A linear trend converges to a constant EMA gap: MACD = (26 - 12) / 2
+    assert result['macd'][-1] == pytest.approx(7.0, rel=1e-3)
+
+
+def test_incremental_updates_match_full_recompute():
+    closes = random_walk(150)
+    timestamps = np.arange(len(closes)) * DAY
+    # Start with too few candles for any indicator, so seeding happens incrementally as well
+    state = IndicatorState(timestamps[:3], closes[:3])
+    for i in range(3, len(closes)):
+        # The live candle is revised a few times before the next one opens
+        for revision in (closes[i] * 0.99, closes[i] * 1.02, closes[i]):
+            assert state.update(int(timestamps[i]), float(revision))
+        if i in (10, 25, 40, 60, 149):
+            expected = {name: series[-1] for name, series in compute(closes[:i + 1]).items()}
+            assert_matches(state.values(), expected)
+    assert not state.update(int(timestamps[5]), 1.0)
+
+
+def test_engine_backfills_from_store_and_follows_appends(tmp_path):
+    store = PriceStore(str(tmp_path))
+    closes = random_walk(120)
+    store.append('BTC', '1d', make_candles(0, closes[:100]))
+    engine = IndicatorEngine(store)
+    assert engine.latest('ETH', '1d') is None
+
+    latest = engine.latest('BTC', '1d')
+    assert latest['ts'] == 99 * DAY and latest['close'] == closes[99]
+    assert latest['rsi_14'] == pytest.approx(compute(closes[:100])['rsi_14'][-1], abs=1e-6)
+
+    # Overlapping sync: live candle revised, then new ones; the listener updates the state
+    store.append('BTC', '1d', make_candles(99 * DAY, closes[99:120]))
+    latest = engine.latest('BTC', '1d')
+    full = compute(closes)
+    assert latest['ts'] == 119 * DAY
+    for name in FIELDS:
+        assert latest[name] == pytest.approx(full[name][-1], abs=1e-6), name
+    assert engine.stats() == {'states': 1, 'backfills': 1, 'updates': 21}
+
+    history = engine.history('BTC', '1d', 5)
+    assert history['ts'] == [t * DAY for t in range(115, 120)]
+    assert history['sma_50'][-1] == latest['sma_50']
+
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from lazy import Lazy, warm_up
+
+
+def test_lazy_builds_once_across_threads():
+    calls = []
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    component = Lazy('thing', factory)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(component.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert component.loaded and component.load_seconds >= 0.05
+
+
+def test_lazy_retries_after_failure_and_set_overrides():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("boom")
+        return 'ok'
+
+    component = Lazy('flaky', factory)
+    warm_up([component]).join()
+    assert not component.loaded
+    assert component.get() == 'ok'
+    component.set('fake')
+    assert component.get() == 'fake'
+
+
+def test_importing_app_skips_heavy_modules(tmp_path):
+    code = ("import sys, app; "
+            "print(','.join(m for m in ('pandas', 'yfinance', 'praw', 'feedparser', 'textblob') if m in sys.modules))")
+    env = {**os.environ, 'USERS_DB_PATH': str(tmp_path / 'users.db'), 'PRICE_STORE_DIR': str(tmp_path / 'prices')}
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, env=env,
+                         cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout
+    assert out.strip() == ''
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import market_data
+from app import APICache
+from market_data import MarketData, decode_closes, period_for_days, to_market_chart
+
+TICKERS = {'BTC': 'BTC-USD', 'ETH': 'ETH-USD'}
+
+
+def fake_download_frame(tickers, days=5):
+    """Builds a frame shaped like yf.download(..., group_by='column') output."""
+    index = pd.date_range('2025-01-01', periods=days, freq='D', tz='UTC')
+    columns = pd.MultiIndex.from_product([['Close', 'Open'], tickers], names=['Price', 'Ticker'])
+    data = np.arange(days * len(columns), dtype=float).reshape(days, len(columns)) + 100
+    return pd.DataFrame(data, index=index, columns=columns)
+
+
+@pytest.fixture
+def download_calls(monkeypatch):
+    calls = []
+
+    def fake_download(tickers, period, **kwargs):
+        calls.append((tuple(tickers), period))
+        return fake_download_frame(tickers)
+
+    monkeypatch.setattr(market_data.yf, 'download', fake_download)
+    return calls
+
+
+def test_period_for_days():
+    assert period_for_days(30) == '1y'
+    assert period_for_days(365) == '1y'
+    assert period_for_days(400) == '2y'
+    assert period_for_days(5000) == 'max'
+
+
+def test_decode_closes_columns_and_index():
+    raw = fake_download_frame(['ETH-USD', 'BTC-USD'])
+    closes = decode_closes(raw, TICKERS)
+    assert list(closes.columns) == ['BTC', 'ETH']
+    assert closes.index.tz is None
+    assert closes.dtypes.tolist() == [np.float64, np.float64]
+    assert closes['ETH'].iloc[0] == raw[('Close', 'ETH-USD')].iloc[0]
+
+
+def test_decode_closes_empty():
+    closes = decode_closes(pd.DataFrame(), TICKERS)
+    assert closes.empty
+    assert list(closes.columns) == ['BTC', 'ETH']
+
+
+def test_one_download_for_all_symbols(download_calls):
+    md = MarketData(APICache(), TICKERS)
+    assert md.series('BTC', 3) is not None
+    assert md.series('ETH', 3) is not None
+    md.history(5)
+    assert download_calls == [(('BTC-USD', 'ETH-USD'), '1y')]
+    with pytest.raises(ValueError):
+        md.history(0)
+
+
+def test_latest_prices(download_calls):
+    md = MarketData(APICache(), TICKERS)
+    prices = md.latest_prices()
+    assert set(prices) == {'BTC', 'ETH'}
+    assert all(isinstance(p, float) for p in prices.values())
+    assert download_calls == [(('BTC-USD', 'ETH-USD'), '1d')]
+
+
+def test_to_market_chart():
+    series = pd.Series([1.0, 2.0], index=pd.to_datetime(['2025-01-01', '2025-01-02']))
+    assert to_market_chart(series) == [[1735689600000, 1.0], [1735776000000, 2.0]]
@@ -0,0 +1,67 @@
+import socket
+
+import app as app_module
+from app import APICache, APIRequestHandler
+from metrics import MetricsRegistry
+
+
+def test_render_counter_and_histogram():
+    registry = MetricsRegistry()
+    counter = registry.counter('jobs_total', 'Jobs run', ['kind'])
+    counter.inc(kind='a')
+    counter.inc(2, kind='a')
+    assert registry.counter('jobs_total', 'Jobs run', ['kind']) is counter
+    histogram = registry.histogram('job_seconds', 'Job latency', ['kind'], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, kind='a')
+    text = registry.render()
+    assert '# TYPE jobs_total counter\njobs_total{kind="a"} 3\n' in text
+    assert 'job_seconds_bucket{kind="a",le="0.1"} 1\n' in text
+    assert 'job_seconds_bucket{kind="a",le="1"} 2\n' in text
+    assert 'job_seconds_bucket{kind="a",le="+Inf"} 3\n' in text
+    assert 'job_seconds_sum{kind="a"} 5.55\n' in text
+    assert 'job_seconds_count{kind="a"} 3\n' in text
+
+
+def test_cache_counters_by_type():
+    cache = APICache()
+    cache.get_or_load('p', lambda: {'x': 1}, 'price')
+    cache.get_or_load('p', lambda: {'x': 1}, 'price')
+    cache.get('missing')
+    counters = cache.stats()['counters_by_type']
+    assert counters['price']['misses'] == 1  # The re-check under the fill lock isn't counted
+    assert counters['price']['hits'] == 1
+    assert counters['unknown']['misses'] == 1
+
+    # A stale read is one stale hit, not a miss followed by a stale hit
+    cache._cache['p']['timestamp'] -= 3600
+    cache.get_or_refresh('p', lambda: {'x': 2}, 'price')
+    counters = cache.stats()['counters_by_type']
+    assert counters['price']['stale_hits'] == 1
+    assert counters['price']['misses'] == 1
+
+
+def test_upstream_failures_and_retries_are_counted():
+    registry = MetricsRegistry()
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]  # Closed again: connections are refused
+    handler = APIRequestHandler(max_retries=2, timeout=1, metrics=registry)
+    data, error = handler.make_request(f'http://127.0.0.1:{port}/x')
+    assert data is None and error
+    upstream = f'http://127.0.0.1:{port}'
+    assert registry.counter('upstream_requests_total', '').value(upstream=upstream, status='error') == 2
+    assert registry.counter('upstream_retries_total', '').value(upstream=upstream) == 1
+
+
+def test_metrics_endpoint_reports_routes():
+    app_module.app.config['TESTING'] = True
+    with app_module.app.test_client() as client:
+        client.get('/ping')
+        resp = client.get('/metrics')
+    assert resp.status_code == 200
+    assert resp.content_type.startswith('text/plain; version=0.0.4')
+    text = resp.get_data(as_text=True)
+    assert 'http_requests_total{route="/ping",method="GET",status="200"}' in text
+    assert 'http_request_duration_seconds_bucket{route="/ping",method="GET",le="+Inf"}' in text
+    assert '# TYPE cache_requests_total counter' in text
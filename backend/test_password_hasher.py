@@ -0,0 +1,59 @@
+import threading
+import time
+
+import pytest
+
+import app as app_module
+from password_hasher import PasswordHasher, PasswordHasherBusy
+
+
+def test_hash_and_verify():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000')
+    hashed = hasher.hash("secret123")
+    assert hashed.startswith("pbkdf2:sha256:1000$")
+    assert hasher.verify(hashed, "secret123")
+    assert not hasher.verify(hashed, "wrong")
+    stats = hasher.stats()
+    assert stats["hash"]["count"] == 1
+    assert stats["verify"]["count"] == 2
+
+
+def saturate(hasher):
+    """Occupies every admission slot with a slow job; returns the event that frees them."""
+    release = threading.Event()
+    started = threading.Barrier(hasher.workers + hasher.max_queue + 1)
+
+    def slow():
+        started.wait()
+        hasher._run('hash', release.wait)
+
+    for _ in range(hasher.workers + hasher.max_queue):
+        threading.Thread(target=slow, daemon=True).start()
+    started.wait()
+    time.sleep(0.05)
+    return release
+
+
+def test_rejects_when_saturated():
+    hasher = PasswordHasher(workers=1, max_queue=1, admission_timeout=0.01, method='pbkdf2:sha256:1000')
+    release = saturate(hasher)
+    with pytest.raises(PasswordHasherBusy):
+        hasher.hash("secret123")
+    release.set()
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.verify(hasher.hash("secret123"), "secret123")
+
+
+def test_login_returns_503_when_saturated(monkeypatch):
+    hasher = PasswordHasher(workers=1, max_queue=0, admission_timeout=0.01, method='pbkdf2:sha256:1000')
+    monkeypatch.setattr(app_module, 'password_hasher', hasher)
+    app_module.app.config['TESTING'] = True
+    with app_module.app.test_client() as client:
+        payload = {"email": "busytest@example.com", "username": "busytest", "password": "testpass123"}
+        assert client.post('/auth/register', json=payload).status_code == 201
+        release = saturate(hasher)
+        resp = client.post('/auth/login', json={"email": payload["email"], "password": payload["password"]})
+        release.set()
+        assert resp.status_code == 503
+        assert resp.headers["Retry-After"] == "1"
+        assert client.get('/ping').status_code == 200
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+from prediction import build_predictions, fit_linear_trends
+
+
+def test_fit_linear_trends_matches_polyfit():
+    rng = np.random.default_rng(0)
+    prices = rng.normal(50000, 500, size=(30, 200)).cumsum(axis=0)
+    slopes, intercepts, counts = fit_linear_trends(prices)
+    for col in (0, 57, 199):
+        slope, intercept = np.polyfit(np.arange(30), prices[:, col], 1)
+        assert np.isclose(slopes[col], slope)
+        assert np.isclose(intercepts[col], intercept)
+    assert (counts == 30).all()
+
+
+def test_fit_linear_trends_ignores_missing_days():
+    prices = np.array([
+        [np.nan, 10.0],
+        [1.0, 13.0],
+        [np.nan, np.nan],
+        [3.0, 16.0],
+        [5.0, np.nan],
+    ])
+    slopes, intercepts, counts = fit_linear_trends(prices)
+    # Column 0 is fit on [1, 3, 5] at x = 0, 1, 2
+    assert np.isclose(slopes[0], 2.0) and np.isclose(intercepts[0], 1.0)
+    assert np.isclose(slopes[1], 3.0) and np.isclose(intercepts[1], 10.0)
+    assert counts.tolist() == [3, 3]
+
+
+def test_fit_linear_trends_too_few_points():
+    slopes, _, counts = fit_linear_trends(np.array([[1.0], [np.nan]]))
+    assert np.isnan(slopes[0])
+    assert counts[0] == 1
+
+
+def test_build_predictions_payload():
+    index = pd.date_range('2025-01-01', periods=5, freq='D')
+    frame = pd.DataFrame({'BTC': [1.0, 2.0, 3.0, 4.0, 5.0], 'ETH': [np.nan] * 4 + [7.0]}, index=index)
+    results = build_predictions(frame, ['BTC', 'ETH', 'SOL'], requested_date='2025-01-03', future_days=2)
+
+    btc = results['BTC']
+    # 5 history days + today + 2 future days
+    assert btc['dates'][:5] == ['2025-01-01', '2025-01-02', '2025-01-03', '2025-01-04', '2025-01-05']
+    assert len(btc['dates']) == 8
+    assert btc['actual'][:5] == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert np.allclose(btc['predicted'], [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0])
+    assert np.isclose(btc['predicted_price'], 3.0)
+    # Not enough history or not in the frame
+    assert results['ETH']['dates'] == []
+    assert results['SOL']['predicted_price'] is None
+
+
+def test_prediction_cache_reuses_fit_until_new_candle(monkeypatch):
+    import prediction
+    from app import APICache
+
+    fits = []
+    real_build = prediction.build_prediction_series
+
+    def counting_build(frame, symbols, future_days=prediction.FUTURE_DAYS):
+        fits.append(tuple(symbols))
+        return real_build(frame, symbols, future_days)
+
+    monkeypatch.setattr(prediction, 'build_prediction_series', counting_build)
+    cache = prediction.PredictionCache(APICache())
+    index = pd.date_range('2025-01-01', periods=4, freq='D')
+    frame = pd.DataFrame({'BTC': [1.0, 2.0, 3.0, 4.0], 'ETH': [4.0, 3.0, 2.0, 1.0]}, index=index)
+
+    first = cache.predict(frame, ['BTC', 'ETH'], 30, '2025-01-02')
+    second = cache.predict(frame, ['BTC', 'ETH'], 30, '2025-01-03')
+    assert fits == [('BTC', 'ETH')]
+    assert np.isclose(first['BTC']['predicted_price'], 2.0)
+    assert np.isclose(second['ETH']['predicted_price'], 2.0)
+
+    # A new BTC candle refits BTC only
+    frame.loc[pd.Timestamp('2025-01-05')] = [5.0, np.nan]
+    cache.predict(frame, ['BTC', 'ETH'], 30)
+    assert fits == [('BTC', 'ETH'), ('BTC',)]
+    # A different window is a different model
+    cache.predict(frame, ['BTC'], 7)
+    assert fits[-1] == ('BTC',) and len(fits) == 3
@@ -0,0 +1,94 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import market_data
+from app import APICache
+from market_data import MarketData
+from price_store import CANDLE_DTYPE, PriceStore, decode_candles
+
+DAY = 86400
+
+
+def make_candles(start_ts, closes, step=DAY):
+    candles = np.zeros(len(closes), dtype=CANDLE_DTYPE)
+    candles['ts'] = start_ts + np.arange(len(closes)) * step
+    candles['close'] = closes
+    return candles
+
+
+def test_append_and_memmap_read(tmp_path):
+    store = PriceStore(str(tmp_path))
+    assert len(store.read('BTC', '1d')) == 0
+    assert store.append('BTC', '1d', make_candles(0, [1.0, 2.0, 3.0])) == 3
+    candles = store.read('BTC', '1d')
+    assert isinstance(candles, np.memmap)
+    assert candles['close'].tolist() == [1.0, 2.0, 3.0]
+    assert store.last_timestamp('BTC', '1d') == 2 * DAY
+
+
+def test_append_is_incremental_and_updates_live_candle(tmp_path):
+    store = PriceStore(str(tmp_path))
+    store.append('BTC', '1d', make_candles(0, [1.0, 2.0, 3.0]))
+    # Overlapping fetch: old candles are skipped, the last one is rewritten, new ones appended
+    assert store.append('BTC', '1d', make_candles(DAY, [2.0, 3.5, 4.0])) == 2
+    assert store.read('BTC', '1d')['close'].tolist() == [1.0, 2.0, 3.5, 4.0]
+    assert store.append('BTC', '1d', make_candles(0, [1.0])) == 0
+
+
+def test_torn_write_is_ignored(tmp_path):
+    store = PriceStore(str(tmp_path))
+    store.append('ETH', '1d', make_candles(0, [1.0, 2.0]))
+    with open(store.path('ETH', '1d'), 'ab') as f:
+        f.write(b'\x00' * 5)
+    assert store.count('ETH', '1d') == 2
+    store.append('ETH', '1d', make_candles(2 * DAY, [3.0]))
+    assert store.read('ETH', '1d')['close'].tolist() == [1.0, 2.0, 3.0]
+
+
+def test_price_at(tmp_path):
+    store = PriceStore(str(tmp_path))
+    store.append('BTC', '1h', make_candles(0, [10.0, 11.0, 12.0], step=3600))
+    assert store.price_at('BTC', '1h', 3700) == 11.0
+    assert store.price_at('BTC', '1h', 100 * 3600) is None
+
+
+def fake_yahoo_frame(tickers, start, days):
+    index = pd.date_range(start, periods=days, freq='D', tz='UTC')
+    columns = pd.MultiIndex.from_product([['Open', 'High', 'Low', 'Close', 'Volume'], tickers])
+    data = np.tile(np.arange(days, dtype=float)[:, None] + 100, (1, len(columns)))
+    return pd.DataFrame(data, index=index, columns=columns)
+
+
+def test_decode_candles():
+    raw = fake_yahoo_frame(['BTC-USD', 'ETH-USD'], '2025-01-01', 3)
+    candles = decode_candles(raw, {'BTC': 'BTC-USD', 'ETH': 'ETH-USD', 'SOL': 'SOL-USD'})
+    assert candles['BTC']['close'].tolist() == [100.0, 101.0, 102.0]
+    assert candles['BTC']['ts'][0] == int(pd.Timestamp('2025-01-01').timestamp())
+    assert len(candles['SOL']) == 0
+
+
+def test_market_data_syncs_incrementally(tmp_path, monkeypatch):
+    calls = []
+    today = pd.Timestamp(datetime.utcnow().date())
+
+    def fake_download(tickers, start, interval, **kwargs):
+        calls.append((tuple(tickers), pd.Timestamp(start).normalize()))
+        start_day = pd.Timestamp(start).normalize()
+        return fake_yahoo_frame(tickers, start_day, (today - start_day).days + 1)
+
+    monkeypatch.setattr(market_data.yf, 'download', fake_download)
+    md = MarketData(APICache(), {'BTC': 'BTC-USD', 'ETH': 'ETH-USD'}, store=PriceStore(str(tmp_path)))
+
+    md.sync('1d')
+    assert calls[0] == (('BTC-USD', 'ETH-USD'), today - pd.Timedelta(days=md.backfill_days))
+    md.sync('1d')
+    # Second sync starts from the last stored candle, in one batch for both symbols
+    assert calls[1] == (('BTC-USD', 'ETH-USD'), today)
+
+    frame = md.history(5)
+    assert len(calls) == 3  # The 1y frame is served from the store after one more incremental sync
+    assert list(frame.columns) == ['BTC', 'ETH']
+    assert len(frame) == 5
+    assert frame.index[-1] == today
@@ -0,0 +1,75 @@
+import json
+import time
+
+import app as app_module
+from price_stream import PriceBroadcaster, Subscription
+
+
+def parse(event: bytes):
+    fields = dict(line.split(': ', 1) for line in event.decode().strip().split('\n'))
+    return fields['event'], json.loads(fields['data'])
+
+
+def test_broadcast_sends_only_changed_coins_once_per_poll():
+    prices = {'bitcoin': {'usd': 100.0}, 'ethereum': {'usd': 10.0}}
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return dict(prices)
+
+    broadcaster = PriceBroadcaster(fetch, interval=3600)
+    received = [[] for _ in range(50)]
+    for inbox in received:
+        broadcaster._subscribers[id(inbox)] = inbox.append  # Registered without starting the thread
+
+    broadcaster.poll_once()
+    prices['ethereum'] = {'usd': 11.0}
+    broadcaster.poll_once()
+    broadcaster.poll_once()  # Nothing changed: nothing sent
+
+    assert len(calls) == 3
+    for inbox in received:
+        assert [parse(e) for e in inbox] == [
+            ('prices', {'bitcoin': {'usd': 100.0}, 'ethereum': {'usd': 10.0}}),
+            ('prices', {'ethereum': {'usd': 11.0}}),
+        ]
+    # Every subscriber got the same encoded bytes
+    assert len({id(inbox[1]) for inbox in received}) == 1
+
+
+def test_slow_subscriber_is_resynced_with_snapshot():
+    price = {'value': 0}
+    broadcaster = PriceBroadcaster(lambda: {'bitcoin': {'usd': price['value']}}, interval=3600)
+    subscription = Subscription(broadcaster, max_pending=1, heartbeat=0.01)
+    broadcaster.stop()
+    for value in range(1, 6):
+        price['value'] = value
+        broadcaster.poll_once()
+
+    events = iter(subscription)
+    assert parse(next(events))[0] == 'snapshot'  # Taken at subscribe time
+    assert parse(next(events)) == ('snapshot', {'bitcoin': {'usd': 5}})
+    assert broadcaster.stats()['resyncs'] >= 1
+    assert next(events) == b": keepalive\n\n"
+    subscription.close()
+    assert broadcaster.stats()['subscribers'] == 0
+
+
+def test_price_stream_endpoint(monkeypatch):
+    monkeypatch.setattr(app_module.price_broadcaster, 'fetch', lambda: {'bitcoin': {'usd': 42.0}})
+    app_module.app.config['TESTING'] = True
+    with app_module.app.test_client() as client:
+        resp = client.get('/price/stream', buffered=False)
+        assert resp.status_code == 200
+        assert resp.mimetype == 'text/event-stream'
+        chunks = iter(resp.response)
+        event, data = parse(next(chunks))
+        while event == 'snapshot' and not data:
+            event, data = parse(next(chunks))  # Snapshot taken before the first poll finished
+        assert data == {'bitcoin': {'usd': 42.0}}
+        resp.close()
+    deadline = time.time() + 2
+    while app_module.price_broadcaster.stats()['subscribers'] and time.time() < deadline:
+        time.sleep(0.01)
+    assert app_module.price_broadcaster.stats()['subscribers'] == 0
@@ -0,0 +1,107 @@
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app import APIRequestHandler
+from quota import CircuitBreaker, QuotaManager, TokenBucket
+
+
+def test_token_bucket_burst_then_refuses():
+    bucket = TokenBucket(rate_per_minute=60, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Next token is ~1s away: refused without waiting, granted when the caller can wait
+    assert bucket.reserve(max_wait=0) is None
+    wait = bucket.reserve(max_wait=5)
+    assert 0 < wait <= 1.0
+
+
+def test_token_bucket_penalize_holds_back_tokens():
+    bucket = TokenBucket(rate_per_minute=600, burst=10)
+    bucket.penalize(30)
+    assert bucket.reserve(max_wait=5) is None
+    assert bucket.reserve(max_wait=31) is not None
+
+
+def test_circuit_breaker_opens_and_probes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()       # the single half-open probe
+    assert not breaker.allow()   # everyone else still fails fast
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_quota_manager_maps_hosts_and_shares_budget():
+    quota = QuotaManager(limits={'coingecko': (60, 1)}, hosts={'api.coingecko.com': 'coingecko'}, max_wait=0)
+    assert quota.upstream_for('https://api.coingecko.com/api/v3/simple/price') == 'coingecko'
+    assert quota.upstream_for('https://www.coindesk.com/feed') == 'www.coindesk.com'
+    assert quota.acquire('coingecko') is None
+    assert 'rate limit' in quota.acquire('coingecko')
+    assert quota.stats()['coingecko']['rejected'] == 1
+
+
+def test_make_request_fails_fast_when_circuit_open():
+    # A port nobody listens on: connection refused immediately
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    url = f"http://127.0.0.1:{port}/api"
+
+    quota = QuotaManager(default_limit=(6000, None), failure_threshold=2, reset_timeout=60)
+    handler = APIRequestHandler(max_retries=1, quota=quota)
+    for _ in range(2):
+        _, error = handler.make_request(url)
+        assert error.startswith("Request failed")
+    assert quota.is_open(quota.upstream_for(url))
+
+    started = time.monotonic()
+    _, error = handler.make_request(url)
+    assert 'circuit open' in error
+    assert time.monotonic() - started < 0.05
+    assert handler.connection_stats()[f"http://127.0.0.1:{port}"]['requests'] == 2
+
+
+def test_rate_limited_probe_does_not_wedge_half_open_breaker():
+    statuses = [500, 500, 429, 200]
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status = statuses.pop(0)
+            self.send_response(status)
+            if status == 429:
+                self.send_header('Retry-After', '0')
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(b'{}')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/api"
+        quota = QuotaManager(default_limit=(6000, None), failure_threshold=2, reset_timeout=0.05)
+        handler = APIRequestHandler(max_retries=1, quota=quota)
+        upstream = quota.upstream_for(url)
+        for _ in range(2):
+            handler.make_request(url)
+        assert quota.is_open(upstream)
+
+        time.sleep(0.06)
+        _, error = handler.make_request(url)       # The half-open probe is rate limited
+        assert error == "Max retries exceeded"
+        data, error = handler.make_request(url)    # The next call may probe again
+        assert (data, error) == ({}, None)
+        assert quota.stats()[upstream]['state'] == CircuitBreaker.CLOSED
+    finally:
+        server.shutdown()
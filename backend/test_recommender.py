@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from recommender import BUILTIN_RULE_SETS, RuleSet, Rule, decide, recommend, rule_set_from_config, sentiment_column
+
+
+def sentiment_block(*averages):
+    sources = ('reddit_sentiment', 'coindesk_sentiment', 'cointelegraph_sentiment')
+    return {source: {'average': avg} for source, avg in zip(sources, averages) if avg is not None}
+
+
+def test_classic_rules_match_the_original_thresholds():
+    symbols = ['BTC', 'ETH', 'SOL', 'ADA', 'DOGE']
+    current = {'BTC': 110.0, 'ETH': 90.0, 'SOL': 110.0, 'ADA': 50.0, 'DOGE': 1.0}
+    previous = {'BTC': 100.0, 'ETH': 100.0, 'SOL': 100.0, 'ADA': None, 'DOGE': 1.0}
+    sentiment = {
+        'BTC': sentiment_block(0.6, 0.8, 0.7),
+        'ETH': sentiment_block(-0.9, -0.6),
+        'SOL': sentiment_block(0.2, 0.3, 0.1),
+        'ADA': sentiment_block(0.9, 0.9, 0.9),
+    }
+    table = recommend(BUILTIN_RULE_SETS['classic'], symbols, current, previous, sentiment, {})
+    assert [table[s]['recommendation'] for s in symbols] == ['Buy', 'Sell', 'Hold', 'Hold', 'Hold']
+    assert table['BTC']['sentiment'] == pytest.approx(0.7)
+    assert table['BTC']['price_delta'] == pytest.approx(0.1)
+    assert table['ADA']['price_delta'] is None and table['ADA']['signal'] is None
+    assert table['DOGE']['sentiment'] == 0.0
+    assert table['BTC']['reason'] and table['SOL']['reason'] is None
+
+
+def test_sentiment_column_averages_available_sources():
+    data = {'BTC': sentiment_block(0.2, None, 0.4), 'ETH': {}}
+    np.testing.assert_allclose(sentiment_column(data, ['BTC', 'ETH', 'SOL']), [0.3, 0.0, 0.0])
+
+
+def test_first_matching_rule_wins_and_missing_columns_never_match():
+    rule_set = RuleSet('t', [
+        Rule('Sell', [('rsi_14', '>', 80.0)]),
+        Rule('Buy', [('signal', '>=', 0.0)]),
+    ], default='Wait')
+    columns = {'rsi_14': np.array([85.0, 50.0, np.nan]), 'signal': np.array([0.5, 0.5, np.nan])}
+    actions, matched = decide(rule_set, columns, 3)
+    assert actions.tolist() == ['Sell', 'Buy', 'Wait']
+    assert matched.tolist() == [0, 1, -1]
+
+
+def test_technical_rules_use_indicators_and_weighted_signal():
+    indicators = {'BTC': {'rsi_14': 55.0, 'macd_histogram': 1.5}, 'ETH': {'rsi_14': 75.0, 'macd_histogram': 1.5}}
+    current, previous = {'BTC': 105.0, 'ETH': 105.0}, {'BTC': 100.0, 'ETH': 100.0}
+    sentiment = {'BTC': sentiment_block(0.2), 'ETH': sentiment_block(0.2)}
+    table = recommend(BUILTIN_RULE_SETS['technical'], ['BTC', 'ETH'], current, previous, sentiment, indicators)
+    # signal = (0.2 + clip(0.05 / 0.05)) / 2
+    assert table['BTC']['signal'] == pytest.approx(0.6)
+    assert table['BTC']['recommendation'] == 'Buy'
+    assert table['ETH']['recommendation'] == 'Hold'  # Overbought
+    assert table['BTC']['indicators'] == indicators['BTC']
+
+
+def test_rule_set_config_is_validated():
+    rule_set = rule_set_from_config({
+        'name': 'cautious', 'momentum_scale': 0.1,
+        'rules': [{'action': 'Buy', 'when': [['signal', '>', 0.5]], 'reason': 'Strong signal'}]
+    })
+    assert rule_set.rules[0] == Rule('Buy', [('signal', '>', 0.5)], 'Strong signal')
+    assert rule_set.momentum_scale == 0.1 and rule_set.default == 'Hold'
+    with pytest.raises(ValueError):
+        rule_set_from_config({'name': 'bad', 'rules': [{'action': 'Buy', 'when': [['volume', '>', 1]]}]})
+    with pytest.raises(ValueError):
+        rule_set_from_config({'name': 'bad', 'rules': [{'action': 'Buy', 'when': [['signal', '==', 1]]}]})
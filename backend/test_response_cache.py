@@ -0,0 +1,57 @@
+import gzip
+import json
+
+import numpy as np
+
+from app import APICache
+from response_cache import MIN_COMPRESS_BYTES, accepted_encodings, dumps, encode_json, etag_matches
+
+
+def test_dumps_handles_numpy_and_non_string_keys():
+    assert json.loads(dumps({'price': np.float64(1.5), 1: [np.int64(2)]})) == {'price': 1.5, '1': [2]}
+
+
+def test_small_bodies_are_not_compressed():
+    assert encode_json({'a': 1}).negotiate('gzip, br') == (b'{"a":1}', None)
+
+
+def test_negotiates_gzip_for_large_bodies():
+    encoded = encode_json({'prices': [float(i) for i in range(MIN_COMPRESS_BYTES)]})
+    body, encoding = encoded.negotiate('deflate, gzip;q=0.8')
+    assert encoding == 'gzip' and gzip.decompress(body) == encoded.body
+    assert encoded.negotiate('gzip;q=0') == (encoded.body, None)
+    assert 'gzip' in accepted_encodings('*')
+
+
+def test_etag_matching():
+    etag = encode_json([1, 2]).etag
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_each_encoding_has_its_own_etag():
+    encoded = encode_json({'prices': [float(i) for i in range(MIN_COMPRESS_BYTES)]})
+    tags = {encoded.etag_for(encoding) for encoding in (None, *encoded.variants)}
+    assert len(tags) == len(encoded.variants) + 1 and encoded.etag_for(None) == encoded.etag
+    assert all(encoded.matches(tag) for tag in tags)
+    assert not encoded.matches(encode_json([1, 2]).etag)
+
+
+def test_cache_reuses_encoded_body_until_value_changes():
+    cache = APICache()
+    value = {'bitcoin': {'usd': 1.0}}
+    cache.set('prices', value, 'price')
+    first = cache.get_encoded('prices', value)
+    assert cache.get_encoded('prices', value) is first
+    assert cache.stats()['total_bytes'] > first.size
+    # Snapshots carry the value only; the body is rebuilt after a restore
+    [(key, entry)] = cache.export_entries()
+    assert 'encoded' not in entry and entry['size'] == cache.stats()['total_bytes'] - first.size
+    cache.set('prices', {'bitcoin': {'usd': 2.0}}, 'price')
+    second = cache.get_encoded('prices', cache.get('prices'))
+    assert second is not first and second.etag != first.etag
+    # A value that isn't the cached one is encoded but not stored
+    assert cache.get_encoded('prices', {'fallback': True}) is not cache.get_encoded('prices', {'fallback': True})
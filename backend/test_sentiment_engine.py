@@ -0,0 +1,89 @@
+import pytest
+from textblob import TextBlob
+
+from backfill_sentiment import backfill
+from sentiment_engine import POLARITY_TOLERANCE, ScoringPool, SentimentEngine, score_matrix, score_texts, tokenize
+
+HEADLINES = [
+    "Bitcoin surges past $70K as ETF inflows hit a record high",
+    "SEC delays decision on Ethereum ETF, market not impressed",
+    "Crypto exchange hacked; users fear the worst!!!",
+    "Analysts say BTC is very likely to rally further",
+    "This is not a good time to buy... or is it?",
+    "Ethereum upgrade really not as bad as feared",
+    "Mr. Saylor buys more bitcoin, calls it the best asset ever",
+    "U.S. regulators are extremely worried about stablecoins",
+    "Never been a better time: DeFi yields are incredibly high",
+    "Solana outage isn't great for the network's reputation",
+    "“Terrible” week for altcoins as liquidations pile up",
+    "BTC price flat",
+    "",
+]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return SentimentEngine()
+
+
+def test_matches_textblob_polarity(engine):
+    scores = engine.score_many(HEADLINES)
+    for text, score in zip(HEADLINES, scores):
+        assert abs(score - TextBlob(text).sentiment.polarity) <= POLARITY_TOLERANCE, text
+
+
+def test_tokenize_follows_textblob_rules():
+    assert tokenize("Bitcoin isn't dead!!") == ['bitcoin', 'is', 'n', 't', 'dead', '!', '!']
+    assert tokenize("U.S. crypto... Mr. Market") == ['u.s.', 'crypto', '...', 'mr.', 'market']
+
+
+def test_scores_are_memoized():
+    engine = SentimentEngine(max_entries=2)
+    engine.score_many(["good news", "bad news", "good news"])
+    assert engine.stats() == {'entries': 2, 'hits': 0, 'misses': 2}
+    engine.score("good news")
+    engine.score("great news")  # Evicts the least recently used entry ("bad news")
+    assert engine.stats()['hits'] == 1
+    assert engine.stats()['entries'] == 2
+
+
+def test_encoded_batch_survives_a_concurrent_reset(engine):
+    lexicon = engine.lexicon
+    ids, arrays = lexicon.encode([tokenize(text) for text in HEADLINES])
+    expected = score_texts(HEADLINES, lexicon)
+    # Another thread overflows the vocabulary: ids are remapped and the arrays shrink
+    lexicon.max_tokens = 0
+    try:
+        lexicon.encode([['zzz%d' % i for i in range(5000)]])
+    finally:
+        lexicon.max_tokens = 500_000
+    assert score_matrix(ids, arrays).tolist() == expected
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = ScoringPool(workers=2, chunk_size=7)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_streams_scores_in_order(pool, engine):
+    texts = HEADLINES * 5
+    assert list(pool.score_stream(iter(texts))) == engine.score_many(texts)
+    assert pool.last_run['texts'] == len(texts)
+
+
+def test_engine_uses_pool_for_big_batches(pool):
+    engine = SentimentEngine(pool=pool, pool_threshold=10)
+    pool.last_run = {}
+    engine.score_many(HEADLINES[:5])
+    assert pool.last_run == {}
+    engine.score_many([f"{h} ({i})" for i, h in enumerate(HEADLINES)])
+    assert pool.last_run['texts'] == len(HEADLINES)
+
+
+def test_backfill_keeps_records_paired(pool):
+    records = [{"id": i, "title": title} for i, title in enumerate(HEADLINES)]
+    scored = list(backfill(iter(records), "title", pool))
+    assert [r["id"] for r in scored] == list(range(len(HEADLINES)))
+    assert scored[0]["polarity"] == pytest.approx(TextBlob(HEADLINES[0]).sentiment.polarity)
@@ -0,0 +1,43 @@
+import json
+
+from symbols import SymbolRegistry, coin_from_config, load_symbol_registry
+
+
+def test_default_registry(monkeypatch):
+    monkeypatch.delenv('CRYPTO_SYMBOLS', raising=False)
+    monkeypatch.delenv('CRYPTO_SYMBOLS_FILE', raising=False)
+    registry = load_symbol_registry()
+    assert registry.symbols == ['BTC', 'ETH']
+    assert registry.yahoo_tickers() == {'BTC': 'BTC-USD', 'ETH': 'ETH-USD'}
+    assert registry.get('BTC').coingecko_id == 'bitcoin'
+
+
+def test_registry_from_env_list(monkeypatch):
+    monkeypatch.delenv('CRYPTO_SYMBOLS_FILE', raising=False)
+    monkeypatch.setenv('CRYPTO_SYMBOLS', 'btc, SOL,FOO')
+    registry = load_symbol_registry()
+    assert registry.symbols == ['BTC', 'SOL', 'FOO']
+    foo = registry.get('FOO')
+    assert foo.yahoo == 'FOO-USD'
+    assert foo.coingecko_id is None and foo.subreddit is None
+    assert [coin.symbol for coin in registry.with_coingecko()] == ['BTC', 'SOL']
+
+
+def test_registry_from_file(monkeypatch, tmp_path):
+    path = tmp_path / 'symbols.json'
+    path.write_text(json.dumps([
+        {'symbol': 'ETH'},
+        {'symbol': 'PEPE', 'yahoo': 'PEPE24478-USD', 'coingecko_id': 'pepe', 'subreddit': None},
+    ]))
+    monkeypatch.setenv('CRYPTO_SYMBOLS_FILE', str(path))
+    registry = load_symbol_registry()
+    assert registry.symbols == ['ETH', 'PEPE']
+    assert registry.get('PEPE').name == 'pepe'
+    assert [coin.symbol for coin in registry.with_subreddit()] == ['ETH']
+
+
+def test_known_coin_override():
+    coin = coin_from_config({'symbol': 'BTC', 'subreddit': 'BitcoinMarkets'})
+    assert coin.yahoo == 'BTC-USD'
+    assert coin.subreddit == 'BitcoinMarkets'
+    assert 'BTC' in SymbolRegistry([coin])
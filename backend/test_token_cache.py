@@ -0,0 +1,52 @@
+from token_cache import TokenCache
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_cached_claims_respect_exp():
+    clock = Clock()
+    cache = TokenCache(clock=clock)
+    assert cache.get("t") is None
+    cache.put("t", {"user_id": "1", "iat": 990, "exp": 1010})
+    assert cache.get("t")["user_id"] == "1"
+    clock.now = 1010
+    assert cache.get("t") is None  # Expired: the caller's full decode reports it
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_bounded_lru():
+    cache = TokenCache(max_entries=2, clock=Clock())
+    cache.put("a", {"exp": 2000})
+    cache.put("b", {"exp": 2000})
+    cache.get("a")
+    cache.put("c", {"exp": 2000})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+
+def test_revocation():
+    clock = Clock()
+    cache = TokenCache(clock=clock)
+    old = {"user_id": "7", "iat": 995, "exp": 2000}
+    cache.put("old", old)
+    cache.revoke("old", old["exp"])
+    assert cache.get("old") is None
+    assert cache.is_revoked("old", old)
+
+    other = {"user_id": "8", "iat": 995, "exp": 2000}
+    clock.now = 1000.6
+    cache.revoke_user("8")
+    assert cache.is_revoked("other", other)
+    # Logging back in within the same second yields a usable token
+    assert not cache.is_revoked("relogin", {"user_id": "8", "iat": 1000, "exp": 2000})
+    clock.now = 1001
+    assert not cache.is_revoked("newer", {"user_id": "8", "iat": 1001, "exp": 2000})
+    assert cache.stats()["rejected"] == 2
@@ -0,0 +1,39 @@
+import threading
+
+from user_store import UserStore
+
+
+def test_create_and_lookup(tmp_path):
+    store = UserStore(str(tmp_path / "users.db"))
+    user = store.create("a@example.com", "alice", "hash")
+    assert user["id"] == "1"
+    assert store.create("a@example.com", "alice2", "hash") is None
+    assert store.get_by_email("a@example.com")["username"] == "alice"
+    assert store.get_by_id(user["id"])["email"] == "a@example.com"
+    assert store.get_by_id("404") is None
+    assert store.get_by_id("not-a-number") is None
+
+
+def test_concurrent_registrations_get_unique_ids(tmp_path):
+    store = UserStore(str(tmp_path / "users.db"), pool_size=4)
+    ids = []
+
+    def register(i):
+        ids.append(store.create(f"user{i}@example.com", f"user{i}", "hash")["id"])
+
+    threads = [threading.Thread(target=register, args=(i,)) for i in range(40)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(set(ids)) == 40
+    assert store.count() == 40
+
+
+def test_users_survive_reopen(tmp_path):
+    path = str(tmp_path / "users.db")
+    store = UserStore(path)
+    user = store.create("b@example.com", "bob", "hash")
+    store.close()
+    reopened = UserStore(path)
+    assert reopened.get_by_id(user["id"])["username"] == "bob"
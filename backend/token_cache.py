@@ -0,0 +1,117 @@
+"""
+Token Cache
+-----------
+Remembers JWTs that already passed signature verification.
+
+The frontend polls protected endpoints with the same 7-day token, so verifying
+the HMAC and decoding the claims on every request repeats identical work. Here a
+verified token's claims are kept (keyed by a digest of the token, so raw tokens
+aren't held in memory) until the token's own `exp`; after that the entry is a
+miss and the caller's full jwt.decode reports the expiry as before.
+
+Revocation: revoke(token, exp) rejects one token until it would have expired;
+revoke_user(user_id) rejects every token issued to that user before the current
+second (iat has one-second resolution, so a token issued later in that same
+second, e.g. by an immediate re-login, stays valid).
+Both apply to cached and freshly decoded tokens alike.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+def token_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode('utf-8'), digest_size=16).digest()
+
+
+class TokenCache:
+    """
+    Bounded LRU of token digest -> verified claims.
+    Args:
+        max_entries: Tokens kept; the least recently used is evicted beyond this
+        clock: Source of the current time in epoch seconds (tests pass a fake one)
+    """
+    def __init__(self, max_entries: int = 10000, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._claims: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+        self._revoked: Dict[bytes, float] = {}          # token digest -> its exp
+        self._revoked_users: Dict[str, int] = {}        # user id -> tokens issued before here are revoked
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Claims for a previously verified, unexpired token, or None (verify it in full)."""
+        key = token_key(token)
+        now = self.clock()
+        with self._lock:
+            claims = self._claims.get(key)
+            if claims is None:
+                self.misses += 1
+                return None
+            # Same rule as jwt.decode: expired once now >= exp
+            if 'exp' in claims and now >= claims['exp']:
+                del self._claims[key]
+                self.misses += 1
+                return None
+            self._claims.move_to_end(key)
+            self.hits += 1
+            return claims
+
+    def put(self, token: str, claims: Dict[str, Any]) -> None:
+        key = token_key(token)
+        with self._lock:
+            self._claims[key] = claims
+            self._claims.move_to_end(key)
+            while len(self._claims) > self.max_entries:
+                self._claims.popitem(last=False)
+
+    def is_revoked(self, token: str, claims: Dict[str, Any]) -> bool:
+        """True if the token, or every token of its user issued by then, was revoked."""
+        with self._lock:
+            revoked = token_key(token) in self._revoked
+            cutoff = self._revoked_users.get(str(claims.get('user_id')))
+            if not revoked and cutoff is not None:
+                revoked = claims.get('iat', 0) < cutoff
+            if revoked:
+                self.rejected += 1
+            return revoked
+
+    def revoke(self, token: str, exp: Optional[float] = None) -> None:
+        """
+        Rejects one token from now on.
+        Args:
+            exp: The token's expiry; the revocation is forgotten after it (default: kept)
+        """
+        key = token_key(token)
+        now = self.clock()
+        with self._lock:
+            self._claims.pop(key, None)
+            self._revoked[key] = exp if exp is not None else float('inf')
+            # Expired tokens fail verification anyway, so their revocations can go
+            for stale in [k for k, until in self._revoked.items() if until <= now]:
+                del self._revoked[stale]
+
+    def revoke_user(self, user_id: str) -> None:
+        """Rejects every token issued to the user before the current second."""
+        # Why: iat is whole seconds; comparing it to a fractional now would also
+        # reject a token from a re-login in the same second as the revocation
+        with self._lock:
+            self._revoked_users[str(user_id)] = int(self.clock())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._claims),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'revoked_tokens': len(self._revoked),
+                'revoked_users': len(self._revoked_users),
+                'rejected': self.rejected
+            }
@@ -0,0 +1,131 @@
+"""
+User Store
+----------
+SQLite-backed user accounts for the /auth/* endpoints.
+
+Users live in one table whose INTEGER PRIMARY KEY is the user id and whose email
+column is UNIQUE, so both lookups are B-tree searches (O(log n)) rather than scans.
+Ids are assigned by SQLite inside the INSERT, and a duplicate email is rejected by
+the unique index, so concurrent registrations can't collide.
+
+Connections are pooled (SQLite connections are cheap to keep, not to open) and the
+SQL text is constant and parameterized: sqlite3 caches the compiled statement per
+connection, so each query is prepared once per pooled connection and reused.
+WAL mode lets reads run while a registration is being written.
+"""
+import logging
+import os
+import queue
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    email TEXT NOT NULL UNIQUE,
+    username TEXT NOT NULL,
+    password TEXT NOT NULL,
+    created_at TEXT NOT NULL
+)
+"""
+
+INSERT_USER = "INSERT INTO users (email, username, password, created_at) VALUES (?, ?, ?, ?)"
+SELECT_BY_EMAIL = "SELECT id, email, username, password, created_at FROM users WHERE email = ?"
+SELECT_BY_ID = "SELECT id, email, username, password, created_at FROM users WHERE id = ?"
+COUNT_USERS = "SELECT COUNT(*) FROM users"
+
+
+def _to_user(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+    """Rows come back as the dicts the auth endpoints used before, with a string id."""
+    if row is None:
+        return None
+    user = dict(row)
+    user['id'] = str(user['id'])
+    return user
+
+
+class UserStore:
+    """
+    User accounts in a SQLite file, accessed through a fixed pool of connections.
+    Args:
+        path: Database file (created with its directory if missing)
+        pool_size: Connections kept open; callers beyond that wait for one to free up
+        timeout: Seconds a write waits on SQLite's lock before failing
+    """
+    def __init__(self, path: str, pool_size: int = 4, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        for _ in range(max(1, pool_size)):
+            self._pool.put(self._connect())
+        with self._connection() as conn:
+            conn.execute(SCHEMA)
+        logger.info(f"User store ready at {path} ({self.count()} users)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # check_same_thread=False: a pooled connection is used by one thread at a time,
+        # but not always the thread that opened it
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrows a pooled connection; the block runs as one transaction."""
+        conn = self._pool.get()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._pool.put(conn)
+
+    def create(self, email: str, username: str, password_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Inserts a user.
+        Returns:
+            dict: The new user, or None if the email is already registered
+        """
+        created_at = datetime.utcnow().isoformat()
+        try:
+            with self._connection() as conn:
+                cursor = conn.execute(INSERT_USER, (email, username, password_hash, created_at))
+        except sqlite3.IntegrityError:
+            return None
+        return {
+            'id': str(cursor.lastrowid),
+            'email': email,
+            'username': username,
+            'password': password_hash,
+            'created_at': created_at
+        }
+
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        with self._connection() as conn:
+            return _to_user(conn.execute(SELECT_BY_EMAIL, (email,)).fetchone())
+
+    def get_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            rowid = int(user_id)
+        except (TypeError, ValueError):
+            return None
+        with self._connection() as conn:
+            return _to_user(conn.execute(SELECT_BY_ID, (rowid,)).fetchone())
+
+    def count(self) -> int:
+        with self._connection() as conn:
+            return conn.execute(COUNT_USERS).fetchone()[0]
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
@@ -1,116 +1,116 @@
-import requests
+"""
+Validates the /predict model against actual prices.
+
+Runs a walk-forward evaluation over a date range: for every date the model is
+fit on the preceding window of closes and its prediction is compared with the
+actual close. By default this makes one /evaluate request to a running backend;
+with --local it loads history once from Yahoo Finance and evaluates in-process.
+
+Examples:
+    python validate_model.py
+    python validate_model.py --start 2025-01-01 --end 2025-06-30 --symbols BTC,ETH,SOL
+    python validate_model.py --local --start 2024-10-01 --json > evaluation.json
+"""
+import argparse
+import json
+import os
+import sys
 from datetime import datetime, timedelta
-import yfinance as yf
-
-
-# --- User credentials ---
-
-email = "your@email.com"  # <-- Replace with your email
-username = "yourusername"  # <-- Replace with your username
-password = "yourpassword"  # <-- Replace with your password
-
-# Step 1: Register user (ignore errors if already exists)
-
-register_resp = requests.post(
-    "http://localhost:5000/auth/register",
-    headers={"Content-Type": "application/json"},
-    json={"email": email, "username": username, "password": password}
-)
-if register_resp.status_code == 201:
-    print("User registered.")
-else:
-    try:
-        print("Registration response:", register_resp.json())
-    except Exception:
-        print("Registration response (raw):", register_resp.text)
-
-# Step 2: Login and get token
-login_resp = requests.post(
-    "http://localhost:5000/auth/login",
-    headers={"Content-Type": "application/json"},
-    json={"email": email, "password": password}
-)
-login_data = login_resp.json()
-token = login_data.get("token")
-if not token:
-    print("Login failed:", login_data)
-    exit(1)
-
-headers = {"Authorization": f"Bearer {token}"}
-
-
-# Step 3: Get prediction from backend
-resp = requests.get("http://localhost:5000/predict", headers=headers)
-data = resp.json()
-
-
-# Ensure btc_predicted and btc_dates are lists
-btc_predicted = data["BTC"].get("predicted_price")
-btc_dates = data["BTC"].get("dates")
-if not isinstance(btc_predicted, list):
-    btc_predicted = [btc_predicted]
-if not isinstance(btc_dates, list):
-    btc_dates = [btc_dates]
-
-
-# Step 3: Get historical dates from CoinGecko
-def fetch_historical_dates_yf(ticker, num_days=30):
-    # Get last num_days dates from Yahoo Finance
-    data = yf.Ticker(ticker).history(period=f"{num_days}d")
-    return [d.strftime("%Y-%m-%d") for d in data.index]
-
-
-btc_dates = fetch_historical_dates_yf("BTC-USD", 30)
-
-
-print("Date       | Predicted      | Actual         | Absolute Error")
-print("--------------------------------------------------------------")
-for date_str in btc_dates:
-    # Request model prediction for this date
-    pred_resp = requests.get(f"http://localhost:5000/predict?date={date_str}", headers=headers)
-    try:
-        pred_data = pred_resp.json()
-    except Exception as e:
-        print(f"[DEBUG] Backend response not JSON for {date_str}: {pred_resp.text}")
-        pred_data = {}
-    print(f"[DEBUG] Backend response for {date_str}: {pred_data}")
-    pred = pred_data.get("BTC", {}).get("predicted_price")
-
-    # Fetch actual price from Yahoo Finance
-    actual_price = None
-    try:
-        # Try direct lookup
-        data = yf.Ticker("BTC-USD").history(start=date_str, end=(datetime.strptime(date_str, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d"))
-        if not data.empty:
-            # Convert both to tz-naive for subtraction
-            target_dt = datetime.strptime(date_str, "%Y-%m-%d")
-            idx_naive = [d.tz_convert(None).replace(tzinfo=None) if hasattr(d, 'tzinfo') and d.tzinfo else d.replace(tzinfo=None) for d in data.index]
-            diffs = [abs((d - target_dt).days) for d in idx_naive]
-            closest_idx = diffs.index(min(diffs))
-            actual_price = float(data.iloc[closest_idx]["Close"])
-        else:
-            print(f"[YF-DEBUG] No data for {date_str}, trying ±1 day...")
-            # Try ±1 day range
-            start_dt = datetime.strptime(date_str, "%Y-%m-%d") - timedelta(days=1)
-            end_dt = datetime.strptime(date_str, "%Y-%m-%d") + timedelta(days=2)
-            data = yf.Ticker("BTC-USD").history(start=start_dt.strftime("%Y-%m-%d"), end=end_dt.strftime("%Y-%m-%d"))
-            if not data.empty:
-                target_dt = datetime.strptime(date_str, "%Y-%m-%d")
-                idx_naive = [d.tz_convert(None).replace(tzinfo=None) if hasattr(d, 'tzinfo') and d.tzinfo else d.replace(tzinfo=None) for d in data.index]
-                diffs = [abs((d - target_dt).days) for d in idx_naive]
-                closest_idx = diffs.index(min(diffs))
-                actual_price = float(data.iloc[closest_idx]["Close"])
-    except Exception as e:
-        print(f"[YF-DEBUG] Exception for {date_str}: {e}")
-        actual_price = None
-
-    if actual_price is not None and pred is not None:
-        error = abs(pred - actual_price)
-        print(f"{date_str} | {pred:13.2f} | {actual_price:13.2f} | {error:14.2f}")
+
+import requests
+
+
+def parse_args():
+    today = datetime.utcnow().date()
+    parser = argparse.ArgumentParser(description="Walk-forward evaluation of the price prediction model")
+    parser.add_argument('--start', default=(today - timedelta(days=30)).isoformat(), help="First target date (YYYY-MM-DD)")
+    parser.add_argument('--end', default=today.isoformat(), help="Last target date (YYYY-MM-DD)")
+    parser.add_argument('--symbols', default=None, help="Comma-separated symbols (default: all tracked)")
+    parser.add_argument('--window', type=int, default=30, help="Closes per fit, as in /predict?window=")
+    parser.add_argument('--horizon', type=int, default=1, help="Days ahead each prediction is made")
+    parser.add_argument('--local', action='store_true', help="Evaluate in-process instead of calling the backend")
+    parser.add_argument('--base-url', default=os.getenv('API_URL', 'http://localhost:5000'), help="Backend URL")
+    parser.add_argument('--email', default=os.getenv('VALIDATE_EMAIL', 'your@email.com'))
+    parser.add_argument('--username', default=os.getenv('VALIDATE_USERNAME', 'yourusername'))
+    parser.add_argument('--password', default=os.getenv('VALIDATE_PASSWORD', 'yourpassword'))
+    parser.add_argument('--json', action='store_true', help="Print the raw JSON result")
+    return parser.parse_args()
+
+
+def get_token(base_url, email, username, password):
+    """Registers the user (ignoring 'already exists') and returns a login token."""
+    requests.post(
+        f"{base_url}/auth/register",
+        json={"email": email, "username": username, "password": password},
+        timeout=30
+    )
+    login_resp = requests.post(f"{base_url}/auth/login", json={"email": email, "password": password}, timeout=30)
+    token = login_resp.json().get("token")
+    if not token:
+        print("Login failed:", login_resp.text, file=sys.stderr)
+        sys.exit(1)
+    return token
+
+
+def evaluate_remote(args):
+    token = get_token(args.base_url, args.email, args.username, args.password)
+    params = {'start': args.start, 'end': args.end, 'window': args.window, 'horizon': args.horizon}
+    if args.symbols:
+        params['symbols'] = args.symbols
+    resp = requests.get(
+        f"{args.base_url}/evaluate",
+        params=params,
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=120
+    )
+    data = resp.json()
+    if resp.status_code != 200:
+        print("Evaluation failed:", data, file=sys.stderr)
+        sys.exit(1)
+    return data['results']
+
+
+def evaluate_local(args):
+    # Imported here so remote runs don't need the backend's dependencies
+    from app import APICache
+    from backtest import days_needed, evaluate
+    from market_data import MarketData
+    from symbols import load_symbol_registry
+
+    registry = load_symbol_registry()
+    symbols = [s.strip().upper() for s in args.symbols.split(',')] if args.symbols else registry.symbols
+    tickers = {s: registry.get(s).yahoo if s in registry else f"{s}-USD" for s in symbols}
+    frame = MarketData(APICache(), tickers).history(days_needed(args.start, args.window, args.horizon))
+    if frame is None:
+        print("Failed to load price history", file=sys.stderr)
+        sys.exit(1)
+    return evaluate(frame, symbols, args.start, args.end, args.window, args.horizon)
+
+
+def fmt(value, width=13):
+    return f"{value:{width}.2f}" if value is not None else f"{'N/A':>{width}}"
+
+
+def print_report(results):
+    for symbol, result in results.items():
+        print(f"\n{symbol}")
+        print("Date       |     Predicted |        Actual | Absolute Error")
+        print("--------------------------------------------------------------")
+        for row in result['errors']:
+            abs_error = abs(row['error']) if row['error'] is not None else None
+            print(f"{row['date']} | {fmt(row['predicted'])} | {fmt(row['actual'])} | {fmt(abs_error, 14)}")
+        mape = f"{result['mape']:.2f}%" if result['mape'] is not None else 'N/A'
+        print(f"MAE: {fmt(result['mae'], 0).strip()}  MAPE: {mape}  RMSE: {fmt(result['rmse'], 0).strip()}  (n={result['count']})")
+
+
+def main():
+    args = parse_args()
+    results = evaluate_local(args) if args.local else evaluate_remote(args)
+    if args.json:
+        print(json.dumps(results, indent=2))
     else:
-        print(f"{date_str} | {pred if pred is not None else 'N/A':13} | {'N/A':13} | {'N/A':14}")
-        if actual_price is None:
-            print(f"[YF-DEBUG] Actual price missing for {date_str}")
-        if pred is None:
-            print(f"[YF-DEBUG] Predicted price missing for {date_str}")
+        print_report(results)
+
 
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,7 @@ export default function Price() {
   const [isRefreshing, setIsRefreshing] = useState(false);
   const [timeSinceUpdate, setTimeSinceUpdate] = useState(0);
   const [loading, setLoading] = useState(true);
+  const [streaming, setStreaming] = useState(false);
   const { getAuthHeaders } = useAuth();
 
   useEffect(() => {
@@ -23,12 +24,14 @@ export default function Price() {
   }, [lastUpdated]);
 
   useEffect(() => {
+    const API_URL = import.meta.env.VITE_API_URL;
+    let pollInterval = null;
+    let source = null;
+
     const fetchPrices = async () => {
       setIsRefreshing(true);
-      setLoading(true);
       try {
-  const API_URL = import.meta.env.VITE_API_URL;
-  const res = await axios.get(`${API_URL}/price`, {
+        const res = await axios.get(`${API_URL}/price`, {
           headers: getAuthHeaders()
         });
 
@@ -45,9 +48,44 @@ export default function Price() {
       }
     };
 
-    fetchPrices();
-    const interval = setInterval(fetchPrices, 10000);
-    return () => clearInterval(interval);
+    // Fallback: poll /price every 10 seconds
+    const startPolling = () => {
+      setStreaming(false);
+      fetchPrices();
+      pollInterval = setInterval(fetchPrices, 10000);
+    };
+
+    if (typeof EventSource === 'undefined') {
+      startPolling();
+    } else {
+      // The backend pushes a snapshot, then only the coins whose price changed
+      source = new EventSource(`${API_URL}/price/stream`);
+      const applyUpdate = (event) => {
+        const changed = JSON.parse(event.data);
+        if (Object.keys(changed).length > 0) {
+          setPrice({ ...useDataStore.getState().price, ...changed });
+          setLoading(false);
+        }
+      };
+      source.addEventListener('snapshot', applyUpdate);
+      source.addEventListener('prices', applyUpdate);
+      source.onopen = () => setStreaming(true);
+      source.onerror = () => {
+        // EventSource reconnects by itself; CLOSED means it gave up (e.g. older backend)
+        if (source.readyState === EventSource.CLOSED) {
+          source.close();
+          source = null;
+          startPolling();
+        } else {
+          setStreaming(false);
+        }
+      };
+    }
+
+    return () => {
+      if (source) source.close();
+      if (pollInterval) clearInterval(pollInterval);
+    };
   }, [getAuthHeaders, setPrice]);
 
   if (loading) {
@@ -62,9 +100,12 @@ export default function Price() {
           {isRefreshing ? (
             <span className="animate-spin inline-block mr-1">🔄</span>
           ) : (
-            <span>Last updated {lastUpdated ? timeSinceUpdate : '?'}s ago</span>
+            <span>
+              {streaming ? 'Live · last change' : 'Last updated'} {lastUpdated ? timeSinceUpdate : '?'}s ago
+            </span>
           )}
-          {lastUpdated && Date.now() - lastUpdated > 30000 && (
+          {/* While streaming, unchanged prices simply aren't resent, so age alone isn't staleness */}
+          {!streaming && lastUpdated && Date.now() - lastUpdated > 30000 && (
             <div className="text-red-400 text-xs mt-1">
               Data is over 30 seconds old. Check your network or API limits.
             </div>